@@ -0,0 +1,274 @@
+""" Throughput, latency and scaling of the conversion stages
+
+Measures camxes_to_xbar, lexp_to_tree, to_lexp and the graphviz writer
+on the fixture corpus or on synthetic trees, and the time of
+camxes_to_xbar against the size of synthetic sentences. Writes the
+results as JSON with --json, and compares two such files with
+--compare.
+"""
+from __future__ import annotations
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import typing
+
+from lojban_xbar import camxes_to_xbar, lexp_to_tree, XMax
+from lojban_xbar import Diagnostics, collect_diagnostics
+from lojban_xbar import synthetic
+from lojban_xbar.graphviz import to_graphviz
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tests'))
+from util.fixture import load_camxes_parses  # noqa: E402
+
+#
+# Synthetic camxes trees, growing in one dimension
+#
+
+
+def koha(word: str) -> list:
+    return synthetic.sumti(synthetic.sumti_3(synthetic.koha_sumti_6(word)))
+
+
+def unit(node: list) -> list:
+    return synthetic.selbri_4(synthetic.selbri_5(node))
+
+
+def brivla(word: str) -> list:
+    return unit(synthetic.brivla_unit(word))
+
+
+def with_sumti(n: int) -> list:
+    """ mi klama do do ... do """
+    return synthetic.text(synthetic.sentence(
+        synthetic.selbri([brivla('klama')]),
+        [synthetic.abs_term(koha('mi'))],
+        [synthetic.term(koha('do')) for _ in range(n - 1)]))
+
+
+def with_length(n: int) -> list:
+    """ mi barda barda ... prami, a tanru of `n` units """
+    units = [brivla('barda') for _ in range(n - 1)]
+    return synthetic.text(synthetic.sentence(
+        synthetic.selbri([*units, brivla('prami')]),
+        [synthetic.abs_term(koha('mi'))]))
+
+
+def with_depth(n: int) -> list:
+    """ mi nu ... nu prami kei klama kei klama, `n` nested sentences """
+    s = synthetic.sentence(synthetic.selbri([brivla('prami')]))
+    for _ in range(n - 1):
+        s = synthetic.sentence(synthetic.selbri(
+            [unit(synthetic.nu_unit(s)), brivla('klama')]))
+    return synthetic.text(synthetic.sentence(
+        synthetic.selbri([unit(synthetic.nu_unit(s)), brivla('klama')]),
+        [synthetic.abs_term(koha('mi'))]))
+
+
+SCALING = {
+    'sumti': (with_sumti, (1, 2, 4, 8, 16, 32, 64)),
+    'length': (with_length, (1, 2, 4, 8, 16, 32, 64)),
+    'depth': (with_depth, (1, 2, 4, 8, 16)),
+}
+
+#
+# Measurements
+#
+
+
+def load_corpus() -> list:
+    """ The fixture parses that pass all the stages """
+    corpus = []
+    for tree in load_camxes_parses().values():
+        try:
+            xmax = lexp_to_tree(camxes_to_xbar(tree))
+        except AssertionError:
+            continue
+        if isinstance(xmax, XMax):
+            corpus.append(tree)
+    return corpus
+
+
+def time_each(fn: typing.Callable, items: list, repeat: int) -> list[float]:
+    """ Seconds per call, `repeat` samples for each item """
+    clock = time.perf_counter
+    samples = []
+    for _ in range(repeat):
+        for item in items:
+            start = clock()
+            fn(item)
+            samples.append(clock() - start)
+    return samples
+
+
+def summarize(samples: list[float]) -> dict:
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'per_sec': len(samples) / sum(samples),
+            'p50_us': cuts[49] * 1e6,
+            'p90_us': cuts[89] * 1e6,
+            'p99_us': cuts[98] * 1e6,
+            'max_us': max(samples) * 1e6,
+            'samples': len(samples)}
+
+
+def write_dot(xmax) -> None:
+    to_graphviz(io.StringIO(), xmax)
+
+
+def measure_stages(corpus: list, repeat: int) -> dict:
+    lexps = [camxes_to_xbar(tree) for tree in corpus]
+    xmaxes = [lexp_to_tree(le) for le in lexps]
+    stages = {
+        'camxes_to_xbar': (camxes_to_xbar, corpus),
+        'lexp_to_tree': (lexp_to_tree, lexps),
+        'to_lexp': (lambda xmax: xmax.to_lexp(), xmaxes),
+        'to_graphviz': (write_dot, xmaxes),
+    }
+    return {name: summarize(time_each(fn, items, repeat))
+            for name, (fn, items) in stages.items()}
+
+
+def measure_scaling(repeat: int) -> dict:
+    curves = {}
+    for name, (make, sizes) in SCALING.items():
+        points = []
+        for size in sizes:
+            tree = make(size)
+            best = min(time_each(camxes_to_xbar, [tree], repeat))
+            points.append([size, best * 1e6])
+        curves[name] = points
+    return curves
+
+
+def run(repeat: int, synthetic_count: int = 0) -> dict:
+    # the problems in the input are not measured, collect them aside
+    with collect_diagnostics(Diagnostics(max_events=0, max_per_code=0)):
+        if synthetic_count:
+            corpus = list(synthetic.generate(synthetic_count, seed=0))
+        else:
+            corpus = load_corpus()
+        stages = measure_stages(corpus, repeat)
+        scaling = measure_scaling(repeat)
+    return {'meta': {'python': platform.python_version(),
+                     'platform': platform.platform(),
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                     'corpus': len(corpus), 'repeat': repeat,
+                     'synthetic': bool(synthetic_count)},
+            'stages': stages,
+            'scaling_us': scaling}
+
+
+def print_results(results: dict) -> None:
+    print(f'{"stage":<16} {"per sec":>10} {"p50 us":>9} {"p90 us":>9}'
+          f' {"p99 us":>9} {"max us":>9}')
+    for name, s in results['stages'].items():
+        print(f'{name:<16} {s["per_sec"]:>10.0f} {s["p50_us"]:>9.1f}'
+              f' {s["p90_us"]:>9.1f} {s["p99_us"]:>9.1f}'
+              f' {s["max_us"]:>9.1f}')
+    for name, points in results['scaling_us'].items():
+        print(f'camxes_to_xbar by {name}:',
+              ', '.join(f'{size}: {us:.0f} us' for size, us in points))
+
+
+#
+# Comparison of two runs
+#
+
+
+def compare(old: dict, new: dict, threshold: float) -> bool:
+    """ Print the changes, tell if nothing is slower than `threshold` """
+    ok = True
+
+    def line(name: str, old_value: float, new_value: float,
+             higher_is_better: bool) -> None:
+        nonlocal ok
+        ratio = new_value / old_value if old_value else float('inf')
+        slower = 1 / ratio if higher_is_better else ratio
+        mark = ''
+        if slower > 1 + threshold:
+            mark = '  SLOWER'
+            ok = False
+        elif slower < 1 / (1 + threshold):
+            mark = '  faster'
+        print(f'{name:<36} {old_value:>10.1f} {new_value:>10.1f}'
+              f' {ratio:>7.2f}x{mark}')
+
+    print(f'{"":<36} {"old":>10} {"new":>10} {"ratio":>8}')
+    for stage, new_stats in new['stages'].items():
+        old_stats = old['stages'].get(stage)
+        if old_stats is None:
+            continue
+        line(f'{stage} per sec', old_stats['per_sec'],
+             new_stats['per_sec'], True)
+        for key in ('p50_us', 'p99_us'):
+            line(f'{stage} {key}', old_stats[key], new_stats[key], False)
+    for curve, new_points in new['scaling_us'].items():
+        old_points = dict(old['scaling_us'].get(curve, ()))
+        for size, us in new_points:
+            if size in old_points:
+                line(f'scaling {curve}={size} us', old_points[size], us,
+                     False)
+    return ok
+
+
+def parse_command_line():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=20,
+                        help='passes over the corpus (default: %(default)s)',
+                        metavar='N')
+    parser.add_argument('--synthetic',
+                        type=int,
+                        default=0,
+                        help='measure the stages on that many synthetic'
+                             ' trees instead of the fixture corpus',
+                        metavar='N')
+    parser.add_argument('--json',
+                        help='write the results to the file',
+                        metavar='FILE')
+    parser.add_argument('--compare',
+                        nargs='+',
+                        help='compare OLD with NEW, or with a new run if'
+                             ' NEW is not given',
+                        metavar='OLD [NEW]')
+    parser.add_argument('--threshold',
+                        type=float,
+                        default=0.1,
+                        help='with --compare, the relative slowdown to'
+                             ' report as a failure (default: %(default)s)')
+    args = parser.parse_args()
+    if args.compare and len(args.compare) > 2:
+        parser.error('--compare takes one or two files')
+    if args.repeat < 1:
+        parser.error('--repeat should be positive')
+    return args
+
+
+def main():
+    args = parse_command_line()
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[0]) as h:
+            old = json.load(h)
+        with open(args.compare[1]) as h:
+            new = json.load(h)
+    else:
+        new = run(args.repeat, args.synthetic)
+        print_results(new)
+        if args.json:
+            with open(args.json, 'w') as h:
+                json.dump(new, h, indent=1)
+        if not args.compare:
+            return
+        with open(args.compare[0]) as h:
+            old = json.load(h)
+    if not compare(old, new, args.threshold):
+        sys.exit(1)
+
+
+if '__main__' == __name__:
+    main()
@@ -0,0 +1,97 @@
+""" fingerprint() vs json_digest() on the fixture parses
+
+The last case computes the keys of the subtree memo, the sumti of each
+tree, the outer ones first, as during a conversion.
+"""
+import os
+import sys
+import timeit
+
+from lojban_xbar.fingerprints import fingerprint, Fingerprints, json_digest
+from lojban_xbar.memo import SubtreeMemo
+from lojban_xbar.synthetic import generate
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tests'))
+from util.fixture import load_camxes_parses  # noqa: E402
+
+
+def replace_leaf(tree: list) -> list:
+    """ Copy of the path to the last string, the rest is shared """
+    for i in range(len(tree) - 1, -1, -1):
+        kid = tree[i]
+        if isinstance(kid, str) and i:
+            return [*tree[:i], kid + '-changed', *tree[i + 1:]]
+        if isinstance(kid, list):
+            return [*tree[:i], replace_leaf(kid), *tree[i + 1:]]
+    return tree
+
+
+def memo_subtrees(tree: list) -> list:
+    """ The subtrees keyed by `SubtreeMemo`, the outer ones first """
+    names = SubtreeMemo.default_names
+    subtrees, stack = [], [tree]
+    while stack:
+        node = stack.pop()
+        if node and node[0] in names:
+            subtrees.append(node)
+        stack.extend(reversed([kid for kid in node if isinstance(kid, list)]))
+    return subtrees
+
+
+def fingerprint_keys(per_tree: list) -> None:
+    for subtrees in per_tree:
+        memo = Fingerprints()  # shared by the sumti of one conversion
+        for node in subtrees:
+            fingerprint(node, memo)
+
+
+def json_keys(per_tree: list) -> None:
+    for subtrees in per_tree:
+        for node in subtrees:
+            json_digest(node)
+
+
+def report(name: str, seconds: float, n: int) -> None:
+    print(f'{name:<36} {seconds / n * 1e6:8.1f} us per tree')
+
+
+def main():
+    trees = list(load_camxes_parses().values())
+    number = 200
+    n = number * len(trees)
+
+    report('json_digest',
+           timeit.timeit(lambda: list(map(json_digest, trees)),
+                         number=number), n)
+    report('fingerprint',
+           timeit.timeit(lambda: list(map(fingerprint, trees)),
+                         number=number), n)
+
+    memo = Fingerprints()
+    for tree in trees:
+        fingerprint(tree, memo)
+    changed = [list(map(replace_leaf, trees)) for _ in range(number)]
+    report('json_digest, changed leaf',
+           timeit.timeit(lambda: [json_digest(tree)
+                                  for trees in changed for tree in trees],
+                         number=1), n)
+    report('fingerprint with memo, changed leaf',
+           timeit.timeit(lambda: [fingerprint(tree, memo)
+                                  for trees in changed for tree in trees],
+                         number=1), n)
+    report('fingerprint with memo, unchanged',
+           timeit.timeit(lambda: [fingerprint(tree, memo) for tree in trees],
+                         number=number), n)
+
+    per_tree = [memo_subtrees(tree) for tree in generate(2000, seed=0)]
+    n_keys = sum(map(len, per_tree))
+    print(f'\nsubtree memo keys, {n_keys} sumti of 2000 synthetic trees')
+    for name, fn in (('json_digest', json_keys),
+                     ('fingerprint with memo', fingerprint_keys)):
+        seconds = min(timeit.repeat(lambda: fn(per_tree), number=1,
+                                    repeat=5))
+        print(f'{name:<36} {seconds / n_keys * 1e6:8.1f} us per key')
+
+
+if '__main__' == __name__:
+    main()
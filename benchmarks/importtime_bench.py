@@ -0,0 +1,86 @@
+""" Import time of the scripts, from `python -X importtime`
+
+Runs each script on a small input in a new interpreter and sums the
+cumulative time of its top-level imports, less the imports of a bare
+interpreter. Fails if a script is over its budget or imports a module
+it should not need.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from lojban_xbar import camxes_to_xbar
+from lojban_xbar.synthetic import generate
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                       'scripts')
+
+# name, arguments, budget in ms, modules which should not be imported
+CASES = [
+    ('xbar_to_dot.py', ['xbar_to_dot.py'], 50, ('lxslt',)),
+    ('xbar_client.py', ['-c', 'import lojban_xbar.client'], 50,
+     ('lxslt',)),
+    ('camxes_to_xbar.py', ['camxes_to_xbar.py'], 100,
+     ('sqlite3', 'concurrent.futures')),
+    ('camxes_to_xbar.py --jsonl', ['camxes_to_xbar.py', '--jsonl'], 150,
+     ()),
+]
+
+
+def import_times(args: list, data: str) -> dict[str, int]:
+    """ The cumulative microseconds of the top-level imports """
+    if args[0].endswith('.py'):
+        args = [os.path.join(SCRIPTS, args[0])] + args[1:]
+    # the bytecode is written, the runs after the first one are warm
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    proc = subprocess.run([sys.executable, '-X', 'importtime'] + args,
+                          input=data, text=True, check=True, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not name.startswith('  '):
+            times[name.strip()] = int(cumulative)
+        times.setdefault(name.strip(), 0)
+    return times
+
+
+def median_ms(args: list, data: str, repeat: int) -> tuple[float, dict]:
+    runs = [import_times(args, data) for _ in range(repeat + 1)][1:]
+    totals = sorted(sum(times.values()) for times in runs)
+    return totals[len(totals) // 2] / 1e3, runs[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='runs of each script (default: %(default)s)')
+    args = parser.parse_args()
+    tree = next(iter(generate(1, seed=0)))
+    inputs = {'xbar_to_dot.py': json.dumps(camxes_to_xbar(tree)),
+              'camxes_to_xbar.py': json.dumps(tree)}
+    bare_ms, _ = median_ms(['-c', 'pass'], '', args.repeat)
+    failed = False
+    print(f'bare interpreter: {bare_ms:.1f} ms')
+    print(f'{"script":<28} {"import ms":>10} {"budget ms":>10}')
+    for name, script_args, budget, unwanted in CASES:
+        data = inputs.get(script_args[0], '')
+        ms, times = median_ms(script_args, data, args.repeat)
+        ms -= bare_ms
+        problems = [f'imports {module}' for module in unwanted
+                    if module in times]
+        if ms > budget:
+            problems.append('over budget')
+        failed |= bool(problems)
+        print(f'{name:<28} {ms:>10.1f} {budget:>10}'
+              f' {", ".join(problems)}')
+    sys.exit(1 if failed else 0)
+
+
+if '__main__' == __name__:
+    main()
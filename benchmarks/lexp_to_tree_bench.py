@@ -0,0 +1,49 @@
+""" lexp_to_tree: explicit stack vs recursion on deep synthetic trees """
+import sys
+import timeit
+
+from lojban_xbar.lexp import lexp_to_tree, lexp_to_tree_recursive
+
+
+def deep_complements(depth: int) -> list:
+    """ 'mi djica lo nu do djica lo nu ...' as nested V-MAX/N-MAX """
+    le = ['N-MAX', ['N-BAR', ['N', ['tag', 'pron'], 'mi']]]
+    for i in range(depth):
+        le = ['V-MAX', ['V-FRAME', ['V', 'djica'],
+                        ['N-MAX', ['N-BAR', ['N', 'nu'], le]]]]
+    return le
+
+
+def deep_adjuncts(depth: int) -> list:
+    """ a long chain of XBarRec from the conjunctions """
+    bar = ['J-BAR', ['J', ['tag', 'elide'], 'e'],
+           ['N-MAX', ['N-BAR', ['N', 'mi']]]]
+    for i in range(depth):
+        bar = ['J-BAR', bar,
+               ['J-MAX', ['J-BAR', ['J', 'e'],
+                          ['N-MAX', ['N-BAR', ['N', 'do']]]]]]
+    return ['J-MAX', bar]
+
+
+def bench(name: str, le: list, number: int) -> None:
+    t_iter = timeit.timeit(lambda: lexp_to_tree(le), number=number)
+    try:
+        t_rec = timeit.timeit(lambda: lexp_to_tree_recursive(le),
+                              number=number)
+        s_rec = f'{t_rec / number * 1e3:9.3f} ms'
+    except RecursionError:
+        s_rec = '  RecursionError'
+    print(f'{name:<24} iterative {t_iter / number * 1e3:9.3f} ms'
+          f'   recursive {s_rec}')
+
+
+def main():
+    print(f'recursion limit: {sys.getrecursionlimit()}')
+    for depth in (10, 100, 150, 1000, 10000):
+        number = max(1, 2000 // depth)
+        bench(f'complements x{depth}', deep_complements(depth), number)
+        bench(f'adjuncts x{depth}', deep_adjuncts(depth), number)
+
+
+if '__main__' == __name__:
+    main()
@@ -0,0 +1,112 @@
+""" Memory per typed X-bar node, on the fixture corpus
+
+The trees are built by `lexp_to_tree`, then copied twice by the same
+function: once with the slotted classes, and once with classes which
+keep the same attributes in a `__dict__`, as the classes did before
+they got `__slots__`. The copies compare the two layouts alone, the
+trees of `lexp_to_tree` also keep larger tag dicts, built key by key.
+"""
+from __future__ import annotations
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+from lojban_xbar import lexp_to_tree, XMax, XBarRec, XBarBase, XBarFrame
+from lojban_xbar import XSpecTag, XHead
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tests'))
+from util.fixture import load_camxes_parses  # noqa: E402
+
+
+def load_corpus() -> list:
+    """ The camxes fixtures converted to l-expressions """
+    from lojban_xbar import camxes_to_xbar
+    corpus = []
+    for tree in load_camxes_parses().values():
+        try:
+            corpus.append(camxes_to_xbar(tree))
+        except AssertionError:
+            pass
+    return corpus
+
+
+def count_nodes(tree) -> int:
+    n = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, XMax):
+            stack.extend((node.spec, node.xbar))
+        elif isinstance(node, XBarRec):
+            stack.extend((node.bar, node.adj))
+        elif isinstance(node, XBarFrame):
+            stack.append(node.head)
+            stack.extend(node.compl)
+        elif isinstance(node, XBarBase):
+            stack.extend((node.head, node.compl))
+        elif node is None or not isinstance(node, (XHead, XSpecTag)):
+            continue
+        n += 1
+    return n
+
+
+NODE_CLASSES = (XMax, XBarRec, XBarBase, XBarFrame, XSpecTag, XHead)
+# the same classes, without __slots__
+DICT_CLASSES = {cls: type(f'Dict{cls.__name__}', (), {})
+                for cls in NODE_CLASSES}
+
+
+def slot_names(cls: type) -> list[str]:
+    return [name for klass in cls.__mro__
+            for name in getattr(klass, '__slots__', ())]
+
+
+def copy_tree(value, layout: dict[type, type]):
+    """ Copy of the tree, with the node classes mapped by `layout` """
+    if isinstance(value, list):
+        return [copy_tree(item, layout) for item in value]
+    if isinstance(value, dict):
+        return dict(value)
+    cls = type(value)
+    if cls not in layout:
+        return value
+    copy_cls = layout[cls]
+    node = copy_cls.__new__(copy_cls)
+    for name in slot_names(cls):
+        object.__setattr__(node, name, copy_tree(getattr(value, name),
+                                                 layout))
+    return node
+
+
+def traced(fn) -> tuple[object, int]:
+    """ The result of `fn()` and the memory it allocated and kept """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    copies = 200
+    corpus = load_corpus()
+    les = [json.loads(json.dumps(le)) for le in corpus * copies]
+    trees, slots_size = traced(lambda: [lexp_to_tree(le) for le in les])
+    n_nodes = sum(map(count_nodes, trees))
+    print(f'{len(trees)} trees, {n_nodes} nodes')
+    print(f'{"lexp_to_tree":<18} {slots_size / n_nodes:6.1f} bytes per node')
+    for name, layout in (('copy, __slots__', {cls: cls
+                                              for cls in NODE_CLASSES}),
+                         ('copy, __dict__', DICT_CLASSES)):
+        _, size = traced(lambda: [copy_tree(tree, layout)
+                                  for tree in trees])
+        print(f'{name:<18} {size / n_nodes:6.1f} bytes per node')
+
+
+if '__main__' == __name__:
+    main()
@@ -0,0 +1,44 @@
+""" Rendering graphviz code with and without a RenderCache
+
+The l-expressions are rendered by `render_lexp`, a stream of distinct
+trees and a stream where each tree comes twice.
+"""
+import json
+import time
+
+from lojban_xbar import camxes_to_xbar
+from lojban_xbar import Diagnostics, collect_diagnostics
+from lojban_xbar.graphviz import render_lexp, RenderCache
+from lojban_xbar.synthetic import generate
+
+
+def load_lexps(count: int) -> list:
+    with collect_diagnostics(Diagnostics(max_events=0, max_per_code=0)):
+        return [camxes_to_xbar(tree) for tree in generate(count, seed=0)]
+
+
+def render_all(lexps: list, cache_size: int, repeat: int = 5) -> float:
+    """ The best time of `repeat` runs, each from an empty cache """
+    times = []
+    for _ in range(repeat):
+        cache = RenderCache(cache_size) if cache_size else None
+        start = time.perf_counter()
+        for le in lexps:
+            render_lexp(le, 'D', cache)
+        times.append((time.perf_counter() - start) * 1e3)
+    return min(times)
+
+
+def main():
+    lexps = load_lexps(2000)
+    # a copy of each l-expression, as read from a file again
+    twice = lexps + json.loads(json.dumps(lexps))
+    print(f'{"render_lexp":<30} {"no cache ms":>12} {"cache ms":>9}')
+    for name, stream in (('2000 distinct trees', lexps),
+                         ('each tree twice', twice)):
+        print(f'{name:<30} {render_all(stream, 0):>12.1f}'
+              f' {render_all(stream, 4096):>9.1f}')
+
+
+if '__main__' == __name__:
+    main()
@@ -0,0 +1,59 @@
+""" Latency of one conversion: a new process vs the conversion server """
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from lojban_xbar.client import ConversionClient
+from lojban_xbar.server import ConversionServer
+from lojban_xbar.synthetic import generate
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                       'scripts')
+
+
+def run_script(name: str, data: str, env: dict) -> None:
+    subprocess.run([sys.executable, os.path.join(SCRIPTS, name)],
+                   input=data, env=env, check=True, text=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def mean_ms(fn, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number * 1e3
+
+
+def main():
+    tree = next(iter(generate(1, seed=0)))
+    data = json.dumps(tree)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'xbar.sock')
+        server = ConversionServer(path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        env = dict(os.environ, LOJBAN_XBAR_SOCKET=path)
+        try:
+            rows = {
+                'camxes_to_xbar.py': mean_ms(
+                    lambda: run_script('camxes_to_xbar.py', data, env), 10),
+                'xbar_client.py': mean_ms(
+                    lambda: run_script('xbar_client.py', data, env), 10),
+            }
+            with ConversionClient(path) as client:
+                rows['ConversionClient.xbar'] = mean_ms(
+                    lambda: client.xbar(tree), 200)
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+    for name, ms in rows.items():
+        print(f'{name:<24} {ms:>8.2f} ms')
+
+
+if '__main__' == __name__:
+    main()
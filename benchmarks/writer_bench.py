@@ -0,0 +1,69 @@
+""" Writing typed trees: streaming writer vs json.dumps of to_lexp() """
+import io
+import json
+import time
+import tracemalloc
+
+from lojban_xbar import camxes_to_tree, Diagnostics, collect_diagnostics
+from lojban_xbar.synthetic import generate
+from lojban_xbar.writer import dump_lexp, dump_lexp_lines
+
+
+def load_trees(count: int, **settings) -> list:
+    with collect_diagnostics(Diagnostics(max_events=0, max_per_code=0)):
+        return [camxes_to_tree(tree)
+                for tree in generate(count, seed=0, **settings)]
+
+
+def with_to_lexp(trees: list, out) -> None:
+    for tree in trees:
+        out.write(json.dumps(tree.to_lexp()))
+        out.write('\n')
+
+
+def with_writer(trees: list, out) -> None:
+    dump_lexp_lines(trees, out)
+
+
+def measure(fn, trees: list) -> tuple[float, int]:
+    """ Seconds and peak traced bytes, the output is discarded """
+    out = io.StringIO()
+    start = time.perf_counter()
+    fn(trees, out)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(trees, NullWriter())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+class NullWriter(io.TextIOBase):
+    def write(self, s: str) -> int:
+        return len(s)
+
+
+def main():
+    batches = {
+        'batch of 5000 trees': load_trees(5000),
+        'one large tree': load_trees(1, max_sumti=8, max_tanru=6,
+                                     max_depth=6, rate=0.6),
+    }
+    print(f'{"":<22} {"to_lexp ms":>11} {"writer ms":>10}'
+          f' {"to_lexp peak KB":>16} {"writer peak KB":>15}')
+    for name, trees in batches.items():
+        if len(trees) == 1:
+            one = trees[0]
+            rows = [measure(lambda _, out: out.write(
+                        json.dumps(one.to_lexp())), trees),
+                    measure(lambda _, out: dump_lexp(one, out), trees)]
+        else:
+            rows = [measure(with_to_lexp, trees),
+                    measure(with_writer, trees)]
+        (t_lexp, m_lexp), (t_writer, m_writer) = rows
+        print(f'{name:<22} {t_lexp * 1e3:>11.1f} {t_writer * 1e3:>10.1f}'
+              f' {m_lexp / 1024:>16.1f} {m_writer / 1024:>15.1f}')
+
+
+if '__main__' == __name__:
+    main()
@@ -0,0 +1,76 @@
+""" XMax accessors: cached vs walking the adjunct chain on every call
+
+The queries take the i-th adjunct on each step, from the cached tuple
+`adjuncts`, from a new list of `to_adj()`, and by walking the chain.
+"""
+import timeit
+
+from lojban_xbar import lexp_to_tree, XBarRec
+
+
+def deep_adjuncts(depth: int) -> list:
+    """ 'barda' with a chain of `depth` adjuncts """
+    bar = ['N-BAR', ['N', 'barda']]
+    for i in range(depth):
+        bar = ['N-BAR', bar, ['N-MAX', ['N-BAR', ['N', f'a{i}']]]]
+    return ['N-MAX', bar]
+
+
+def walk_head(xmax):
+    """ The accessors before the cache """
+    bar = xmax.xbar
+    while isinstance(bar, XBarRec):
+        bar = bar.bar
+    return bar.head
+
+
+def walk_adj(xmax) -> list:
+    adj = []
+    bar = xmax.xbar
+    while isinstance(bar, XBarRec):
+        adj.append(bar.adj)
+        bar = bar.bar
+    return adj
+
+
+def query_cached(xmax) -> int:
+    """ A loop over the adjuncts which asks the head every time """
+    n = 0
+    for i in range(len(xmax.adjuncts)):
+        n += xmax.to_head() is not xmax.adjuncts[i].to_head()
+    return n
+
+
+def query_to_adj(xmax) -> int:
+    n = 0
+    for i in range(len(xmax.to_adj())):
+        n += xmax.to_head() is not xmax.to_adj()[i].to_head()
+    return n
+
+
+def query_walk(xmax) -> int:
+    n = 0
+    for i in range(len(walk_adj(xmax))):
+        n += walk_head(xmax) is not walk_head(walk_adj(xmax)[i])
+    return n
+
+
+def main():
+    print(f'{"adjuncts":>8} {"first call us":>14} {"adjuncts us":>12}'
+          f' {"to_adj us":>10} {"walking us":>11}')
+    for depth in (10, 100, 1000, 5000):
+        xmax = lexp_to_tree(deep_adjuncts(depth))
+        number = max(1, 2000 // depth)
+        # a new tree for each first call, so the cache is cold
+        trees = [lexp_to_tree(deep_adjuncts(depth)) for _ in range(number)]
+        t_first = timeit.timeit(lambda: trees.pop().adjuncts, number=number)
+        times = [timeit.timeit(lambda: query(xmax), number=number)
+                 for query in (query_cached, query_to_adj, query_walk)]
+        print(f'{depth:>8} {t_first / number * 1e6:>14.1f}'
+              f' {times[0] / number * 1e6:>12.1f}'
+              f' {times[1] / number * 1e6:>10.1f}'
+              f' {times[2] / number * 1e6:>11.1f}')
+
+
+if '__main__' == __name__:
+    main()
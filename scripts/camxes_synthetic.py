@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+if 'LOJBAN_XBAR_DEVEL' in os.environ:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from lojban_xbar.synthetic import CamxesGenerator, CONSTRUCTS
+
+
+def parse_command_line():
+    parser = argparse.ArgumentParser(
+        description='Generate random camxes parse trees, one per line',
+        epilog=f'$ {__file__} --count 1000 --seed 1'
+               ' | camxes_to_xbar.py --jsonl >xbar.jsonl')
+    parser.add_argument('--count',
+                        type=int,
+                        default=1000,
+                        help='number of the trees (default: %(default)s)',
+                        metavar='N')
+    parser.add_argument('--seed',
+                        type=int,
+                        help='seed of the random generator, the same seed'
+                             ' and settings give the same trees',
+                        metavar='N')
+    parser.add_argument('--max-sumti',
+                        type=int,
+                        default=4,
+                        help='at most that many sumti in a sentence'
+                             ' (default: %(default)s)',
+                        metavar='N')
+    parser.add_argument('--max-tanru',
+                        type=int,
+                        default=3,
+                        help='at most that many units in a tanru'
+                             ' (default: %(default)s)',
+                        metavar='N')
+    parser.add_argument('--max-depth',
+                        type=int,
+                        default=2,
+                        help='at most that many nested sentences and sumti'
+                             ' (default: %(default)s)',
+                        metavar='N')
+    parser.add_argument('--rate',
+                        type=float,
+                        default=0.3,
+                        help='probability to use an optional construct'
+                             ' (default: %(default)s)',
+                        metavar='P')
+    parser.add_argument('--repeat-rate',
+                        type=float,
+                        default=0.1,
+                        help='probability to repeat a sumti generated'
+                             ' before (default: %(default)s)',
+                        metavar='P')
+    parser.add_argument('--sentence-repeat-rate',
+                        type=float,
+                        default=0.0,
+                        help='probability to repeat a sentence generated'
+                             ' before (default: %(default)s)',
+                        metavar='P')
+    parser.add_argument('--constructs',
+                        default=','.join(sorted(CONSTRUCTS)),
+                        help='comma-separated constructs to use'
+                             ' (default: %(default)s)',
+                        metavar='LIST')
+    parser.add_argument('--id-field',
+                        help='write objects with the line number in the'
+                             ' field and the tree in the "tree" field, as'
+                             ' camxes_to_xbar.py --id-field expects',
+                        metavar='FIELD')
+    args = parser.parse_args()
+    if args.count < 0:
+        parser.error('--count should not be negative')
+    args.constructs = {name for name in args.constructs.split(',') if name}
+    if not args.constructs <= CONSTRUCTS:
+        parser.error(f'unknown constructs:'
+                     f' {",".join(sorted(args.constructs - CONSTRUCTS))}')
+    return args
+
+
+def main():
+    args = parse_command_line()
+    try:
+        generator = CamxesGenerator(
+            args.seed, max_sumti=args.max_sumti, max_tanru=args.max_tanru,
+            max_depth=args.max_depth, rate=args.rate,
+            repeat_rate=args.repeat_rate,
+            sentence_repeat_rate=args.sentence_repeat_rate,
+            constructs=args.constructs)
+    except ValueError as e:
+        sys.exit(f'{__file__}: {e}')
+    out = sys.stdout
+    for line_no in range(1, args.count + 1):
+        tree = generator.text()
+        if args.id_field:
+            tree = {args.id_field: line_no, 'tree': tree}
+        json.dump(tree, out)
+        out.write('\n')
+
+
+if '__main__' == __name__:
+    main()
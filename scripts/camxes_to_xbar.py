@@ -1,28 +1,240 @@
 #!/usr/bin/env python3
 
+from __future__ import annotations
+
+import argparse
+import collections
 import json
 import os
 import sys
+import typing
 
 if 'LOJBAN_XBAR_DEVEL' in os.environ:
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
 
-from lojban_xbar import camxes_to_xbar
+# Only the conversion is imported here, the modules of the other modes
+# are imported by these modes, to start faster.
+from lojban_xbar.camxes_to_xbar import camxes_to_xbar, camxes_to_tree
+from lojban_xbar.camxes_to_xbar import collapse_chains
+from lojban_xbar.profiling import RuleProfiler
 
 
-def print_help():
-    print("Convert camxes parse tree to XBar")
-    print(f"$ camxes.py 'mi klama' | {__file__} | xbar_to_dot.py >xbar.dot")
+def parse_command_line():
+    parser = argparse.ArgumentParser(
+        description='Convert camxes parse tree to XBar',
+        epilog=f"$ camxes.py 'mi klama' | {__file__} | xbar_to_dot.py"
+               ' >xbar.dot')
+    parser.add_argument('--dot',
+                        action='store_true',
+                        help='write the graphviz code instead of the'
+                             ' l-expression, as xbar_to_dot.py does')
+    parser.add_argument('--jsonl',
+                        action='store_true',
+                        help='read one camxes tree per line, write one'
+                             ' l-expression per line')
+    parser.add_argument('--id-field',
+                        help='in the JSON Lines mode, the input lines are'
+                             ' objects, pass the field through to the output',
+                        metavar='FIELD')
+    parser.add_argument('--tree-field',
+                        default='tree',
+                        help='with --id-field, the field with the camxes tree'
+                             ' (default: %(default)s)',
+                        metavar='FIELD')
+    parser.add_argument('--flush-every',
+                        type=int,
+                        help='in the JSON Lines mode, flush the output after'
+                             ' that many lines (default: 1)',
+                        metavar='N')
+    parser.add_argument('--text',
+                        action='store_true',
+                        help='the input is a text of several sentences,'
+                             ' write a list of l-expressions, one per'
+                             ' sentence')
+    parser.add_argument('--collapse',
+                        action='store_true',
+                        help='fold pass-through wrapper chains of the camxes'
+                             ' tree before the conversion')
+    parser.add_argument('--memo-size',
+                        type=int,
+                        help='in the JSON Lines mode, cache the conversion'
+                             ' of that many repeated sumti subtrees',
+                        metavar='N')
+    parser.add_argument('--cache',
+                        help='in the JSON Lines mode, keep the conversions'
+                             ' in that SQLite file and reuse them for the'
+                             ' same trees in the next runs',
+                        metavar='FILE')
+    parser.add_argument('--cache-size',
+                        type=int,
+                        default=1_000_000,
+                        help='with --cache, keep at most that many'
+                             ' conversions (default: %(default)s)',
+                        metavar='N')
+    parser.add_argument('--profile',
+                        choices=('table', 'json'),
+                        help='write the time and the match count of each'
+                             ' rule to stderr')
+    parser.add_argument('--workers',
+                        type=int,
+                        default=0,
+                        help='in the JSON Lines and the text modes, convert'
+                             ' in that many worker processes'
+                             ' (default: in-process)',
+                        metavar='N')
+    args = parser.parse_args()
+    if not args.jsonl:
+        jsonl_only = [option for option, value in (
+            ('--id-field', args.id_field),
+            ('--flush-every', args.flush_every is not None),
+            ('--memo-size', args.memo_size is not None),
+            ('--cache', args.cache)) if value]
+        if jsonl_only:
+            parser.error(f'{", ".join(jsonl_only)} work only with --jsonl')
+    if args.workers and not (args.jsonl or args.text):
+        parser.error('--workers works only with --jsonl or --text')
+    if args.flush_every is None:
+        args.flush_every = 1
+    if args.flush_every < 1:
+        parser.error('--flush-every should be positive')
+    if args.dot and args.id_field:
+        parser.error('--dot can not pass an id field through')
+    if args.text and (args.jsonl or args.dot):
+        parser.error('--text works only without --jsonl and --dot')
+    if args.cache_size < 1:
+        parser.error('--cache-size should be positive')
+    if args.profile and args.workers:
+        parser.error('--profile works only without --workers')
+    return args
 
 
-def main():
+Record = collections.namedtuple('Record', 'line_no id error')
+
+
+def read_records(h: typing.TextIO, args, records: collections.deque
+                 ) -> typing.Iterator[object]:
+    """ Yield camxes trees, and queue up the matching line metadata """
+    for line_no, line in enumerate(h, 1):
+        if not line.strip():
+            continue
+        id_, tree, error = None, None, None
+        try:
+            tree = json.loads(line)
+            if args.id_field:
+                id_ = tree.get(args.id_field)
+                tree = tree[args.tree_field]
+            if args.collapse:
+                tree = collapse_chains(tree, in_place=True)
+        except (ValueError, AttributeError, KeyError) as e:
+            error = f'can not load the input: {e!r}'
+        records.append(Record(line_no, id_, error))
+        yield tree
+
+
+def main_jsonl(args):
+    import sqlite3
+    from lojban_xbar.result_cache import ResultCache
+    cache = ResultCache(args.cache, max_entries=args.cache_size) \
+        if args.cache else None
+    try:
+        write_jsonl(args, cache)
+    finally:
+        # also on an error or a broken pipe, not to lose the pending
+        # results of the cache
+        if cache is not None:
+            try:
+                cache.close()
+            except sqlite3.Error as e:
+                sys.exit(f'{__file__}: can not write the cache: {e}')
+
+
+def write_jsonl(args, cache):
+    from lojban_xbar.batch import camxes_to_xbar_many
+    from lojban_xbar.graphviz import to_graphviz
+    from lojban_xbar.lexp import lexp_to_tree
+    records = collections.deque()
+    trees = read_records(sys.stdin, args, records)
+    results = camxes_to_xbar_many(trees, workers=args.workers,
+                                  memo_size=args.memo_size,
+                                  profiler=args.profiler, cache=cache)
+    out = sys.stdout
+    for n, result in enumerate(results, 1):
+        record = records.popleft()
+        error = record.error or result.error
+        value = None if error else result.value
+        for diag in result.diagnostics:
+            print(f'{__file__}: line {record.line_no}: {diag}',
+                  file=sys.stderr)
+        if error:
+            print(f'{__file__}: line {record.line_no}: {error}',
+                  file=sys.stderr)
+        if args.dot:
+            if not error:
+                to_graphviz(out, lexp_to_tree(value))
+        elif args.id_field:
+            obj = {args.id_field: record.id, 'xbar': value}
+            if error:
+                obj['error'] = error
+            out.write(json.dumps(obj))
+            out.write('\n')
+        else:
+            out.write(json.dumps(value))
+            out.write('\n')
+        if n % args.flush_every == 0:
+            out.flush()
+    out.flush()
+
+
+def main_one(args):
     camxes_tree = json.load(sys.stdin)
-    lcs_tree = camxes_to_xbar(camxes_tree)
+    if args.collapse:
+        camxes_tree = collapse_chains(camxes_tree, in_place=True)
+    if args.dot:
+        from lojban_xbar.graphviz import to_graphviz
+        to_graphviz(sys.stdout,
+                    camxes_to_tree(camxes_tree, profiler=args.profiler))
+        return
+    if args.text:
+        main_text(args, camxes_tree)
+        return
+    lcs_tree = camxes_to_xbar(camxes_tree, profiler=args.profiler)
     json.dump(lcs_tree, sys.stdout)
     print('')
 
 
-if '-' in sys.argv or '--help' in sys.argv:
-    print_help()
-else:
+def main_text(args, camxes_tree):
+    """ Write the sentences as they are converted, as one JSON list """
+    from lojban_xbar.text import camxes_text_to_xbar
+    xbars = camxes_text_to_xbar(camxes_tree, lazy=True,
+                                workers=args.workers, profiler=args.profiler)
+    out = sys.stdout
+    out.write('[')
+    for n, xbar in enumerate(xbars):
+        if n:
+            out.write(', ')
+        json.dump(xbar, out)
+        out.flush()
+    out.write(']\n')
+
+
+def write_profile(args):
+    if args.profile == 'json':
+        json.dump(args.profiler.to_json(), sys.stderr, indent=1)
+        sys.stderr.write('\n')
+    else:
+        print(args.profiler.table(), file=sys.stderr)
+
+
+def main():
+    args = parse_command_line()
+    args.profiler = RuleProfiler() if args.profile else None
+    if args.jsonl:
+        main_jsonl(args)
+    else:
+        main_one(args)
+    if args.profiler:
+        write_profile(args)
+
+
+if '__main__' == __name__:
     main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+if 'LOJBAN_XBAR_DEVEL' in os.environ:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from lojban_xbar.client import ConversionClient
+
+
+def parse_command_line():
+    parser = argparse.ArgumentParser(
+        description='Convert with a running xbar_server.py, in place of'
+                    ' camxes_to_xbar.py and xbar_to_dot.py',
+        epilog="$ camxes.py 'mi klama' | "
+               f'{__file__} --dot >xbar.dot')
+    parser.add_argument('--socket',
+                        help='path of the socket of the server',
+                        metavar='PATH')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--dot',
+                      action='store_true',
+                      help='write the graphviz code instead of the'
+                           ' l-expression')
+    mode.add_argument('--text',
+                      action='store_true',
+                      help='the input is a text of several sentences,'
+                           ' write a list of l-expressions')
+    mode.add_argument('--to-dot',
+                      action='store_true',
+                      help='the input is an l-expression, write its'
+                           ' graphviz code, as xbar_to_dot.py does')
+    mode.add_argument('--health',
+                      action='store_true',
+                      help='write the health of the server')
+    mode.add_argument('--stats',
+                      action='store_true',
+                      help='write the request counts of the server')
+    parser.add_argument('--jsonl',
+                        action='store_true',
+                        help='read one input per line, write one result'
+                             ' per line, over one connection')
+    parser.add_argument('--collapse',
+                        action='store_true',
+                        help='fold pass-through wrapper chains of the camxes'
+                             ' tree before the conversion')
+    return parser.parse_args()
+
+
+def request_for(args, value) -> dict:
+    if args.to_dot:
+        return {'op': 'dot', 'xbar': value}
+    op = 'xbar_dot' if args.dot else 'text' if args.text else 'xbar'
+    return {'op': op, 'tree': value, 'collapse': args.collapse}
+
+
+def write_result(args, value) -> None:
+    if isinstance(value, str):
+        sys.stdout.write(value)
+        if args.jsonl:
+            sys.stdout.write('\n')
+    else:
+        sys.stdout.write(json.dumps(value))
+        sys.stdout.write('\n')
+
+
+def convert(client: ConversionClient, args, value, where: str) -> bool:
+    try:
+        response = client.request(**request_for(args, value))
+    except (RuntimeError, ValueError) as e:
+        # an error of the server, or a request over the frame size limit
+        print(f'{__file__}: {where}{e}', file=sys.stderr)
+        if args.jsonl:
+            # keep the output lines aligned with the input lines
+            write_result(args, None)
+        return False
+    for diag in response['diagnostics']:
+        print(f'{__file__}: {where}{diag}', file=sys.stderr)
+    write_result(args, response['value'])
+    return True
+
+
+def convert_stdin(client: ConversionClient, args) -> bool:
+    try:
+        value = json.load(sys.stdin)
+    except ValueError as e:
+        print(f'{__file__}: can not load the input: {e!r}', file=sys.stderr)
+        return False
+    return convert(client, args, value, '')
+
+
+def convert_lines(client: ConversionClient, args) -> bool:
+    ok = True
+    for line_no, line in enumerate(sys.stdin, 1):
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError as e:
+            print(f'{__file__}: line {line_no}: can not load the input:'
+                  f' {e!r}', file=sys.stderr)
+            write_result(args, None)
+            ok = False
+        else:
+            ok &= convert(client, args, value, f'line {line_no}: ')
+        sys.stdout.flush()
+    return ok
+
+
+def main():
+    args = parse_command_line()
+    ok = True
+    try:
+        with ConversionClient(args.socket) as client:
+            if args.health or args.stats:
+                value = client.health() if args.health else client.stats()
+                json.dump(value, sys.stdout, indent=1)
+                sys.stdout.write('\n')
+            elif args.jsonl:
+                ok = convert_lines(client, args)
+            else:
+                ok = convert_stdin(client, args)
+    except OSError as e:
+        # no server or a lost connection
+        print(f'{__file__}: {e}', file=sys.stderr)
+        ok = False
+    sys.exit(0 if ok else 1)
+
+
+if '__main__' == __name__:
+    main()
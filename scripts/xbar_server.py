@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import sys
+
+if 'LOJBAN_XBAR_DEVEL' in os.environ:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from lojban_xbar.protocol import default_socket_path
+from lojban_xbar.server import ConversionServer
+
+
+def parse_command_line():
+    parser = argparse.ArgumentParser(
+        description='Serve the conversion on a Unix socket, for'
+                    ' xbar_client.py',
+        epilog=f'$ {__file__} & camxes.py "mi klama"'
+               ' | xbar_client.py --dot >xbar.dot')
+    parser.add_argument('--socket',
+                        default=default_socket_path(),
+                        help='path of the socket (default: %(default)s)',
+                        metavar='PATH')
+    parser.add_argument('--workers',
+                        type=int,
+                        default=0,
+                        help='convert in that many worker processes'
+                             ' (default: in the connection threads)',
+                        metavar='N')
+    parser.add_argument('--memo-size',
+                        type=int,
+                        help='cache the conversion of that many repeated'
+                             ' sumti subtrees, in each process',
+                        metavar='N')
+    args = parser.parse_args()
+    if args.workers < 0:
+        parser.error('--workers should not be negative')
+    return args
+
+
+def stop(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main():
+    args = parse_command_line()
+    signal.signal(signal.SIGTERM, stop)
+    server = ConversionServer(args.socket, workers=args.workers,
+                              memo_size=args.memo_size)
+    print(f'{__file__}: serving on {args.socket}', file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if '__main__' == __name__:
+    main()
@@ -3,150 +3,21 @@
 from __future__ import annotations
 
 import argparse
+import collections
+import json
 import os
+import re
 import sys
-
 import typing
 
 if 'LOJBAN_XBAR_DEVEL' in os.environ:
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
 
 from lojban_xbar import lexp
-from lojban_xbar import XBarBase, XSpecTag, XMax, XSpec, XHead, str_tag
-from lojban_xbar import isinstance_xspec, XBarFrame, XBarRec
-
-
-def get_indent(level: int) -> str:
-    return '  ' * level
-
-
-def write_node(h: typing.TextIO,
-               label: str,
-               level: int,
-               id_: str,
-               parent_id: typing.Union[str, None]) -> None:
-    label = label.replace('"', "'")
-    indent = get_indent(level)
-    h.write(f'{indent}{id_} [label="{label}"]\n')
-    if parent_id:
-        h.write(f'{indent}{parent_id} -> {id_}\n')
-
-
-def to_graphviz_unknown(h: typing.TextIO,
-                        node: object,
-                        level: int,
-                        parent_id: typing.Union[str, None]) -> None:
-    id_ = f'node{id(node)}'
-    label = str(node)[:16]
-    if len(label) > 16:
-        label = label[:13] + '...'
-    indent = get_indent(level)
-    h.write(f'{indent}{id_} [label="{label}"]\n')
-    if parent_id:
-        h.write(f'{indent}{parent_id} -> {id_}\n')
-
-
-def str_tags_iter(tags: typing.Optional[dict[str, str]]) \
-        -> typing.Iterable[str]:
-    if not tags:
-        return []
-    return map(str_tag, tags.items())
-
-
-def to_graphviz_xhead(h: typing.TextIO,
-                      xhead: XHead,
-                      level: int,
-                      parent_id: typing.Union[str, None]) -> None:
-    id_ = f'node{id(xhead)}'
-    ls = []
-    if xhead.s is not None:
-        ls.append(xhead.s)
-    ls.extend(str_tags_iter(xhead.tags))
-    if not ls:
-        return
-    ls = map(str, ls)
-    label = '\\n'.join(ls)
-    write_node(h, label, level, id_, parent_id)
-
-
-def to_graphviz_xbar_base(h: typing.TextIO,
-                          xbar: typing.Union[XBarBase, XBarFrame],
-                          level: int,
-                          parent_id: typing.Union[str, None]) -> None:
-    id_ = str(id(xbar))
-    write_node(h, str(xbar.type) + "'", level, id_, parent_id)
-    if isinstance(xbar.head, XHead):
-        to_graphviz_xhead(h, xbar.head, level + 1, id_)
-    else:
-        to_graphviz_unknown(h, xbar.head, level + 1, id_)
-    ls = xbar.compl if isinstance(xbar, XBarFrame) else [xbar.compl]
-    for compl in ls:
-        if isinstance(compl, XMax):
-            to_graphviz_xmax(h, compl, level + 1, id_)
-        elif xbar.compl:
-            to_graphviz_unknown(h, compl, level + 1, id_)
-
-
-def to_graphviz_xbar_rec(h: typing.TextIO,
-                         xbar: XBarRec,
-                         level: int,
-                         parent_id: typing.Union[str, None]) -> None:
-    id_ = str(id(xbar))
-    write_node(h, str(xbar.type) + "'", level, id_, parent_id)
-    to_graphviz_xbar(h, xbar.bar, level + 1, id_)
-    if isinstance(xbar.adj, XMax):
-        to_graphviz_xmax(h, xbar.adj, level + 1, id_)
-    else:
-        to_graphviz_unknown(h, xbar.adj, level + 1, id_)
+from lojban_xbar.graphviz import to_graphviz, render_many
 
-
-def to_graphviz_xbar(h: typing.TextIO,
-                     xbar: typing.Union[XBarBase, XBarFrame, XBarRec],
-                     level: int,
-                     parent_id: typing.Union[str, None]) -> None:
-    if isinstance(xbar, XBarBase) or isinstance(xbar, XBarFrame):
-        to_graphviz_xbar_base(h, xbar, level, parent_id)
-    elif isinstance(xbar, XBarRec):
-        to_graphviz_xbar_rec(h, xbar, level, parent_id)
-    else:
-        to_graphviz_unknown(h, xbar, level, str(id(xbar)))
-
-
-def to_graphviz_xspec(h: typing.TextIO,
-                      xspec: XSpec,
-                      level: int,
-                      parent_id: typing.Union[str, None]) -> None:
-    id_ = f'node{id(xspec)}'
-    if isinstance(xspec, XMax):
-        return to_graphviz_xmax(h, xspec, level, parent_id)
-    if not isinstance(xspec, XSpecTag):
-        raise ValueError('Unsupported Spec: ' + str(xspec))
-    label = '\n'.join(str_tags_iter(xspec.tags))
-    if not label:
-        return
-    write_node(h, label, level, id_, parent_id)
-
-
-def to_graphviz_xmax(h: typing.TextIO,
-                     xmax: XMax,
-                     level: int,
-                     parent_id: typing.Union[str, None]) -> None:
-    id_ = f'node{id(xmax)}'
-    write_node(h, str(xmax.type) + 'P', level, id_, parent_id)
-    if isinstance_xspec(xmax.spec):
-        to_graphviz_xspec(h, xmax.spec, level + 1, id_)
-    elif xmax.spec is not None:
-        to_graphviz_unknown(h, xmax.spec, level + 1, id_)
-    to_graphviz_xbar(h, xmax.xbar, level + 1, id_)
-
-
-def to_graphviz(h: typing.TextIO, xmax: XMax) -> None:
-    h.write('digraph D {\n')
-    if isinstance(xmax, XMax):
-        to_graphviz_xmax(h, xmax, 0, None)
-    else:
-        to_graphviz_unknown(h, xmax, 0, None)
-    h.write('}\n')
+# In the JSON Lines mode, the graphs are written in pieces of that size
+OUTPUT_BUFFER_SIZE = 1 << 20
 
 
 def parse_command_line():
@@ -159,30 +30,64 @@ def parse_command_line():
                         dest='output',
                         help='write the graphviz code to the file',
                         metavar='FILE')
+    parser.add_argument('--jsonl',
+                        action='store_true',
+                        help='read one l-expression per line, as'
+                             ' camxes_to_xbar.py --jsonl writes, and write'
+                             ' all the graphs to --out, one after another')
+    parser.add_argument('--out-dir',
+                        help='in the JSON Lines mode, write each graph to'
+                             ' its own .dot file in the directory, instead'
+                             ' of all of them to --out',
+                        metavar='DIR')
+    parser.add_argument('--id-field',
+                        help='in the JSON Lines mode, the input lines are'
+                             ' objects, the field names the graph and its'
+                             ' file (default: the line number)',
+                        metavar='FIELD')
+    parser.add_argument('--xbar-field',
+                        default='xbar',
+                        help='with --id-field, the field with the'
+                             ' l-expression (default: %(default)s)',
+                        metavar='FIELD')
+    parser.add_argument('--workers',
+                        type=int,
+                        default=0,
+                        help='in the JSON Lines mode, render in that many'
+                             ' worker processes (default: in-process)',
+                        metavar='N')
+    parser.add_argument('--cache-size',
+                        type=int,
+                        default=0,
+                        help='in the JSON Lines mode, reuse the graphs of'
+                             ' the last N distinct l-expressions, in each'
+                             ' process. Only whole graphs are cached, it'
+                             ' pays off when the same l-expressions come'
+                             ' again (default: no cache)',
+                        metavar='N')
     parser.add_argument('rest', nargs='*')
-    return parser.parse_args()
+    args = parser.parse_args()
+    if ((args.out_dir or args.id_field or args.workers or args.cache_size)
+            and not args.jsonl):
+        parser.error('--out-dir, --id-field, --workers and --cache-size work'
+                     ' only with --jsonl')
+    if args.out_dir and args.output:
+        parser.error('--out-dir and --out are exclusive')
+    return args
 
 
 def read_input(args):
-    import json
-    h = None
-    s_in = ' '.join(args.rest)
     if args.input:
-        h = open(args.input)
-    if h is None and not s_in:
-        h = sys.stdin
-    if h:
-        s_in = h.read()
-    if h and h is not sys.stdin:
-        h.close()
-
-    le = json.loads(s_in)
+        with open(args.input) as h:
+            le = json.load(h)
+    elif args.rest:
+        le = json.loads(' '.join(args.rest))
+    else:
+        le = json.load(sys.stdin)
     return lexp.lexp_to_tree(le)
 
 
-def main():
-    import sys
-    args = parse_command_line()
+def main_one(args):
     xmax = read_input(args)
     h = sys.stdout
     if args.output:
@@ -194,5 +99,100 @@ def main():
             h.close()
 
 
+Record = collections.namedtuple('Record', 'line_no name')
+
+
+def file_name(name: str) -> str:
+    return re.sub(r'[^\w.-]', '_', name).lstrip('.') or '_'
+
+
+def unique_file_name(name: str, used: set[str]) -> str:
+    """ The file name of the graph, with a suffix if it is already used
+
+    The ids which differ only in the replaced characters, and the
+    repeated ids, would overwrite the files of each other.
+    """
+    base = file_name(name)
+    unique, n = base, 1
+    while unique in used:
+        n += 1
+        unique = f'{base}~{n}'
+    used.add(unique)
+    return unique
+
+
+def read_records(h: typing.TextIO, args, records: collections.deque
+                 ) -> typing.Iterator[tuple[list, str]]:
+    """ Yield (l-expression, name), and queue up the line metadata """
+    for line_no, line in enumerate(h, 1):
+        if not line.strip():
+            continue
+        name = str(line_no)
+        try:
+            le = json.loads(line)
+            if args.id_field:
+                name = str(le.get(args.id_field, name))
+                le = le[args.xbar_field]
+        except (ValueError, AttributeError, KeyError) as e:
+            print(f'{__file__}: line {line_no}: can not load the input:'
+                  f' {e!r}', file=sys.stderr)
+            continue
+        if le is None:
+            # a failed conversion, reported by camxes_to_xbar.py
+            continue
+        records.append(Record(line_no, name))
+        yield le, name
+
+
+def main_jsonl(args):
+    h_in = open(args.input) if args.input else sys.stdin
+    out = sys.stdout
+    if args.output:
+        out = open(args.output, 'w')
+    elif args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    records = collections.deque()
+    try:
+        results = render_many(read_records(h_in, args, records),
+                              workers=args.workers,
+                              cache_size=args.cache_size)
+        buffer, size = [], 0
+        used_names: set[str] = set()
+        for dot, error in results:
+            record = records.popleft()
+            if error:
+                print(f'{__file__}: line {record.line_no}: {error}',
+                      file=sys.stderr)
+            elif args.out_dir:
+                name = unique_file_name(record.name, used_names)
+                if name != file_name(record.name):
+                    print(f'{__file__}: line {record.line_no}: the file'
+                          f' name of {record.name!r} is already used,'
+                          f' writing {name}.dot', file=sys.stderr)
+                path = os.path.join(args.out_dir, name + '.dot')
+                with open(path, 'w') as h:
+                    h.write(dot)
+            else:
+                buffer.append(dot)
+                size += len(dot)
+                if size >= OUTPUT_BUFFER_SIZE:
+                    out.write(''.join(buffer))
+                    buffer, size = [], 0
+        out.write(''.join(buffer))
+    finally:
+        if h_in is not sys.stdin:
+            h_in.close()
+        if out is not sys.stdout:
+            out.close()
+
+
+def main():
+    args = parse_command_line()
+    if args.jsonl:
+        main_jsonl(args)
+    else:
+        main_one(args)
+
+
 if '__main__' == __name__:
     main()
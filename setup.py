@@ -18,7 +18,9 @@ setuptools.setup(
     ],
     package_dir={'lojban_xbar': './src/lojban_xbar'},
     packages=['lojban_xbar'],
-    scripts=['scripts/camxes_to_xbar.py', 'scripts/xbar_to_dot.py'],
+    scripts=['scripts/camxes_to_xbar.py', 'scripts/xbar_to_dot.py',
+             'scripts/camxes_synthetic.py', 'scripts/xbar_server.py',
+             'scripts/xbar_client.py'],
     python_requires=">=3.6",
     install_requires=deps,
 )
@@ -1,14 +1,83 @@
-from .types import XType, XSpecTag, XHead, XBarBase, XBarFrame, XBarRec, XBar
-from .types import isinstance_xspec, isinstance_xbar, XSpec, XMax, tags_to_list
-from .types import str_tag
-from .lexp import lexp_to_tree, is_node_name, is_max_node, is_bar_node
-from .lexp import is_head_node, is_spec_node, lexp_to_complement
-from .camxes_to_xbar import camxes_to_xbar
+from __future__ import annotations
+import importlib
+import sys
+import typing
+from types import ModuleType
+
+# The public names, by module. A module is imported on the first use of
+# one of its names, so that rendering a tree or talking to the server
+# does not import the converter and lxslt.
+_MODULES = {
+    'types': ('XType', 'XSpecTag', 'XHead', 'XBarBase', 'XBarFrame',
+              'XBarRec', 'XBar', 'isinstance_xspec', 'isinstance_xbar',
+              'XSpec', 'XMax', 'tags_to_list', 'str_tag'),
+    'lexp': ('lexp_to_tree', 'is_node_name', 'is_max_node', 'is_bar_node',
+             'is_head_node', 'is_spec_node', 'lexp_to_complement'),
+    'camxes_to_xbar': ('camxes_to_xbar', 'camxes_to_tree'),
+    'batch': ('camxes_to_xbar_many', 'BatchResult'),
+    'interning': ('NodeInterner',),
+    'fingerprints': ('fingerprint', 'Fingerprints'),
+    'diagnostics': ('Diagnostic', 'Diagnostics', 'collect_diagnostics'),
+    'profiling': ('RuleProfiler',),
+    'text': ('camxes_text_to_xbar', 'iter_camxes_to_xbar',
+             'iter_sentence_nodes'),
+    'writer': ('dumps_lexp', 'dump_lexp', 'dump_lexp_lines'),
+    'result_cache': ('ResultCache',),
+}
+_EXPORTS = {name: module
+            for module, names in _MODULES.items() for name in names}
 
 __all__ = [
-    XType, XSpecTag, XHead, XBarBase, XBarFrame, XBarRec, XBar,
-    isinstance_xspec, isinstance_xbar, XSpec, XMax,
-    lexp_to_tree, tags_to_list, lexp_to_complement,
-    is_node_name, is_max_node, is_bar_node, is_head_node, is_spec_node,
-    str_tag, camxes_to_xbar
+    'XType', 'XSpecTag', 'XHead', 'XBarBase', 'XBarFrame', 'XBarRec', 'XBar',
+    'isinstance_xspec', 'isinstance_xbar', 'XSpec', 'XMax', 'tags_to_list',
+    'str_tag', 'lexp_to_tree', 'is_node_name', 'is_max_node', 'is_bar_node',
+    'is_head_node', 'is_spec_node', 'lexp_to_complement', 'camxes_to_xbar',
+    'camxes_to_tree', 'camxes_to_xbar_many', 'BatchResult', 'NodeInterner',
+    'fingerprint', 'Fingerprints', 'Diagnostic', 'Diagnostics',
+    'collect_diagnostics', 'RuleProfiler', 'camxes_text_to_xbar',
+    'iter_camxes_to_xbar', 'iter_sentence_nodes', 'dumps_lexp', 'dump_lexp',
+    'dump_lexp_lines', 'ResultCache',
 ]
+
+if typing.TYPE_CHECKING:
+    from .types import XType, XSpecTag, XHead, XBarBase, XBarFrame
+    from .types import XBarRec, XBar, isinstance_xspec, isinstance_xbar
+    from .types import XSpec, XMax, tags_to_list, str_tag
+    from .lexp import lexp_to_tree, is_node_name, is_max_node, is_bar_node
+    from .lexp import is_head_node, is_spec_node, lexp_to_complement
+    from .camxes_to_xbar import camxes_to_xbar, camxes_to_tree
+    from .batch import camxes_to_xbar_many, BatchResult
+    from .interning import NodeInterner
+    from .fingerprints import fingerprint, Fingerprints
+    from .diagnostics import Diagnostic, Diagnostics, collect_diagnostics
+    from .profiling import RuleProfiler
+    from .text import camxes_text_to_xbar, iter_camxes_to_xbar
+    from .text import iter_sentence_nodes
+    from .writer import dumps_lexp, dump_lexp, dump_lexp_lines
+    from .result_cache import ResultCache
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute'
+                             f' {name!r}')
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+class _Package(ModuleType):
+    def __setattr__(self, name: str, value) -> None:
+        # the import of the submodule `camxes_to_xbar` would bind it over
+        # the function of the same name, the function is kept
+        if name == 'camxes_to_xbar' and isinstance(value, ModuleType):
+            value = value.camxes_to_xbar
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
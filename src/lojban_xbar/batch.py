@@ -0,0 +1,168 @@
+from __future__ import annotations
+import collections
+import concurrent.futures
+import itertools
+import os
+import sqlite3
+import typing
+
+from .camxes_to_xbar import camxes_to_xbar, get_rule_index
+from .diagnostics import Diagnostic, Diagnostics, describe_error
+from .memo import SubtreeMemo
+from .profiling import RuleProfiler
+from .result_cache import ResultCache
+
+BatchResult = collections.namedtuple('BatchResult',
+                                     'index value error diagnostics',
+                                     defaults=((),))
+BatchResult.__doc__ = """ Conversion of the `index`-th tree of a batch
+
+`value` is the X-bar l-expression, or None if the conversion failed.
+In this case, `error` describes the exception. `diagnostics` are the
+problems found in the tree, a tuple of formatted `Diagnostic`. An error
+of the result cache is one more diagnostic, with the code 'cache-error',
+the value is returned all the same.
+"""
+
+
+def cache_error(e: sqlite3.Error) -> Diagnostic:
+    return Diagnostic('cache-error', 'ResultCache', (describe_error(e),))
+
+
+def convert_one(index: int, tree,
+                memo: typing.Optional[SubtreeMemo] = None,
+                profiler: typing.Optional[RuleProfiler] = None,
+                cache: typing.Optional[ResultCache] = None
+                ) -> BatchResult:
+    diagnostics = Diagnostics()
+    cache_errors = []
+    try:
+        if cache is not None:
+            key = cache.key(tree)
+            try:
+                cached = cache.get(key)
+            except sqlite3.Error as e:
+                cached = None
+                cache_errors.append(cache_error(e))
+            if cached is not None:
+                return BatchResult(index, cached[0], None, cached[1])
+        value = camxes_to_xbar(tree, memo=memo, diagnostics=diagnostics,
+                               profiler=profiler)
+        error = None
+    except Exception as e:
+        value, error = None, describe_error(e)
+    result = BatchResult(index, value, error, diagnostics.formatted())
+    if cache is not None and error is None:
+        try:
+            cache.put(key, value, result.diagnostics)
+        except sqlite3.Error as e:
+            cache_errors.append(cache_error(e))
+    if cache_errors:
+        result = result._replace(
+            diagnostics=result.diagnostics + tuple(cache_errors))
+    return result
+
+
+worker_memo: typing.Optional[SubtreeMemo] = None
+worker_cache: typing.Optional[ResultCache] = None
+
+
+def convert_chunk(chunk: list[tuple[int, object]]) -> list[BatchResult]:
+    results = [convert_one(index, tree, worker_memo, cache=worker_cache)
+               for index, tree in chunk]
+    if worker_cache is not None:
+        try:
+            worker_cache.flush()
+        except sqlite3.Error as e:
+            diag = cache_error(e)
+            results = [result._replace(
+                diagnostics=result.diagnostics + (diag,))
+                for result in results]
+    return results
+
+
+def init_worker(memo_size: typing.Optional[int] = None,
+                cache: typing.Optional[ResultCache] = None) -> None:
+    global worker_memo, worker_cache
+    get_rule_index()
+    if memo_size:
+        worker_memo = SubtreeMemo(memo_size)
+    worker_cache = cache
+
+
+def iter_chunks(trees: typing.Iterable, chunksize: int
+                ) -> typing.Iterator[list[tuple[int, object]]]:
+    it = enumerate(trees)
+    while chunk := list(itertools.islice(it, chunksize)):
+        yield chunk
+
+
+def camxes_to_xbar_many(trees: typing.Iterable,
+                        workers: typing.Optional[int] = None,
+                        chunksize: int = 32,
+                        ordered: bool = True,
+                        memo_size: typing.Optional[int] = None,
+                        profiler: typing.Optional[RuleProfiler] = None,
+                        cache: typing.Optional[ResultCache] = None,
+                        ) -> typing.Iterator[BatchResult]:
+    """ Convert many camxes trees, in parallel if `workers` is not 0
+
+    `workers` is the number of worker processes, by default one per CPU.
+    With zero workers, the trees are converted in the current process.
+
+    The input is consumed lazily and only a few chunks per worker are
+    in flight, so `trees` can be an unbounded stream. The results come
+    in the input order, or as soon as ready if `ordered` is false.
+    A failed conversion does not stop the batch, see `BatchResult`.
+    The diagnostics are collected per tree and returned with the result.
+
+    With `memo_size`, each worker keeps a `SubtreeMemo` of that size.
+    A `profiler` can be used only with the in-process conversion.
+
+    With a `cache`, the trees converted before, by this or by another
+    batch, are looked up instead of converted. The workers open their
+    own connections to it. An error of the cache does not stop the
+    batch either, it is reported with the results it affects.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize < 1:
+        raise ValueError(f'chunksize should be positive, got: {chunksize}')
+    if profiler is not None and workers > 0:
+        raise ValueError('a profiler requires the in-process conversion,'
+                         f' got workers: {workers}')
+    if workers <= 0:
+        memo = SubtreeMemo(memo_size) if memo_size else None
+        try:
+            for index, tree in enumerate(trees):
+                yield convert_one(index, tree, memo, profiler, cache)
+        finally:
+            if cache is not None:
+                try:
+                    cache.flush()
+                except sqlite3.Error:
+                    # the results are kept, see `ResultCache.close`
+                    pass
+        return
+
+    chunks = iter_chunks(trees, chunksize)
+    max_pending = workers * 4
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker,
+            initargs=(memo_size, cache)) as pool:
+        pending = collections.deque()
+        try:
+            for chunk in itertools.islice(chunks, max_pending):
+                pending.append(pool.submit(convert_chunk, chunk))
+            while pending:
+                if ordered:
+                    done = pending.popleft()
+                else:
+                    done = next(concurrent.futures.as_completed(pending))
+                    pending.remove(done)
+                for chunk in itertools.islice(chunks, 1):
+                    pending.append(pool.submit(convert_chunk, chunk))
+                yield from done.result()
+        finally:
+            for future in pending:
+                future.cancel()
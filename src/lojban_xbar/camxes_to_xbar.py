@@ -1,20 +1,96 @@
 from __future__ import annotations
 import collections
-import sys
+import functools
 import typing
 
 from lxslt import MatchNameCondition, Rule, TransformChildren,\
-    MatchName, TreeNode, NodeSet, select, SelectStep, DeepDive,\
+    TreeNode, NodeSet,\
     apply_templates, Transformer, Replace, apply_templates_iter,\
     project_children, Drop, flatten_node_sets,\
-    TransformRename, Matcher, SelectStepNorm
-from .lexp import is_node_name, is_bar_node, is_max_node
+    TransformRename, Matcher
+from .diagnostics import Diagnostics, collect_diagnostics, report
+from .lexp import is_node_name, is_bar_node, is_max_node, lexp_to_tree
+from .lexp import max_node_name, bar_node_name
+from .memo import SubtreeMemo
+from .profiling import RuleProfiler
+from .rule_index import RuleIndex, rule_name, rule_prefix
+from .types import XMax
 
 
 def match_name_begin(name: str) -> Matcher:
     return MatchNameCondition(lambda node_name: node_name.startswith(name))
 
 
+def iter_kids(node: TreeNode) -> typing.Iterator[TreeNode]:
+    """ The named kids of the node, the groups of nodes are flattened """
+    stack = [iter(node[1:])]
+    while stack:
+        for kid in stack[-1]:
+            if isinstance(kid, list) and kid:
+                if isinstance(kid[0], str):
+                    yield kid
+                else:
+                    stack.append(iter(kid))
+                    break
+        else:
+            stack.pop()
+
+
+def dive(node: TreeNode, prefix: str, found: list[TreeNode]) -> None:
+    """ Follow the kids named with `prefix` down to the deepest ones """
+    n_found = len(found)
+    for kid in iter_kids(node):
+        if kid[0].startswith(prefix):
+            dive(kid, prefix, found)
+    if len(found) == n_found:
+        found.append(node)
+
+
+SentenceAnchors = collections.namedtuple(
+    'SentenceAnchors', 'i_head selbri before_selbri after_selbri')
+
+
+def collect_sentence_anchors(node: TreeNode) -> SentenceAnchors:
+    """ The parts of a camxes sentence, found in one walk
+
+    `i_head` are the tags of the selbri, `selbri` are the `selbri_1`
+    nodes, `before_selbri` are the `abs_term` nodes and `after_selbri`
+    are the innermost `term` nodes of the tail. The walk follows only
+    the sentence levels, the nested sentences are not entered.
+    """
+    bridi_tails: list[TreeNode] = []
+    terms: list[TreeNode] = []
+    for kid in iter_kids(node):
+        if kid[0].startswith('bridi_tail'):
+            dive(kid, 'bridi_tail', bridi_tails)
+        elif kid[0].startswith('terms'):
+            dive(kid, 'terms', terms)
+
+    anchors = SentenceAnchors([], [], [], [])
+    for bridi_tail in bridi_tails:
+        for kid in iter_kids(bridi_tail):
+            if kid[0] == 'selbri':
+                for selbri_kid in iter_kids(kid):
+                    if selbri_kid[0] == 'tag':
+                        anchors.i_head.append(selbri_kid)
+                    elif selbri_kid[0] == 'selbri_1':
+                        anchors.selbri.append(selbri_kid)
+            elif kid[0] == 'tail_terms':
+                nonabs_terms: list[TreeNode] = []
+                for tail_kid in iter_kids(kid):
+                    if tail_kid[0].startswith('nonabs_terms'):
+                        dive(tail_kid, 'nonabs_terms', nonabs_terms)
+                for nonabs in nonabs_terms:
+                    for term in iter_kids(nonabs):
+                        if term[0].startswith('term'):
+                            dive(term, 'term', anchors.after_selbri)
+    for terms_node in terms:
+        for kid in iter_kids(terms_node):
+            if kid[0] == 'abs_term':
+                anchors.before_selbri.append(kid)
+    return anchors
+
+
 class SumtiAllocator:
     zohe = ['N-MAX', ['N-BAR', ['N', ['tag', 'pron'], "zo'e"]]]
 
@@ -27,8 +103,9 @@ class SumtiAllocator:
         if len(self.sumti) > self.pos:
             existing = self.sumti[self.pos]
             if existing is not None:
-                print(f'SumtiAllocator: position {self.pos} is already'
-                      'allocated, list of sumti:', self.sumti, file=sys.stderr)
+                report('position-taken', 'SumtiAllocator',
+                       'position', self.pos, 'is already allocated,',
+                       'list of sumti:', list(self.sumti))
         while len(self.sumti) <= self.pos:
             self.sumti.append(None)
 
@@ -69,26 +146,8 @@ class SumtiAllocator:
 
 class TransformSentence(Transformer):
     def transform(self, rules: list['Rule'], node: TreeNode) -> NodeSet:
-        camxes_bridi_tail = select(node, [
-            SelectStep(DeepDive(match_name_begin('bridi_tail'))),
-        ])
-        camxes_i_head = select(camxes_bridi_tail, [
-            SelectStep(MatchName('selbri')),
-            SelectStep(MatchName('tag')),
-        ])
-        camxes_selbri = select(camxes_bridi_tail, [
-            SelectStepNorm(MatchName('selbri')),
-            SelectStepNorm(MatchName('selbri_1'))
-        ])
-        camxes_before_selbri = select(node, [
-            SelectStep(DeepDive(match_name_begin('terms'))),
-            SelectStep(MatchName('abs_term')),
-        ])
-        camxes_after_selbri = select(camxes_bridi_tail, [
-            SelectStep(MatchName('tail_terms')),
-            SelectStep(DeepDive(match_name_begin('nonabs_terms'))),
-            SelectStep(DeepDive(match_name_begin('term'))),
-        ])
+        (camxes_i_head, camxes_selbri, camxes_before_selbri,
+         camxes_after_selbri) = collect_sentence_anchors(node)
 
         i_head = apply_templates_iter(rules, camxes_i_head)
 
@@ -111,8 +170,8 @@ class TransformSentence(Transformer):
         )
 
         if not compound_selbri:
-            print('TransformSentence: should extract selbri but have not,'
-                  'from:', camxes_selbri)
+            report('no-selbri', 'TransformSentence',
+                   'should extract selbri but have not, from:', camxes_selbri)
             return []
 
         selbri_base = compound_selbri.pop()
@@ -125,8 +184,9 @@ class TransformSentence(Transformer):
         for adj_selbri in compound_selbri:
             if is_max_node(adj_selbri.v):  # nu-phrase, J-MAX
                 if adj_selbri.tags or adj_selbri.linked:
-                    print('selbri_to_frame: X-MAX node can not be augmented.',
-                          'Selbri components:', adj_selbri)
+                    report('max-augmented', 'selbri_to_frame',
+                           'X-MAX node can not be augmented.',
+                           'Selbri components:', adj_selbri)
                 adjunct = attach_adjunct_to_max_node(adjunct, adj_selbri.v)
                 continue
 
@@ -170,9 +230,10 @@ class TransformSentence(Transformer):
             nonlocal v, linked, spec, tags
             if v or linked or spec or tags:
                 if not v:
-                    print('group_selbri_component: selbri without v,',
-                          '(linked, spec, tags, v):', (linked, spec, tags, v),
-                          'in the list', selbri_list, file=sys.stderr)
+                    report('selbri-without-v', 'group_selbri_component',
+                           'selbri without v, (linked, spec, tags, v):',
+                           (linked, spec, tags, v), 'in the list',
+                           list(selbri_list))
                     v = ['V', '???']
                 collected.append(
                     TransformSentence.SelbriParts(linked, spec, tags, v))
@@ -185,8 +246,9 @@ class TransformSentence(Transformer):
             # Right-verb material
             if is_node_name(item, 'linkargs'):
                 if linked:
-                    print('group_selbri_component: duplicate linkargs:',
-                          item, 'in the list', selbri_list, file=sys.stderr)
+                    report('duplicate-linkargs', 'group_selbri_component',
+                           'duplicate linkargs:', item, 'in the list',
+                           list(selbri_list))
                 linked = item[1:]
                 continue
             # Left-verb material, maybe should start a new group
@@ -194,12 +256,13 @@ class TransformSentence(Transformer):
                 commit()
             if is_node_name(item, '#specifier'):
                 if spec:
-                    print('group_selbri_component: duplicate spec:',
-                          item, 'in the list', selbri_list, file=sys.stderr)
+                    report('duplicate-spec', 'group_selbri_component',
+                           'duplicate spec:', item, 'in the list',
+                           list(selbri_list))
                 if len(item) != 2:
-                    print('group_selbri_component: spec should bring',
-                          'only one node:', item, 'in the list',
-                          selbri_list, file=sys.stderr)
+                    report('spec-kids', 'group_selbri_component',
+                           'spec should bring only one node:', item,
+                           'in the list', list(selbri_list))
                 if len(item) > 1:
                     spec = extract_specifier(item)
                 continue
@@ -245,7 +308,7 @@ def to_max_node(node: TreeNode) -> TreeNode:
         return node
     node = to_bar_node(node)
     x_type = node[0][0]
-    return [f'{x_type}-MAX', node]
+    return [max_node_name(x_type), node]
 
 
 def to_bar_node(node: TreeNode) -> TreeNode:
@@ -254,13 +317,13 @@ def to_bar_node(node: TreeNode) -> TreeNode:
     x_type = node[0][0]
     if x_type == '#':  # processing instructions
         return node
-    return [f'{x_type}-BAR', node]
+    return [bar_node_name(x_type), node]
 
 
 def extract_specifier(spec: TreeNode) -> TreeNode:
     if not is_node_name(spec, '#specifier'):
-        print('extract_specifier: should be a specifier node, got:',
-              spec, file=sys.stderr)
+        report('not-specifier', 'extract_specifier',
+               'should be a specifier node, got:', spec)
         return spec
     spec = spec[1]
     if is_bar_node(spec):
@@ -273,15 +336,16 @@ def attach_adjunct_to_max_node(
 ) -> TreeNode:
     if not adj_node:
         return max_node
-    x_type = max_node[0][0]
+    bar_name = bar_node_name(max_node[0][0])
     if len(max_node) == 2:
         node_name, bar_node = max_node
-        return [node_name, [f'{x_type}-BAR', bar_node, adj_node]]
+        return [node_name, [bar_name, bar_node, adj_node]]
     if len(max_node) == 3:
         node_name, spec_node, bar_node = max_node
-        return [node_name, spec_node, [f'{x_type}-BAR', bar_node, adj_node]]
-    print('attach_adjunct_to_max_node: max-node representation'
-          'should have 2 or 3 elements, got:', max_node)
+        return [node_name, spec_node, [bar_name, bar_node, adj_node]]
+    report('max-kids', 'attach_adjunct_to_max_node',
+           'max-node representation should have 2 or 3 elements, got:',
+           max_node)
     return max_node
 
 
@@ -290,8 +354,8 @@ def inject_tag(tag: list, node: TreeNode) -> TreeNode:
     if len(node_name) == 1:
         return [node_name, tag, *node[1:]]
     if not is_bar_node(node):
-        print('inject_tag: if not X, then should be X-BAR, got:',
-              node, file=sys.stderr)
+        report('not-bar', 'inject_tag', 'if not X, then should be X-BAR, got:',
+               node)
         return node
     return [node[0], inject_tag(tag, node[1]), *node[2:]]
 
@@ -307,25 +371,24 @@ class TransformSumti6(Transformer):
     def transform(self, rules: list['Rule'], node: TreeNode) -> NodeSet:
         kids = apply_templates(rules, node[1:])
         if not kids:
-            print('TransformSumti: no kids after transformation',
-                  file=sys.stderr)
+            report('no-kids', 'TransformSumti', 'no kids after transformation')
             return []
         if any(map(lambda kid: is_node_name(kid, '#specifier'), kids)):
             kids = list(attach_specifiers_to_sumti(kids))
         if len(kids) > 2:
-            print('TransformSumti: at most 2 kids are expected, got:',
-                  kids, file=sys.stderr)
+            report('sumti-kids', 'TransformSumti',
+                   'at most 2 kids are expected, got:', list(kids))
             kids = kids[:2]
 
         xmax = kids.pop()
         if not is_max_node(xmax):
             if not is_bar_node(xmax):
-                print('TransformSumti: after transform,',
-                      'the last kid should be X-MAX or X-BAR, got:',
-                      xmax, file=sys.stderr)
+                report('not-max-or-bar', 'TransformSumti',
+                       'after transform, the last kid should be X-MAX'
+                       ' or X-BAR, got:', xmax)
                 return []
             x_type = xmax[0][0]
-            xmax = [f'{x_type}-MAX', xmax]
+            xmax = [max_node_name(x_type), xmax]
 
         dmax = None
         if kids:
@@ -333,9 +396,9 @@ class TransformSumti6(Transformer):
             if is_node_name(det, 'D'):
                 dmax = ['D-MAX', ['D-BAR', det, xmax]]
             else:
-                print('TransformSumti: after transform,',
-                      'the first kid should be D-BAR, got:',
-                      kids[0], file=sys.stderr)
+                report('not-d-bar', 'TransformSumti',
+                       'after transform, the first kid should be D-BAR, got:',
+                       kids[0])
 
         return [dmax or xmax]
 
@@ -351,11 +414,11 @@ def attach_specifiers_to_sumti(kids: list[TreeNode]) -> list[TreeNode]:
             node = next(it)
             node = to_bar_node(node)
             if not is_bar_node(node):
-                print('TransformSumti6.attach_specifier: need an',
-                      'x-bar node, got:', node, file=sys.stderr)
+                report('not-bar', 'TransformSumti6.attach_specifier',
+                       'need an x-bar node, got:', node)
             else:
                 x_type = node[0][0]
-                node = [f'{x_type}-MAX', spec, node]
+                node = [max_node_name(x_type), spec, node]
             yield node
     except StopIteration:
         pass
@@ -375,8 +438,9 @@ class TransformSumti2(Transformer):
 
         kids.insert(0, ['J', ['tag', 'elide'], j_name])
         if len(kids) % 2:
-            print('With conjunction, should have even number of nodes:',
-                  'pairs of (conj,x-max), got:', kids, file=sys.stderr)
+            report('odd-conjunction', 'TransformSumti2',
+                   'With conjunction, should have even number of nodes:',
+                   'pairs of (conj,x-max), got:', list(kids))
             return kids
 
         def grouper(iterable, n):
@@ -386,17 +450,19 @@ class TransformSumti2(Transformer):
         bar = None
         for j, xmax in grouper(kids, 2):
             if not is_node_name(j, 'J'):
-                print('In (conj, x-max) pair, the first element should be',
-                      'a conjunction node, got:', j, 'in the list of nodes',
-                      kids, file=sys.stderr)
+                report('not-conjunction', 'TransformSumti2',
+                       'In (conj, x-max) pair, the first element should be',
+                       'a conjunction node, got:', j, 'in the list of nodes',
+                       list(kids))
             if is_node_name(xmax, 'N'):  # 'je' case
                 xmax = ['N-MAX', ['N-BAR', xmax]]
             else:
                 xmax = to_max_node(xmax)
             if not is_max_node(xmax):
-                print('In (conj, x-max) pair, the second element should be',
-                      'an x-max node, got:', xmax, 'in the list of nodes',
-                      kids, file=sys.stderr)
+                report('not-max', 'TransformSumti2',
+                       'In (conj, x-max) pair, the second element should be',
+                       'an x-max node, got:', xmax, 'in the list of nodes',
+                       list(kids))
 
             bar_this = ['J-BAR', j, xmax]
             if bar:
@@ -427,8 +493,9 @@ class TransformSumti5WithRelative(Transformer):
 
         if len(base_kids) == 0:
             if len(relative) or len(quantifier):
-                print('TransformSumtiWithRelative: no base kids, can not',
-                      'attach relatives. kids are:', kids, file=sys.stderr)
+                report('no-base', 'TransformSumtiWithRelative',
+                       'no base kids, can not attach relatives. kids are:',
+                       list(kids))
             return []
 
         base = base_kids.pop()
@@ -436,9 +503,9 @@ class TransformSumti5WithRelative(Transformer):
 
         if is_max_node(base):
             if len(base) != 2:
-                print('TransformSumtiWithRelative: attach relatives to',
-                      'X-MAX, should be without SPEC:',
-                      base, 'with kids:', kids, file=sys.stderr)
+                report('max-with-spec', 'TransformSumtiWithRelative',
+                       'attach relatives to X-MAX, should be without SPEC:',
+                       base, 'with kids:', list(kids))
                 return base_kids
             base = base[1]  # x-bar
 
@@ -449,8 +516,9 @@ class TransformSumti5WithRelative(Transformer):
         #
         if goi:
             if len(goi) > 1:
-                print('TransformSumtiWithRelative: only one goi-relative',
-                      'is expected, with kids:', kids, file=sys.stderr)
+                report('many-goi', 'TransformSumtiWithRelative',
+                       'only one goi-relative is expected, with kids:',
+                       list(kids))
             goi_tag = TransformSumti5WithRelative.get_tag_from_goi(
                 goi[0][1], kids
             )
@@ -461,7 +529,7 @@ class TransformSumti5WithRelative(Transformer):
         # Attach adjuncts
         #
         x_type = base[0][0]
-        bar_name = f'{x_type}-BAR'
+        bar_name = bar_node_name(x_type)
 
         while base_kids:
             adj = base_kids.pop()
@@ -479,10 +547,11 @@ class TransformSumti5WithRelative(Transformer):
         #
         if quantifier:
             if len(quantifier) > 1:
-                print('TransformSumtiWithRelative: only one quantifier',
-                      'is expected, with kids:', kids, file=sys.stderr)
+                report('many-quantifiers', 'TransformSumtiWithRelative',
+                       'only one quantifier is expected, with kids:',
+                       list(kids))
             spec = to_max_node(quantifier[0][1])
-            base = [f'{x_type}-MAX', spec, base]
+            base = [max_node_name(x_type), spec, base]
 
         return [base]
 
@@ -491,27 +560,27 @@ class TransformSumti5WithRelative(Transformer):
             goi_max: TreeNode, kids: list[TreeNode]
     ) -> typing.Optional[str]:
         if not is_max_node(goi_max):
-            print('TransformSumtiWithRelative: the child of goi',
-                  'should be X-MAX, but got:', goi_max,
-                  'with kids:', kids, file=sys.stderr)
+            report('goi-not-max', 'TransformSumtiWithRelative',
+                   'the child of goi should be X-MAX, but got:', goi_max,
+                   'with kids:', list(kids))
             return None
         goi_bar = goi_max[1]
         if not is_max_node(goi_max):
-            print('TransformSumtiWithRelative: the child-child of goi',
-                  'should be X-BAR, but got:', goi_bar,
-                  'with kids:', kids, file=sys.stderr)
+            report('goi-not-bar', 'TransformSumtiWithRelative',
+                   'the child-child of goi should be X-BAR, but got:', goi_bar,
+                   'with kids:', list(kids))
             return None
         goi_x = goi_bar[1]
         if not is_node_name(goi_x, 'N'):
-            print('TransformSumtiWithRelative: the child-child-child of goi',
-                  'should be N, but got:', goi_x,
-                  'with kids:', kids, file=sys.stderr)
+            report('goi-not-n', 'TransformSumtiWithRelative',
+                   'the child-child-child of goi should be N, but got:', goi_x,
+                   'with kids:', list(kids))
             return None
         goi_tag = goi_x[-1]
         if not isinstance(goi_tag, str):
-            print('TransformSumtiWithRelative: the child-child-child-child',
-                  'of goi should be text, but got:', goi_tag,
-                  'with kids:', kids, file=sys.stderr)
+            report('goi-not-text', 'TransformSumtiWithRelative',
+                   'the child-child-child-child of goi should be text,',
+                   'but got:', goi_tag, 'with kids:', list(kids))
             return None
         return goi_tag
 
@@ -523,8 +592,9 @@ class TransformRelativeClause(Transformer):
     def transform(self, rules: list['Rule'], node: TreeNode) -> NodeSet:
         kids = apply_templates(rules, node[1:])
         if len(kids) != 2:
-            print('TransformRelativeClause: exactly two children required,'
-                  f'got {len(kids)} of them:', kids, file=sys.stderr)
+            report('relative-kids', 'TransformRelativeClause',
+                   'exactly two children required, got', len(kids),
+                   'of them:', list(kids))
             return kids
         relative, base = kids
 
@@ -533,11 +603,12 @@ class TransformRelativeClause(Transformer):
 
         cmax = [['C-MAX', ['C-BAR', *kids]]]
         if not is_node_name(relative, 'C'):
-            print('TransformRelativeClause: the first children',
-                  'should be C or GOI_clause, got:', relative, file=sys.stderr)
+            report('not-relative', 'TransformRelativeClause',
+                   'the first children should be C or GOI_clause, got:',
+                   relative)
         elif not is_max_node(base):
-            print('TransformRelativeClause: the second children',
-                  'should be MAX, got:', base, file=sys.stderr)
+            report('not-max', 'TransformRelativeClause',
+                   'the second children should be MAX, got:', base)
         return cmax
 
 
@@ -562,14 +633,14 @@ class TransformSeTag(Transformer):
     def transform(self, rules: list['Rule'], node: TreeNode) -> NodeSet:
         kids = apply_templates(rules, node[1:])
         if len(kids) != 1:
-            print('TransformSeTag: exactly one child is expected, got:',
-                  kids, file=sys.stderr)
+            report('se-kids', 'TransformSeTag',
+                   'exactly one child is expected, got:', list(kids))
         if not kids:
             return []
         se_tag = kids[0]
         if not isinstance(se_tag, str):
-            print('TransformSeTag: the child should be a string, got:',
-                  kids, file=sys.stderr)
+            report('se-not-string', 'TransformSeTag',
+                   'the child should be a string, got:', list(kids))
         return [['tag', 'se', se_tag]]
 
 
@@ -591,90 +662,92 @@ class TransformKoha(Transformer):
         return [['N', ['tag', 'pron'], word]]
 
 
-def camxes_to_xbar(tree) -> list:
-    matcher_text = match_name_begin('text')
-    skip_text = Rule(matcher_text, TransformChildren())
-    matcher_paragraph = match_name_begin('paragraph')
-    skip_paragraph = Rule(matcher_paragraph, TransformChildren())
-    matcher_statement = match_name_begin('statement')
-    skip_statement = Rule(matcher_statement, TransformChildren())
-    rule_sentence = Rule(MatchName('sentence'), TransformSentence())
-    skip_tag = Rule(MatchName('tag'), TransformChildren())
-    skip_tense_modal = Rule(MatchName('tense_modal'), TransformChildren())
-    skip_simple_tense_modal = Rule(MatchName('simple_tense_modal'),
-                                   TransformChildren())
-    skip_time = Rule(match_name_begin('time'), TransformChildren())
-    rule_pu = Rule(MatchName('PU_clause'), Replace([['tag', 'pu']]))
-    rule_sumti = Rule(MatchName('sumti'), TransformSumti())
-    rule_sumti6 = Rule(MatchName('sumti_6'), TransformSumti6())
-    rule_sumti2 = Rule(MatchName('sumti_2'), TransformSumti2())
-    skip_sumti = Rule(match_name_begin('sumti_'), TransformChildren())
-    rule_sumti5 = Rule(MatchName('sumti_5'), TransformSumti5WithRelative())
-    rule_sumti_tail_with_relative = Rule(MatchName('sumti_tail'),
-                                         TransformSumti5WithRelative())
-    rule_la = Rule(MatchName('LA_clause'), TransformChildren())
-    drop_la = Rule(MatchName('LA'), Drop())
-    rule_le = Rule(MatchName('LE_clause'), TransformRename('D'))
-    drop_le = Rule(MatchName('LE'), TransformWord())
-    drop_ku = Rule(MatchName('KU'), Drop())
-    skip_koha = Rule(MatchName('KOhA_clause'), TransformRename('N-BAR'))
-    rule_koha = Rule(MatchName('KOhA'), TransformKoha())
-    rule_smevla = Rule(MatchName('cmevla'), TransformCmevla())
-    rule_smevla_wrapper = Rule(MatchName('CMEVLA'), TransformChildren())
-    rule_smevla_clause = Rule(MatchName('CMEVLA_clause'),
-                              TransformRename('N-BAR'))
-    rule_brivla = Rule(MatchName('BRIVLA'), TransformRename('N'))
-    skip_brivla = Rule(match_name_begin('BRIVLA'), TransformChildren())
-    skip_tanru_unit1 = Rule(MatchName('tanru_unit_1'), TransformChildren())
-    rule_tanru_unit2 = Rule(MatchName('tanru_unit_2'),
-                            TransformVerbWithSpecifier())
-    skip_tanru_unit = Rule(match_name_begin('tanru_unit'), TransformChildren())
-    rule_lujvo = Rule(MatchName('lujvo'), TransformWord())
-    rule_gismu = Rule(MatchName('gismu'), TransformWord())
-    skip_selbri = Rule(match_name_begin('selbri'), TransformChildren())
-    rule_selbri4 = Rule(match_name_begin('selbri_4'), TransformSelbri4())
-    drop_ke_klause = Rule(MatchName('KE_clause'), Drop())
-    drop_nu_klause = Rule(MatchName('NU_clause'), Drop())
-    drop_kei = Rule(MatchName('KEI'), Drop())
-    drop_kehe = Rule(MatchName('KEhE'), Drop())
-    drop_kuho = Rule(MatchName('KUhO'), Drop())
-    skip_subsentence = Rule(MatchName('subsentence'), TransformChildren())
-    rule_pa_clause = Rule(MatchName('PA_clause'), TransformRename('N'))
-    rule_pa = Rule(MatchName('PA'), TransformWord())
-    skip_number = Rule(match_name_begin('number'), TransformRename('N-BAR'))
-    rule_moi = Rule(MatchName('MOI_clause'), Replace([['V', 'moi']]))
-    skip_joik = Rule(match_name_begin('joik'), TransformChildren())
-    skip_jek = Rule(match_name_begin('jek'), TransformChildren())
-    rule_joi_clause = Rule(MatchName('JOI_clause'), TransformRename('J'))
-    rule_noi_clause = Rule(MatchName('NOI_clause'), TransformRename('C'))
-    rule_ja_clause = Rule(MatchName('JA_clause'), TransformRename('J'))
-    rule_joi = Rule(MatchName('JOI'), TransformWord())
-    rule_noi = Rule(MatchName('NOI'), TransformWord())
-    rule_goi = Rule(MatchName('GOI'), TransformWord())
-    skip_term = Rule(match_name_begin('term'), TransformChildren())
-    skip_abs_term = Rule(match_name_begin('abs_term'), TransformChildren())
-    skip_abs_tag_term = Rule(MatchName('abs_tag_term'), TransformChildren())
-    rule_fa = Rule(MatchName('FA'), TransformWord())
-    rule_ja = Rule(MatchName('JA'), TransformWord())
-    rule_relative_clause = Rule(MatchName('relative_clause'),
-                                TransformRelativeClause())
-    skip_relative_clause = Rule(match_name_begin('relative_clause'),
-                                TransformChildren())
+# The version of the conversion, a part of the keys of the persistent
+# result cache. Change it with any change of the output of the rules.
+RULES_VERSION = '1'
+
+
+def make_rule_index() -> RuleIndex:
+    skip_text = rule_prefix('text', TransformChildren())
+    skip_paragraph = rule_prefix('paragraph', TransformChildren())
+    skip_statement = rule_prefix('statement', TransformChildren())
+    rule_sentence = rule_name('sentence', TransformSentence())
+    skip_tag = rule_name('tag', TransformChildren())
+    skip_tense_modal = rule_name('tense_modal', TransformChildren())
+    skip_simple_tense_modal = rule_name('simple_tense_modal',
+                                        TransformChildren())
+    skip_time = rule_prefix('time', TransformChildren())
+    rule_pu = rule_name('PU_clause', Replace([['tag', 'pu']]))
+    rule_sumti = rule_name('sumti', TransformSumti())
+    rule_sumti6 = rule_name('sumti_6', TransformSumti6())
+    rule_sumti2 = rule_name('sumti_2', TransformSumti2())
+    skip_sumti = rule_prefix('sumti_', TransformChildren())
+    rule_sumti5 = rule_name('sumti_5', TransformSumti5WithRelative())
+    rule_sumti_tail_with_relative = rule_name('sumti_tail',
+                                              TransformSumti5WithRelative())
+    rule_la = rule_name('LA_clause', TransformChildren())
+    drop_la = rule_name('LA', Drop())
+    rule_le = rule_name('LE_clause', TransformRename('D'))
+    drop_le = rule_name('LE', TransformWord())
+    drop_ku = rule_name('KU', Drop())
+    skip_koha = rule_name('KOhA_clause', TransformRename('N-BAR'))
+    rule_koha = rule_name('KOhA', TransformKoha())
+    rule_smevla = rule_name('cmevla', TransformCmevla())
+    rule_smevla_wrapper = rule_name('CMEVLA', TransformChildren())
+    rule_smevla_clause = rule_name('CMEVLA_clause',
+                                   TransformRename('N-BAR'))
+    rule_brivla = rule_name('BRIVLA', TransformRename('N'))
+    skip_brivla = rule_prefix('BRIVLA', TransformChildren())
+    skip_tanru_unit1 = rule_name('tanru_unit_1', TransformChildren())
+    rule_tanru_unit2 = rule_name('tanru_unit_2',
+                                 TransformVerbWithSpecifier())
+    skip_tanru_unit = rule_prefix('tanru_unit', TransformChildren())
+    rule_lujvo = rule_name('lujvo', TransformWord())
+    rule_gismu = rule_name('gismu', TransformWord())
+    skip_selbri = rule_prefix('selbri', TransformChildren())
+    rule_selbri4 = rule_prefix('selbri_4', TransformSelbri4())
+    drop_ke_klause = rule_name('KE_clause', Drop())
+    drop_nu_klause = rule_name('NU_clause', Drop())
+    drop_kei = rule_name('KEI', Drop())
+    drop_kehe = rule_name('KEhE', Drop())
+    drop_kuho = rule_name('KUhO', Drop())
+    skip_subsentence = rule_name('subsentence', TransformChildren())
+    rule_pa_clause = rule_name('PA_clause', TransformRename('N'))
+    rule_pa = rule_name('PA', TransformWord())
+    skip_number = rule_prefix('number', TransformRename('N-BAR'))
+    rule_moi = rule_name('MOI_clause', Replace([['V', 'moi']]))
+    skip_joik = rule_prefix('joik', TransformChildren())
+    skip_jek = rule_prefix('jek', TransformChildren())
+    rule_joi_clause = rule_name('JOI_clause', TransformRename('J'))
+    rule_noi_clause = rule_name('NOI_clause', TransformRename('C'))
+    rule_ja_clause = rule_name('JA_clause', TransformRename('J'))
+    rule_joi = rule_name('JOI', TransformWord())
+    rule_noi = rule_name('NOI', TransformWord())
+    rule_goi = rule_name('GOI', TransformWord())
+    skip_term = rule_prefix('term', TransformChildren())
+    skip_abs_term = rule_prefix('abs_term', TransformChildren())
+    skip_abs_tag_term = rule_name('abs_tag_term', TransformChildren())
+    rule_fa = rule_name('FA', TransformWord())
+    rule_ja = rule_name('JA', TransformWord())
+    rule_relative_clause = rule_name('relative_clause',
+                                     TransformRelativeClause())
+    skip_relative_clause = rule_prefix('relative_clause',
+                                       TransformChildren())
     # retain 'linkargs' as is, skip 'linkargs_N'
-    skip_linkargs_n = Rule(match_name_begin('linkargs_'), TransformChildren())
-    skip_links = Rule(match_name_begin('links'), TransformChildren())
-    drop_beho = Rule(MatchName('BEhO'), Drop())
-    drop_bei = Rule(MatchName('BEI_clause'), Drop())
-    drop_be_clause = Rule(MatchName('BE_clause'), Drop())
-    drop_gehu = Rule(MatchName('GEhU'), Drop())
-    drop_me_clause = Rule(MatchName('ME_clause'), Drop())
-    drop_mehu = Rule(MatchName('MEhU'), Drop())
-    drop_boi = Rule(MatchName('BOI'), Drop())
-    drop_vau = Rule(MatchName('VAU'), Drop())
-    rule_se = Rule(MatchName('SE'), TransformWord())
-    rule_se_clause = Rule(MatchName('SE_clause'), TransformSeTag())
-
-    s_tree = apply_templates([
+    skip_linkargs_n = rule_prefix('linkargs_', TransformChildren())
+    skip_links = rule_prefix('links', TransformChildren())
+    drop_beho = rule_name('BEhO', Drop())
+    drop_bei = rule_name('BEI_clause', Drop())
+    drop_be_clause = rule_name('BE_clause', Drop())
+    drop_gehu = rule_name('GEhU', Drop())
+    drop_me_clause = rule_name('ME_clause', Drop())
+    drop_mehu = rule_name('MEhU', Drop())
+    drop_boi = rule_name('BOI', Drop())
+    drop_vau = rule_name('VAU', Drop())
+    rule_se = rule_name('SE', TransformWord())
+    rule_se_clause = rule_name('SE_clause', TransformSeTag())
+
+    return RuleIndex([
         skip_text, skip_paragraph, skip_statement, rule_sentence,
         skip_tag, skip_tense_modal, skip_simple_tense_modal,
         skip_time, rule_pu,
@@ -702,6 +775,110 @@ def camxes_to_xbar(tree) -> list:
         drop_me_clause, drop_mehu, drop_vau,
         drop_boi,
         rule_se, rule_se_clause,
-    ], tree)
-    assert len(s_tree) == 1
+    ])
+
+
+@functools.lru_cache(maxsize=None)
+def get_rule_index() -> RuleIndex:
+    """ The rules are stateless, build them once per process """
+    return make_rule_index()
+
+
+# Wrappers which only pass their child through: they are matched by
+# `skip_*` rules or are not transformed at all. Not listed: the nodes
+# with own rules (sumti_2, sumti_5, sumti_6, selbri_4, tanru_unit_2)
+# and the anchors TransformSentence selects by name (selbri, selbri_1,
+# the innermost bridi_tail_N).
+PASS_THROUGH_NODES = frozenset((
+    'text_1', 'paragraphs', 'paragraph',
+    'statement', 'statement_1', 'statement_2', 'statement_3',
+    'sumti_1', 'sumti_3', 'sumti_4', 'sumti_tail_1',
+    'selbri_2', 'selbri_3', 'selbri_5', 'selbri_6',
+    'tanru_unit', 'tanru_unit_1',
+    'bridi_tail_1', 'bridi_tail_2',
+))
+
+
+def is_pass_through(node: TreeNode) -> bool:
+    return len(node) == 2 \
+        and isinstance(node[0], str) \
+        and node[0] in PASS_THROUGH_NODES \
+        and isinstance(node[1], list) \
+        and bool(node[1]) \
+        and isinstance(node[1][0], str)
+
+
+def collapse_chains(tree: TreeNode, in_place: bool = False) -> TreeNode:
+    """ The camxes tree without single-child pass-through wrappers
+
+    The conversion result is the same, but with fewer nodes to dispatch
+    and less recursion. The input tree is copied, unless `in_place` is
+    set, then the wrappers are unlinked from the input tree itself.
+    """
+    holder = [tree]
+    stack = [holder]
+    while stack:
+        ls = stack.pop()
+        for i, kid in enumerate(ls):
+            if not isinstance(kid, list):
+                continue
+            while is_pass_through(kid):
+                kid = kid[1]
+            if not in_place:
+                kid = list(kid)
+            ls[i] = kid
+            stack.append(kid)
+    return holder[0]
+
+
+def camxes_to_xbar(tree, collapse: bool = False,
+                   memo: typing.Optional[SubtreeMemo] = None,
+                   diagnostics: typing.Optional[Diagnostics] = None,
+                   profiler: typing.Optional[RuleProfiler] = None
+                   ) -> list:
+    """ Convert a camxes parse tree to an X-bar l-expression
+
+    With `collapse`, fold the pass-through wrapper chains beforehand,
+    see `collapse_chains`. If the caller owns the tree, it is cheaper
+    to call `collapse_chains(tree, in_place=True)` itself.
+
+    With `memo`, reuse the transformations of the repeated subtrees.
+
+    The problems in the input are sent to `diagnostics`, if given,
+    otherwise to the collector of the context, see `collect_diagnostics`.
+
+    With `profiler`, count the matches and the time of each rule.
+    """
+    if diagnostics is not None:
+        with collect_diagnostics(diagnostics):
+            return camxes_to_xbar(tree, collapse=collapse, memo=memo,
+                                  profiler=profiler)
+    if collapse:
+        tree = collapse_chains(tree)
+    index = get_rule_index()
+    if memo is not None:
+        index = memo.index_for(index)
+    rules = index.to_rules() if profiler is None \
+        else profiler.rules_for(index)
+    s_tree = apply_templates(rules, tree)
+    assert len(s_tree) == 1, \
+        f'expected one sentence, got {len(s_tree)}, see camxes_text_to_xbar'
     return s_tree[0]
+
+
+def camxes_to_tree(tree, collapse: bool = False,
+                   memo: typing.Optional[SubtreeMemo] = None,
+                   diagnostics: typing.Optional[Diagnostics] = None,
+                   profiler: typing.Optional[RuleProfiler] = None
+                   ) -> XMax:
+    """ Convert a camxes parse tree to the typed X-bar tree
+
+    Same as `lexp_to_tree(camxes_to_xbar(tree))`, without a JSON round
+    trip between the stages.
+    """
+    if diagnostics is not None:
+        with collect_diagnostics(diagnostics):
+            return camxes_to_tree(tree, collapse=collapse, memo=memo,
+                                  profiler=profiler)
+    return lexp_to_tree(camxes_to_xbar(tree, collapse=collapse, memo=memo,
+                                       profiler=profiler))
@@ -0,0 +1,79 @@
+from __future__ import annotations
+import socket
+import typing
+
+from .protocol import default_socket_path, recv_frame, send_frame
+
+
+class ConversionClient:
+    """ A connection to the conversion server, see `ConversionServer`
+
+    The connection is opened on the first request and kept for the next
+    ones. A failed request raises RuntimeError with the error of the
+    server.
+    """
+
+    def __init__(self, path: typing.Optional[str] = None,
+                 timeout: typing.Optional[float] = None):
+        self.path = path or default_socket_path()
+        self.timeout = timeout
+        self._sock: typing.Optional[socket.socket] = None
+
+    def __enter__(self) -> 'ConversionClient':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def connect(self) -> socket.socket:
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._sock = sock
+        return self._sock
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def request(self, op: str, **fields) -> dict:
+        """ The whole response, with the value and the diagnostics """
+        sock = self.connect()
+        try:
+            send_frame(sock, dict(fields, op=op))
+            response = recv_frame(sock)
+        except BaseException:
+            self.close()
+            raise
+        if response is None:
+            self.close()
+            raise ConnectionError(f'{self.path}: the server has closed'
+                                  ' the connection')
+        if not response['ok']:
+            raise RuntimeError(response['error'])
+        return response
+
+    def xbar(self, tree, collapse: bool = False) -> list:
+        return self.request('xbar', tree=tree, collapse=collapse)['value']
+
+    def text(self, tree, collapse: bool = False) -> list:
+        return self.request('text', tree=tree, collapse=collapse)['value']
+
+    def dot(self, xbar: list) -> str:
+        return self.request('dot', xbar=xbar)['value']
+
+    def xbar_dot(self, tree, collapse: bool = False) -> str:
+        return self.request('xbar_dot', tree=tree,
+                            collapse=collapse)['value']
+
+    def health(self) -> dict:
+        return self.request('health')['value']
+
+    def stats(self) -> dict:
+        return self.request('stats')['value']
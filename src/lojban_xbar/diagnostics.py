@@ -0,0 +1,169 @@
+from __future__ import annotations
+import collections
+import contextlib
+import contextvars
+import sys
+import typing
+
+
+class Diagnostic(collections.namedtuple(
+        'Diagnostic', 'code location args')):
+    """ A problem found in the input
+
+    `code` is a stable identifier of the kind of the problem, `location`
+    is the function or class which found it. `args` is the message as
+    for `print()`: text and the offending nodes. The nodes are converted
+    to text only when the message is formatted.
+    """
+
+    @property
+    def message(self) -> str:
+        return ' '.join(map(str, self.args))
+
+    def __str__(self) -> str:
+        return f'{self.location}: {self.message}'
+
+    def formatted(self) -> 'Diagnostic':
+        """ The same diagnostic with the message already formatted """
+        return self._replace(args=(self.message,))
+
+
+def describe_error(e: BaseException) -> str:
+    """ The exception in one line, as at the end of a traceback """
+    import traceback  # slow to import, seldom needed
+    return ''.join(traceback.format_exception_only(type(e), e)).strip()
+
+
+class Lazy:
+    """ A payload value computed when the message is formatted """
+    __slots__ = ('fn', 'args')
+
+    def __init__(self, fn: typing.Callable[..., object], *args):
+        self.fn = fn
+        self.args = args
+
+    def __str__(self) -> str:
+        return str(self.fn(*self.args))
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class Diagnostics:
+    """ Collector of diagnostics
+
+    All the reports are counted per code. At most `max_per_code` events
+    of each code and at most `max_events` events in total are kept, the
+    rest are only counted.
+    """
+
+    def __init__(self,
+                 max_events: typing.Optional[int] = 1000,
+                 max_per_code: typing.Optional[int] = 100):
+        self.max_events = max_events
+        self.max_per_code = max_per_code
+        self.events: list[Diagnostic] = []
+        self.counts: collections.Counter = collections.Counter()
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self) -> typing.Iterator[Diagnostic]:
+        return iter(self.events)
+
+    def __bool__(self) -> bool:
+        return bool(self.counts)
+
+    def accept(self, diag: Diagnostic) -> bool:
+        """ Count the diagnostic, tell if it is within the limits """
+        self.counts[diag.code] += 1
+        if (self.max_per_code is not None
+                and self.counts[diag.code] > self.max_per_code) \
+                or (self.max_events is not None
+                    and len(self.events) >= self.max_events):
+            self.dropped += 1
+            return False
+        return True
+
+    def report(self, diag: Diagnostic) -> None:
+        if self.accept(diag):
+            self.events.append(diag)
+
+    def formatted(self) -> tuple[Diagnostic, ...]:
+        """ The kept events with the messages formatted, to send or store
+
+        If some events were dropped, the last one tells how many.
+        """
+        events = [diag.formatted() for diag in self.events]
+        if self.dropped:
+            events.append(Diagnostic('dropped', 'Diagnostics', (
+                self.dropped, 'more diagnostics are not kept')).formatted())
+        return tuple(events)
+
+
+class StderrDiagnostics(Diagnostics):
+    """ Print the diagnostics as soon as they are reported """
+
+    def __init__(self, h: typing.Optional[typing.TextIO] = None,
+                 max_per_code: typing.Optional[int] = None):
+        super().__init__(max_events=None, max_per_code=max_per_code)
+        self.h = h
+
+    def report(self, diag: Diagnostic) -> None:
+        if self.accept(diag):
+            print(diag, file=self.h or sys.stderr)
+
+
+class RecordingDiagnostics(Diagnostics):
+    """ Keep all the diagnostics, formatted, and pass them on to `outer`
+
+    To replay them later with `report_diagnostic`, as the memo does.
+    """
+
+    def __init__(self, outer: Diagnostics):
+        super().__init__(max_events=None, max_per_code=None)
+        self.outer = outer
+
+    def report(self, diag: Diagnostic) -> None:
+        self.events.append(diag.formatted())
+        self.outer.report(diag)
+
+
+stderr_diagnostics = StderrDiagnostics()
+
+current_diagnostics: contextvars.ContextVar[typing.Optional[Diagnostics]] \
+    = contextvars.ContextVar('lojban_xbar_diagnostics', default=None)
+
+
+def report(code: str, location: str, *args) -> None:
+    """ Report a problem to the diagnostics collector of the context
+
+    Without a collector, the message is printed to stderr.
+    """
+    report_diagnostic(Diagnostic(code, location, args))
+
+
+def report_diagnostic(diag: Diagnostic) -> None:
+    get_diagnostics().report(diag)
+
+
+def get_diagnostics() -> Diagnostics:
+    """ The collector of the context, or the one printing to stderr """
+    diagnostics = current_diagnostics.get()
+    if diagnostics is None:
+        diagnostics = stderr_diagnostics
+    return diagnostics
+
+
+@contextlib.contextmanager
+def collect_diagnostics(diagnostics: typing.Optional[Diagnostics] = None
+                        ) -> typing.Iterator[Diagnostics]:
+    """ Send the diagnostics of the block to the collector """
+    if diagnostics is None:
+        diagnostics = Diagnostics()
+    token = current_diagnostics.set(diagnostics)
+    try:
+        yield diagnostics
+    finally:
+        current_diagnostics.reset(token)
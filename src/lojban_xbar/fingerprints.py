@@ -0,0 +1,112 @@
+from __future__ import annotations
+import hashlib
+import json
+import typing
+
+DIGEST_SIZE = 16
+
+
+def digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+def json_digest(tree, prefix: bytes = b'') -> bytes:
+    """ The digest of `prefix` and of the compact JSON of the tree
+
+    Equal trees get the same digest. Unlike `fingerprint`, the subtrees
+    are not hashed one by one: a tree is hashed as fast as it is
+    encoded, about twice as fast as by `fingerprint`.
+    """
+    return digest(prefix + json.dumps(
+        tree, ensure_ascii=False, check_circular=False,
+        separators=(',', ':')).encode('utf-8'))
+
+
+def encode_leaf(value) -> bytes:
+    """ Self-delimiting encoding of a non-list tree element """
+    if isinstance(value, str):
+        data = value.encode('utf-8')
+        return b's' + len(data).to_bytes(4, 'big') + data
+    data = json.dumps(value).encode('utf-8')
+    return b'j' + len(data).to_bytes(4, 'big') + data
+
+
+# Node names and words repeat a lot, remember their encodings
+leaf_cache: dict[str, bytes] = {}
+LEAF_CACHE_SIZE = 65536
+
+
+def encode_str(s: str) -> bytes:
+    data = leaf_cache.get(s)
+    if data is None:
+        data = encode_leaf(s)
+        if len(leaf_cache) < LEAF_CACHE_SIZE:
+            leaf_cache[s] = data
+    return data
+
+
+class Fingerprints:
+    """ Memo of the per-subtree fingerprints, Merkle-style
+
+    A list is hashed from the fingerprints of its sublists, so when a
+    parent is rehashed, the subtrees seen before are not walked again.
+    The memo recognizes a subtree by identity and keeps a reference to
+    it. It is valid while the memorized subtrees are not modified.
+    """
+
+    def __init__(self):
+        self._memo: dict[int, tuple[list, bytes]] = {}
+
+    def __len__(self) -> int:
+        return len(self._memo)
+
+    def get(self, node: list) -> typing.Optional[bytes]:
+        entry = self._memo.get(id(node))
+        if entry is None or entry[0] is not node:
+            return None
+        return entry[1]
+
+    def put(self, node: list, fp: bytes) -> None:
+        self._memo[id(node)] = (node, fp)
+
+    def clear(self) -> None:
+        self._memo.clear()
+
+
+def fingerprint(tree, memo: typing.Optional[Fingerprints] = None) -> bytes:
+    """ Fixed-size structural digest of a nested-list tree
+
+    Equal trees, as compared by `==`, get the same fingerprint in any
+    process. The tree is walked iteratively, without recursion and
+    without building a JSON string. With `memo`, the fingerprints of
+    the sublists are reused and remembered, see `Fingerprints`.
+    """
+    if not isinstance(tree, list):
+        return digest(encode_leaf(tree))
+    if memo is not None:
+        fp = memo.get(tree)
+        if fp is not None:
+            return fp
+    stack = [(tree, iter(tree), [b'l'])]
+    while True:
+        node, kids_iter, parts = stack[-1]
+        for kid in kids_iter:
+            if isinstance(kid, str):
+                parts.append(encode_str(kid))
+                continue
+            if not isinstance(kid, list):
+                parts.append(encode_leaf(kid))
+                continue
+            fp = memo.get(kid) if memo is not None else None
+            if fp is None:
+                stack.append((kid, iter(kid), [b'l']))
+                break
+            parts.append(b'h' + fp)
+        else:
+            stack.pop()
+            fp = digest(b''.join(parts))
+            if memo is not None:
+                memo.put(node, fp)
+            if not stack:
+                return fp
+            stack[-1][2].append(b'h' + fp)
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import collections
+import io
+import itertools
+import re
+import typing
+
+from .diagnostics import describe_error
+from .fingerprints import json_digest
+from .lexp import lexp_to_tree
+from .types import XBarBase, XSpecTag, XMax, XSpec, XHead, str_tag
+from .types import isinstance_xspec, XBarFrame, XBarRec
+
+PLAIN_ID = re.compile(r'[A-Za-z_][A-Za-z_0-9]*')
+
+# The node ids are the paths from the root: 'n', then '_' and the
+# position of the child for each step down, such as 'n_1_0'. They do
+# not depend on the run, and the equal subtrees of a tree get distinct
+# ids.
+ROOT_ID = 'n'
+
+
+def get_indent(level: int) -> str:
+    return '  ' * level
+
+
+def write_node(h: typing.TextIO,
+               label: str,
+               level: int,
+               id_: str,
+               parent_id: typing.Union[str, None]) -> None:
+    label = label.replace('"', "'")
+    indent = get_indent(level)
+    h.write(f'{indent}{id_} [label="{label}"]\n')
+    if parent_id:
+        h.write(f'{indent}{parent_id} -> {id_}\n')
+
+
+def to_graphviz_unknown(h: typing.TextIO,
+                        node: object,
+                        level: int,
+                        parent_id: typing.Union[str, None],
+                        id_: str) -> None:
+    label = str(node)[:16]
+    if len(label) > 16:
+        label = label[:13] + '...'
+    write_node(h, label, level, id_, parent_id)
+
+
+def str_tags_iter(tags: typing.Optional[dict[str, str]]) \
+        -> typing.Iterable[str]:
+    if not tags:
+        return []
+    return map(str_tag, tags.items())
+
+
+def to_graphviz_xhead(h: typing.TextIO,
+                      xhead: XHead,
+                      level: int,
+                      parent_id: typing.Union[str, None],
+                      id_: str) -> None:
+    ls = []
+    if xhead.s is not None:
+        ls.append(xhead.s)
+    ls.extend(str_tags_iter(xhead.tags))
+    if not ls:
+        return
+    ls = map(str, ls)
+    label = '\\n'.join(ls)
+    write_node(h, label, level, id_, parent_id)
+
+
+def to_graphviz_xbar_base(h: typing.TextIO,
+                          xbar: typing.Union[XBarBase, XBarFrame],
+                          level: int,
+                          parent_id: typing.Union[str, None],
+                          id_: str) -> None:
+    write_node(h, str(xbar.type) + "'", level, id_, parent_id)
+    if isinstance(xbar.head, XHead):
+        to_graphviz_xhead(h, xbar.head, level + 1, id_, f'{id_}_0')
+    else:
+        to_graphviz_unknown(h, xbar.head, level + 1, id_, f'{id_}_0')
+    ls = xbar.compl if isinstance(xbar, XBarFrame) else [xbar.compl]
+    for i, compl in enumerate(ls, 1):
+        if isinstance(compl, XMax):
+            to_graphviz_xmax(h, compl, level + 1, id_, f'{id_}_{i}')
+        elif xbar.compl:
+            to_graphviz_unknown(h, compl, level + 1, id_, f'{id_}_{i}')
+
+
+def to_graphviz_xbar_rec(h: typing.TextIO,
+                         xbar: XBarRec,
+                         level: int,
+                         parent_id: typing.Union[str, None],
+                         id_: str) -> None:
+    write_node(h, str(xbar.type) + "'", level, id_, parent_id)
+    to_graphviz_xbar(h, xbar.bar, level + 1, id_, f'{id_}_0')
+    if isinstance(xbar.adj, XMax):
+        to_graphviz_xmax(h, xbar.adj, level + 1, id_, f'{id_}_1')
+    else:
+        to_graphviz_unknown(h, xbar.adj, level + 1, id_, f'{id_}_1')
+
+
+def to_graphviz_xbar(h: typing.TextIO,
+                     xbar: typing.Union[XBarBase, XBarFrame, XBarRec],
+                     level: int,
+                     parent_id: typing.Union[str, None],
+                     id_: str) -> None:
+    if isinstance(xbar, XBarBase) or isinstance(xbar, XBarFrame):
+        to_graphviz_xbar_base(h, xbar, level, parent_id, id_)
+    elif isinstance(xbar, XBarRec):
+        to_graphviz_xbar_rec(h, xbar, level, parent_id, id_)
+    else:
+        to_graphviz_unknown(h, xbar, level, parent_id, id_)
+
+
+def to_graphviz_xspec(h: typing.TextIO,
+                      xspec: XSpec,
+                      level: int,
+                      parent_id: typing.Union[str, None],
+                      id_: str) -> None:
+    if isinstance(xspec, XMax):
+        return to_graphviz_xmax(h, xspec, level, parent_id, id_)
+    if not isinstance(xspec, XSpecTag):
+        raise ValueError('Unsupported Spec: ' + str(xspec))
+    label = '\n'.join(str_tags_iter(xspec.tags))
+    if not label:
+        return
+    write_node(h, label, level, id_, parent_id)
+
+
+def to_graphviz_xmax(h: typing.TextIO,
+                     xmax: XMax,
+                     level: int,
+                     parent_id: typing.Union[str, None],
+                     id_: str) -> None:
+    write_node(h, str(xmax.type) + 'P', level, id_, parent_id)
+    if isinstance_xspec(xmax.spec):
+        to_graphviz_xspec(h, xmax.spec, level + 1, id_, f'{id_}_0')
+    elif xmax.spec is not None:
+        to_graphviz_unknown(h, xmax.spec, level + 1, id_, f'{id_}_0')
+    to_graphviz_xbar(h, xmax.xbar, level + 1, id_, f'{id_}_1')
+
+
+class RenderCache:
+    """ LRU cache of the graphviz code of whole graphs, see `render_lexp`
+
+    The key is the `json_digest` of the l-expression, only a repeated
+    l-expression is a hit. The subtrees are not cached: their lookup
+    costs more than their rendering, so the cache only pays off when the
+    same trees come again.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        if maxsize < 1:
+            raise ValueError(f'maxsize should be positive, got: {maxsize}')
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: collections.OrderedDict = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, key: bytes) -> typing.Optional[str]:
+        code = self._cache.get(key)
+        if code is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+        return code
+
+    def put(self, key: bytes, code: str) -> None:
+        self._cache[key] = code
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._cache), 'maxsize': self.maxsize}
+
+
+def quote_id(name: str) -> str:
+    if PLAIN_ID.fullmatch(name):
+        return name
+    escaped = name.replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def to_graphviz(h: typing.TextIO, xmax: XMax, name: str = 'D') -> None:
+    """ Write the tree as a graphviz digraph
+
+    The node ids are the paths from the root, see `ROOT_ID`.
+    """
+    h.write(f'digraph {quote_id(name)} {{\n')
+    write_graph_body(h, xmax)
+
+
+def write_graph_body(h: typing.TextIO, xmax: XMax) -> None:
+    """ The digraph after its first line, the same for any name """
+    if isinstance(xmax, XMax):
+        to_graphviz_xmax(h, xmax, 0, None, ROOT_ID)
+    else:
+        to_graphviz_unknown(h, xmax, 0, None, ROOT_ID)
+    h.write('}\n')
+
+
+def graphviz_string(xmax: XMax, name: str = 'D') -> str:
+    h = io.StringIO()
+    to_graphviz(h, xmax, name)
+    return h.getvalue()
+
+
+def render_lexp(lexp: list, name: str = 'D',
+                cache: typing.Optional[RenderCache] = None
+                ) -> tuple[typing.Optional[str], typing.Optional[str]]:
+    """ The graphviz code of an X-bar l-expression, or the error
+
+    With `cache`, the whole graphs are cached by their l-expressions,
+    without the names, see `RenderCache`.
+    """
+    try:
+        if cache is None:
+            return graphviz_string(lexp_to_tree(lexp), name), None
+        key = json_digest(lexp)
+        body = cache.get(key)
+        if body is None:
+            h = io.StringIO()
+            write_graph_body(h, lexp_to_tree(lexp))
+            body = h.getvalue()
+            cache.put(key, body)
+        return f'digraph {quote_id(name)} {{\n{body}', None
+    except Exception as e:
+        return None, describe_error(e)
+
+
+worker_cache: typing.Optional[RenderCache] = None
+
+
+def init_worker(cache_size: int = 0) -> None:
+    global worker_cache
+    worker_cache = RenderCache(cache_size) if cache_size > 0 else None
+
+
+def render_chunk(chunk: list[tuple[list, str]]) -> list[tuple]:
+    return [render_lexp(lexp, name, worker_cache) for lexp, name in chunk]
+
+
+def render_many(records: typing.Iterable[tuple[list, str]],
+                workers: int = 0,
+                chunksize: int = 64,
+                cache_size: int = 0
+                ) -> typing.Iterator[tuple[typing.Optional[str],
+                                           typing.Optional[str]]]:
+    """ Render the (l-expression, graph name) records, in order
+
+    Yields the graphviz code or the error of each record, see
+    `render_lexp`. With `workers`, the records are rendered in that many
+    worker processes, `chunksize` records per task. The input is
+    consumed lazily, only a few chunks per worker are in flight. With
+    `cache_size`, each process keeps a `RenderCache` of that size.
+    """
+    if workers <= 0:
+        cache = RenderCache(cache_size) if cache_size > 0 else None
+        for lexp, name in records:
+            yield render_lexp(lexp, name, cache)
+        return
+    import concurrent.futures  # slow to import, see importtime_bench.py
+    records = iter(records)
+    max_pending = workers * 4
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker,
+            initargs=(cache_size,)) as pool:
+        pending = collections.deque()
+        try:
+            while True:
+                while len(pending) < max_pending:
+                    chunk = list(itertools.islice(records, chunksize))
+                    if not chunk:
+                        break
+                    pending.append(pool.submit(render_chunk, chunk))
+                if not pending:
+                    return
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
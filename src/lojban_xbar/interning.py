@@ -0,0 +1,211 @@
+from __future__ import annotations
+import types
+import typing
+
+from .types import XType, XHead, XBarBase, XBarFrame, XBarRec, XSpecTag
+from .types import XMax, XBar, XSpec
+
+
+def frozen_tags(tags: typing.Optional[typing.Mapping[str, str]]
+                ) -> typing.Optional[typing.Mapping[str, str]]:
+    if not tags:
+        return None
+    return types.MappingProxyType(dict(tags))
+
+
+def tags_key(tags: typing.Optional[typing.Mapping[str, str]]) -> tuple:
+    return tuple(sorted(tags.items())) if tags else ()
+
+
+class FrozenNode:
+    """ Mixin: immutable node with structural equality and hashing
+
+    A subclass sets its slots with `_init` and defines `_key`, a tuple
+    of the fields. The children are frozen nodes too, so the hash of a
+    node is computed once from the cached hashes of its children.
+    """
+    __slots__ = ()
+
+    def _init(self, **fields) -> None:
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, '_hash', hash((type(self), self._key())))
+
+    def _key(self) -> tuple:
+        raise NotImplementedError
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(self) is not type(other) or self._hash != other._hash:
+            return False
+        return self._key() == other._key()
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class FrozenXHead(FrozenNode, XHead):
+    __slots__ = ('_hash',)
+
+    def __init__(self,
+                 type_: XType,
+                 s: typing.Optional[str],
+                 tags: typing.Optional[typing.Mapping[str, str]] = None):
+        self._init(type=type_, s=s, tags=frozen_tags(tags))
+
+    def _key(self) -> tuple:
+        return self.type, self.s, tags_key(self.tags)
+
+    def __reduce__(self):
+        return FrozenXHead, (self.type, self.s, self.tags and dict(self.tags))
+
+
+class FrozenXBarBase(FrozenNode, XBarBase):
+    __slots__ = ('_hash',)
+
+    def __init__(self, head: FrozenXHead,
+                 compl: typing.Optional[FrozenXMax] = None):
+        self._init(type=head.type, head=head, compl=compl)
+
+    def _key(self) -> tuple:
+        return self.head, self.compl
+
+    def __reduce__(self):
+        return FrozenXBarBase, (self.head, self.compl)
+
+
+class FrozenXBarFrame(FrozenNode, XBarFrame):
+    __slots__ = ('_hash',)
+
+    def __init__(self, head: FrozenXHead, *compl: FrozenXMax):
+        self._init(type=head.type, head=head, compl=compl)
+
+    def _key(self) -> tuple:
+        return self.head, self.compl
+
+    def __reduce__(self):
+        return FrozenXBarFrame, (self.head, *self.compl)
+
+
+class FrozenXBarRec(FrozenNode, XBarRec):
+    __slots__ = ('_hash',)
+
+    def __init__(self, bar: XBar, adj: FrozenXMax):
+        self._init(bar=bar, adj=adj, type=bar.type)
+
+    def _key(self) -> tuple:
+        return self.bar, self.adj
+
+    def __reduce__(self):
+        return FrozenXBarRec, (self.bar, self.adj)
+
+
+class FrozenXSpecTag(FrozenNode, XSpecTag):
+    __slots__ = ('_hash',)
+
+    def __init__(self, tags: typing.Mapping[str, str]):
+        self._init(tags=frozen_tags(tags))
+
+    def _key(self) -> tuple:
+        return tags_key(self.tags),
+
+    def __reduce__(self):
+        return FrozenXSpecTag, (self.tags and dict(self.tags),)
+
+
+class FrozenXMax(FrozenNode, XMax):
+    __slots__ = ('_hash',)
+
+    def __init__(self, spec: typing.Optional[XSpec], xbar: XBar):
+        self._init(type=xbar.type, spec=spec, xbar=xbar)
+
+    def _key(self) -> tuple:
+        return self.spec, self.xbar
+
+    def __reduce__(self):
+        return FrozenXMax, (self.spec, self.xbar)
+
+
+def node_kids(node) -> tuple:
+    if isinstance(node, XMax):
+        return node.spec, node.xbar
+    if isinstance(node, XBarRec):
+        return node.bar, node.adj
+    if isinstance(node, XBarFrame):
+        return (node.head, *node.compl)
+    if isinstance(node, XBarBase):
+        return node.head, node.compl
+    return ()
+
+
+def freeze_node(node, kids: tuple) -> FrozenNode:
+    """ The frozen copy of `node`, with the frozen `kids` """
+    if isinstance(node, XMax):
+        return FrozenXMax(*kids)
+    if isinstance(node, XBarRec):
+        return FrozenXBarRec(*kids)
+    if isinstance(node, XBarFrame):
+        return FrozenXBarFrame(*kids)
+    if isinstance(node, XBarBase):
+        return FrozenXBarBase(*kids)
+    if isinstance(node, XHead):
+        return FrozenXHead(node.type, node.s, node.tags)
+    if isinstance(node, XSpecTag):
+        return FrozenXSpecTag(node.tags)
+    raise TypeError(f'can not freeze, not an X-bar node: {node!r}')
+
+
+class NodeInterner:
+    """ Hash-consing table of frozen X-bar nodes
+
+    Structurally equal subtrees are stored once: `intern` returns the
+    node already in the table if there is one. Then the equality of
+    interned nodes is the identity, and the subtrees can be used as
+    dict keys or in sets in O(1).
+    """
+
+    def __init__(self):
+        self._nodes: dict[FrozenNode, FrozenNode] = {}
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node) -> bool:
+        return node in self._nodes
+
+    def clear(self) -> None:
+        self._nodes.clear()
+
+    def canonical(self, node: FrozenNode) -> FrozenNode:
+        return self._nodes.setdefault(node, node)
+
+    def intern(self, tree):
+        """ The interned frozen copy of a typed X-bar tree """
+        if tree is None:
+            return None
+        done = {}  # id(node) -> interned node
+        stack = [(tree, False)]
+        while stack:
+            node, kids_done = stack.pop()
+            if id(node) in done:
+                continue
+            kids = node_kids(node)
+            if not kids_done:
+                stack.append((node, True))
+                stack.extend((kid, False) for kid in kids
+                             if kid is not None and id(kid) not in done)
+                continue
+            frozen_kids = tuple(kid if kid is None else done[id(kid)]
+                                for kid in kids)
+            done[id(node)] = self.canonical(freeze_node(node, frozen_kids))
+        return done[id(tree)]
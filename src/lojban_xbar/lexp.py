@@ -1,11 +1,31 @@
 from __future__ import annotations
+import enum
 import sys
 import typing
 
-from lxslt import TreeNode
+from .diagnostics import report, Lazy
 from .types import XBarFrame, XSpec, XBar, isinstance_xbar, XBarRec
 from .types import XBarBase, XType, XSpecTag, XMax, XHead
 
+if typing.TYPE_CHECKING:
+    # only for the annotations, rendering a tree does not import lxslt
+    from lxslt import TreeNode
+
+
+def copy_lexp(node: TreeNode) -> TreeNode:
+    """ Deep copy of a nested-list tree, of any depth """
+    if not isinstance(node, list):
+        return node
+    copy = list(node)
+    stack = [copy]
+    while stack:
+        ls = stack.pop()
+        for i, kid in enumerate(ls):
+            if isinstance(kid, list):
+                ls[i] = kid = list(kid)
+                stack.append(kid)
+    return copy
+
 
 def is_node_name(node: TreeNode, name: str) -> bool:
     if not isinstance(node, list):
@@ -26,47 +46,113 @@ def get_node_name(node: TreeNode) -> typing.Optional[str]:
     return name
 
 
-def is_max_node(node: TreeNode) -> bool:
+class NodeKind(enum.Enum):
+    HEAD = 1
+    SPEC = 2
+    BAR = 3
+    FRAME = 4
+    BAR_REC = 5
+    MAX = 6
+
+
+BAR_KINDS = frozenset((NodeKind.BAR, NodeKind.FRAME, NodeKind.BAR_REC))
+KIND_SUFFIXES = (('-MAX', NodeKind.MAX), ('-BAR', NodeKind.BAR),
+                 ('-SPEC', NodeKind.SPEC), ('-FRAME', NodeKind.FRAME),
+                 ('-BAR-REC', NodeKind.BAR_REC))
+XTYPES = {type_.name: type_ for type_ in XType}
+
+NameInfo = typing.Tuple[typing.Optional[NodeKind], typing.Optional[XType]]
+NOT_X_NODE: NameInfo = (None, None)
+
+
+def classify_name(name: str) -> NameInfo:
+    """ The kind of the X-bar node and its type, from the node name """
+    if len(name) == 1:
+        return NodeKind.HEAD, XTYPES.get(name)
+    for suffix, kind in KIND_SUFFIXES:
+        if name.endswith(suffix):
+            return kind, XTYPES.get(name[0])
+    return NOT_X_NODE
+
+
+# The node names of the known types, and the other names seen so far,
+# up to `MAX_NODE_KINDS`. The names are interned, the names built with
+# `max_node_name` and `bar_node_name` are the same string objects.
+X_LETTERS = (*XTYPES, 'X')
+KNOWN_NAMES = (*X_LETTERS, *(letter + suffix for letter in X_LETTERS
+                             for suffix, _ in KIND_SUFFIXES))
+NODE_KINDS: dict[str, NameInfo] = {
+    sys.intern(name): classify_name(name) for name in KNOWN_NAMES}
+MAX_NODE_KINDS = 4096
+MAX_NAMES = {letter: sys.intern(f'{letter}-MAX') for letter in X_LETTERS}
+BAR_NAMES = {letter: sys.intern(f'{letter}-BAR') for letter in X_LETTERS}
+
+
+def name_kind(name: str) -> NameInfo:
+    info = NODE_KINDS.get(name)
+    if info is None:
+        info = classify_name(name)
+        if len(NODE_KINDS) < MAX_NODE_KINDS:
+            NODE_KINDS[sys.intern(name)] = info
+    return info
+
+
+def node_kind(node: TreeNode) -> typing.Optional[NodeKind]:
     name = get_node_name(node)
-    return name and name.endswith('-MAX')
+    if name is None:
+        return None
+    return name_kind(name)[0]
+
+
+def max_node_name(x_type: str) -> str:
+    """ 'N-MAX' for 'N' """
+    name = MAX_NAMES.get(x_type)
+    return f'{x_type}-MAX' if name is None else name
+
+
+def bar_node_name(x_type: str) -> str:
+    """ 'N-BAR' for 'N' """
+    name = BAR_NAMES.get(x_type)
+    return f'{x_type}-BAR' if name is None else name
+
+
+def is_max_node(node: TreeNode) -> bool:
+    return node_kind(node) is NodeKind.MAX
 
 
 def is_spec_node(node: TreeNode) -> bool:
-    name = get_node_name(node)
-    return name and name.endswith('-SPEC')
+    return node_kind(node) is NodeKind.SPEC
 
 
 def is_bar_node(node: TreeNode) -> bool:
-    name = get_node_name(node)
-    return name and (name.endswith('-BAR')
-                     or name.endswith('-FRAME')
-                     or name.endswith('-BAR-REC'))
+    return node_kind(node) in BAR_KINDS
 
 
 def is_head_node(node: TreeNode) -> bool:
-    name = get_node_name(node)
-    return name and len(name) == 1
+    return node_kind(node) is NodeKind.HEAD
 
 
 def lexp_to_complement(node: TreeNode) -> typing.Optional[TreeNode]:
     """ from X-MAX to the complement """
     if len(node) != 2:
-        print('lexp_to_complement: X-MAX should consist of the node name'
-              ' and a bar node, got:', node, file=sys.stderr)
+        report('max-not-bar', 'lexp_to_complement',
+               'X-MAX should consist of the node name and a bar node, got:',
+               node)
         return None
     _, bar_node = node
     while len(bar_node) and is_bar_node(bar_node[0]):
         bar_node = bar_node[0]
     if not is_bar_node(bar_node):
-        print('lexp_to_complement: descent to bar-node. Got not a bar node:',
-              bar_node, file=sys.stderr)
+        report('not-bar', 'lexp_to_complement',
+               'descent to bar-node. Got not a bar node:', bar_node)
         return None
     compl_node = bar_node[-1]
     if is_max_node(compl_node):
         return compl_node
     if not is_head_node(compl_node):
-        print('lexp_to_complement: the last child of the bar-node should'
-              ' be X-MAX or X-HEAD:', bar_node, file=sys.stderr)
+        report('bad-complement', 'lexp_to_complement',
+               'the last child of the bar-node should be X-MAX or X-HEAD:',
+               bar_node)
     return None
 
 
@@ -98,14 +184,15 @@ def split_on_tags_and_not(nodes: list[TreeNode])\
         else:
             oth_nodes.append(node)
     if len(oth_nodes) > 1:
-        print('load_spec: allow at most one max node. Got:',
-              list(map(str, oth_nodes)), file=sys.stderr)
+        report('many-max', 'load_spec',
+               'allow at most one max node. Got:',
+               Lazy(lsstr, list(oth_nodes)))
     return tag_nodes, oth_nodes
 
 
-def assert_xmax_p(prefix: str, node: object) -> bool:
+def assert_xmax_p(location: str, message: str, node: object) -> bool:
     if not isinstance(node, XMax):
-        print(prefix, node)
+        report('not-max', location, message, node)
         return False
     return True
 
@@ -129,11 +216,13 @@ def load_spec(kids: typing.Union[list[TreeNode], XMax]) \
         return None
     tag_nodes, max_nodes = split_on_tags_and_not(kids)
     max_nodes = list(filter(
-        lambda node: assert_xmax_p('load_spec: should be X-MAX, got:', node),
+        lambda node: assert_xmax_p('load_spec', 'should be X-MAX, got:',
+                                   node),
         max_nodes))
     if max_nodes and tag_nodes:
-        print('load_spec: allow either max either tag nodes, not both. Got:',
-              list(map(str, kids)), file=sys.stderr)
+        report('max-and-tags', 'load_spec',
+               'allow either max either tag nodes, not both. Got:',
+               Lazy(lsstr, list(kids)))
     if max_nodes:
         return typing.cast(XMax, max_nodes[0])
     if not tag_nodes:
@@ -146,11 +235,13 @@ def load_spec(kids: typing.Union[list[TreeNode], XMax]) \
 
 def load_max(kids: list[TreeNode]) -> typing.Optional[XMax]:
     if not(1 <= len(kids) <= 2):
-        print('load_max: expected one or two kids, got:', list(map(str, kids)))
+        report('max-kids', 'load_max',
+               'expected one or two kids, got:', Lazy(lsstr, list(kids)))
         return None
     bar = typing.cast(XBar, kids.pop())
     if not isinstance_xbar(bar):
-        print('load_max: the last argument should be xbar, got:', str(bar))
+        report('max-not-bar', 'load_max',
+               'the last argument should be xbar, got:', bar)
         return None
     spec = kids[0] if len(kids) else None
     return XMax(spec, bar)
@@ -168,7 +259,7 @@ def get_head_and_compl(
         xhead = XHead(type_, None)
     compl = list(filter(
         lambda node: assert_xmax_p(
-            'get_head_and_compl: complement should be X-MAX, got:', node),
+            'get_head_and_compl', 'complement should be X-MAX, got:', node),
         compl))
     return xhead, typing.cast(typing.List[XMax], compl)
 
@@ -182,25 +273,23 @@ def load_bar(kids: list[TreeNode]) -> typing.Union[XBarBase, XBarRec, None]:
     for x_kid in map(lexp_to_tree, kids):
         cls = type(x_kid)
         if cls in x_kids:
-            print(f'load_bar: kids of type {cls}',
-                  f'is seen already: {x_kids[cls]}.',
-                  f'Dup: {x_kid}, all kids: {lsstr(x_kids)}',
-                  file=sys.stderr)
+            report('duplicate-kid', 'load_bar',
+                   'kids of type', cls, 'is seen already:', x_kids[cls],
+                   'Dup:', x_kid, 'all kids:', Lazy(lsstr, dict(x_kids)))
             return None
         x_kids[cls] = x_kid
 
     if not x_kids or len(x_kids) > 2:
-        print('load_bar: expected 1 or 2 children, got:',
-              f'{len(x_kids)}, {lsstr(x_kids)}',
-              file=sys.stderr)
+        report('bar-kids', 'load_bar', 'expected 1 or 2 children, got:',
+               len(x_kids), Lazy(lsstr, dict(x_kids)))
         return None
 
     if XHead in x_kids:
         compl = x_kids.get(XMax)
         if compl is None and len(x_kids) == 2:
-            print('load_bar: in addition to XHead, expected an XMax,',
-                  f'got: {lsstr(x_kids)}',
-                  file=sys.stderr)
+            report('bar-no-max', 'load_bar',
+                   'in addition to XHead, expected an XMax, got:',
+                   Lazy(lsstr, dict(x_kids)))
             return None
         return XBarBase(x_kids[XHead], compl)
 
@@ -209,14 +298,14 @@ def load_bar(kids: list[TreeNode]) -> typing.Union[XBarBase, XBarRec, None]:
              or x_kids.get(XBarRec))
     if x_bar:
         if XMax not in x_kids:
-            print('load_bar: in addition to XBar, expected an XMax,',
-                  f'got: {lsstr(x_kids)}',
-                  file=sys.stderr)
+            report('bar-no-max', 'load_bar',
+                   'in addition to XBar, expected an XMax, got:',
+                   Lazy(lsstr, dict(x_kids)))
         return XBarRec(x_bar, x_kids[XMax])
 
-    print('load_bar: should have XHead or XBar among children,',
-          f'got: {lsstr(x_kids)}',
-          file=sys.stderr)
+    report('bar-no-head', 'load_bar',
+           'should have XHead or XBar among children, got:',
+           Lazy(lsstr, dict(x_kids)))
     return None
 
 
@@ -227,40 +316,79 @@ def load_frame(
     return XBarFrame(xhead, *ls_compl)
 
 
-def prefix_to_type(elem_name) -> typing.Optional[str]:
-    letter = elem_name[0]
-    try:
-        return XType[letter]
-    except KeyError:
-        return None
+def prefix_to_type(elem_name) -> typing.Optional[XType]:
+    return XTYPES.get(elem_name[0])
 
 
-def lexp_to_tree(le: TreeNode
-                 ) -> typing.Union[XMax, XSpec, XHead, XBar, TreeNode, list]:
+def enter_node(le: TreeNode):
+    """ For lexp_to_tree: convert a leaf, or start a frame for the kids """
     if not isinstance(le, list):
-        return le
+        return le, None
     head = le[0]
     if not isinstance(head, str):
-        return le
-    if 1 == len(head):
-        type_ = prefix_to_type(head)
+        return le, None
+    kind, type_ = name_kind(head)
+    if kind is NodeKind.HEAD:
         if not type_:
-            print(f'lexp_to_tree: unknown type: "{type_}"', file=sys.stderr)
-            return None
-        return load_head(type_, le[1:])
-    kids = list(map(lexp_to_tree, le[1:]))
-    if head.endswith('-BAR'):
-        type_ = prefix_to_type(head)
+            report('unknown-type', 'lexp_to_tree',
+                   'unknown type:', Lazy(repr, head))
+            return None, None
+        return load_head(type_, le[1:]), None
+    return None, (head, iter(le[1:]), [])
+
+
+def leave_node(head: str, kids: list):
+    """ For lexp_to_tree: build the node from the converted kids """
+    kind, type_ = name_kind(head)
+    if kind is NodeKind.BAR:
         return load_bar(kids)
-    if head == 'V-FRAME':
+    if kind is NodeKind.FRAME and type_ is XType.V:
         return load_frame(XType.V, kids)
-    if head.endswith('-SPEC'):
+    if kind is NodeKind.SPEC:
         return load_spec(kids)
-    if head.endswith('-MAX'):
+    if kind is NodeKind.MAX:
         try:
             return load_max(kids)
         except TypeError as e:
-            print('load-rec: bad input to X-MAX:',
-                  head, list(map(str, kids)), file=sys.stderr)
+            report('bad-max', 'lexp_to_tree', 'bad input to X-MAX:',
+                   head, Lazy(lsstr, list(kids)))
             raise e
     return [head, *kids]
+
+
+def lexp_to_tree(le: TreeNode
+                 ) -> typing.Union[XMax, XSpec, XHead, XBar, TreeNode, list]:
+    """ Convert an l-expression to the typed X-bar tree
+
+    The tree is built bottom-up with an explicit stack, so the nesting
+    depth is not limited by the Python recursion limit.
+    """
+    value, frame = enter_node(le)
+    if frame is None:
+        return value
+    stack = [frame]
+    while True:
+        head, kids_iter, kids = stack[-1]
+        for kid in kids_iter:
+            value, frame = enter_node(kid)
+            if frame is not None:
+                stack.append(frame)
+                break
+            kids.append(value)
+        else:
+            stack.pop()
+            value = leave_node(head, kids)
+            if not stack:
+                return value
+            stack[-1][2].append(value)
+
+
+def lexp_to_tree_recursive(
+        le: TreeNode
+) -> typing.Union[XMax, XSpec, XHead, XBar, TreeNode, list]:
+    """ The reference implementation of `lexp_to_tree` """
+    value, frame = enter_node(le)
+    if frame is None:
+        return value
+    head, kids_iter, _ = frame
+    return leave_node(head, list(map(lexp_to_tree_recursive, kids_iter)))
@@ -0,0 +1,112 @@
+from __future__ import annotations
+import collections
+import threading
+import typing
+
+from lxslt import Transformer, TreeNode, NodeSet, Rule
+
+from .diagnostics import Diagnostic, RecordingDiagnostics
+from .diagnostics import collect_diagnostics, get_diagnostics
+from .diagnostics import report_diagnostic
+from .fingerprints import json_digest
+from .lexp import copy_lexp
+from .rule_index import RuleIndex
+
+
+class SubtreeMemo:
+    """ LRU cache for the transformation of repeated camxes subtrees
+
+    Only the rules for the node names in `names` are cached. The key is
+    the digest of the camxes subtree, see `json_digest`. The cache keeps
+    its own copy of the results and returns fresh copies, so the callers
+    can modify the trees they get. The diagnostics reported by the
+    transformation are kept with the result and reported again on each
+    hit.
+    """
+
+    default_names = ('sumti_5', 'sumti_6')
+
+    def __init__(self, maxsize: int = 4096,
+                 names: typing.Iterable[str] = default_names):
+        if maxsize < 1:
+            raise ValueError(f'maxsize should be positive, got: {maxsize}')
+        self.maxsize = maxsize
+        self.names = frozenset(names)
+        self.hits = 0
+        self.misses = 0
+        self._cache: collections.OrderedDict = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._index: typing.Optional[RuleIndex] = None
+        self._index_base: typing.Optional[RuleIndex] = None
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def key(self, node: TreeNode) -> bytes:
+        return json_digest(node)
+
+    def get(self, key: typing.Hashable
+            ) -> typing.Optional[tuple[NodeSet, tuple[Diagnostic, ...]]]:
+        """ The result and the diagnostics of the transformation """
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+        value, diagnostics = entry
+        return copy_lexp(value), diagnostics
+
+    def put(self, key: typing.Hashable, value: NodeSet,
+            diagnostics: typing.Iterable[Diagnostic] = ()) -> None:
+        entry = copy_lexp(value), tuple(diagnostics)
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._cache), 'maxsize': self.maxsize}
+
+    def index_for(self, index: RuleIndex) -> RuleIndex:
+        """ The rule index `index`, with the memoized transformers """
+        if self._index_base is not index:
+            self._index = index.wrap(
+                lambda rule: MemoTransformer(rule.transformer, self)
+                if rule.key in self.names and not rule.is_prefix
+                else rule.transformer)
+            self._index_base = index
+        return self._index
+
+    def rules_for(self, index: RuleIndex) -> list[Rule]:
+        """ The rules of `index`, with the memoized transformers """
+        return self.index_for(index).to_rules()
+
+
+class MemoTransformer(Transformer):
+    def __init__(self, transformer: Transformer, memo: SubtreeMemo):
+        self.transformer = transformer
+        self.memo = memo
+
+    def transform(self, rules: list['Rule'], node: TreeNode) -> NodeSet:
+        key = self.memo.key(node)
+        entry = self.memo.get(key)
+        if entry is not None:
+            result, diagnostics = entry
+            for diag in diagnostics:
+                report_diagnostic(diag)
+            return result
+        recorder = RecordingDiagnostics(get_diagnostics())
+        with collect_diagnostics(recorder):
+            result = self.transformer.transform(rules, node)
+        self.memo.put(key, result, recorder.events)
+        return result
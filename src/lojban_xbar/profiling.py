@@ -0,0 +1,166 @@
+from __future__ import annotations
+import time
+import typing
+
+from lxslt import MatchNameCondition, Rule, Transformer, TreeNode, NodeSet
+
+from .memo import MemoTransformer
+from .rule_index import RuleIndex, IndexedRule, DispatchTransformer
+
+
+class RuleStats:
+    """ Counters of one rule
+
+    `calls` is the number of the matched nodes, `nodes` is the number
+    of the nodes visited while transforming them, the matched nodes
+    included. The times are in seconds, `exclusive` is the time minus
+    the time spent in the nested rules. For a recursive rule, `nodes`
+    and `inclusive` count only the outermost activation.
+    """
+    __slots__ = ('label', 'transformer', 'calls', 'nodes',
+                 'inclusive', 'exclusive', 'active')
+
+    def __init__(self, label: str, transformer: str):
+        self.label = label
+        self.transformer = transformer
+        self.calls = 0
+        self.nodes = 0
+        self.inclusive = 0.0
+        self.exclusive = 0.0
+        self.active = 0
+
+    def to_json(self) -> dict:
+        return {'rule': self.label, 'transformer': self.transformer,
+                'calls': self.calls, 'nodes': self.nodes,
+                'inclusive': self.inclusive, 'exclusive': self.exclusive}
+
+
+def transformer_name(transformer: Transformer) -> str:
+    while isinstance(transformer, MemoTransformer):
+        transformer = transformer.transformer
+    return type(transformer).__name__
+
+
+class RuleProfiler:
+    """ Opt-in time and count profile of the transformation rules
+
+    The profiler wraps the transformers of a rule index, see
+    `rules_for`, so the conversions without a profiler are not
+    slowed down. The nested rules are tracked on a stack, therefore
+    a profiler should be used by one thread at a time.
+    """
+
+    sort_keys = ('exclusive', 'inclusive', 'calls', 'nodes')
+
+    def __init__(self, clock: typing.Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.stats: dict[str, RuleStats] = {}
+        self.groups: dict[str, RuleStats] = {}
+        self.visited = 0
+        self._stack: list[list] = []
+        self._index: typing.Optional[RuleIndex] = None
+        self._index_base: typing.Optional[RuleIndex] = None
+        self._rules: list[Rule] = []
+
+    def _matches(self, name: str) -> bool:
+        self.visited += 1
+        return self._index.matches(name)
+
+    def rules_for(self, index: RuleIndex) -> list[Rule]:
+        """ The rules of `index`, with the profiled transformers """
+        if self._index_base is not index:
+            self._index = index.wrap(self._wrap)
+            self._index_base = index
+            self._rules = [Rule(MatchNameCondition(self._matches),
+                                DispatchTransformer(self._index))]
+        return self._rules
+
+    def _wrap(self, rule: IndexedRule) -> Transformer:
+        name = transformer_name(rule.transformer)
+        stats = self.stats.get(rule.label)
+        if stats is None:
+            stats = self.stats[rule.label] = RuleStats(rule.label, name)
+        group = self.groups.get(name)
+        if group is None:
+            group = self.groups[name] = RuleStats(name, name)
+        return ProfiledTransformer(rule.transformer, (stats, group), self)
+
+    def clear(self) -> None:
+        for stats in (*self.stats.values(), *self.groups.values()):
+            stats.__init__(stats.label, stats.transformer)
+        self.visited = 0
+
+    def rows(self, by: str = 'rule', sort: str = 'exclusive'
+             ) -> list[RuleStats]:
+        """ The counters of the used rules, the most expensive first
+
+        With `by='transformer'`, the rules are grouped by the
+        transformer class.
+        """
+        if sort not in self.sort_keys:
+            raise ValueError(f'sort should be one of {self.sort_keys},'
+                             f' got: {sort!r}')
+        if by == 'rule':
+            rows = self.stats.values()
+        elif by == 'transformer':
+            rows = self.groups.values()
+        else:
+            raise ValueError(f"by should be 'rule' or 'transformer',"
+                             f' got: {by!r}')
+        rows = [stats for stats in rows if stats.calls]
+        rows.sort(key=lambda stats: getattr(stats, sort), reverse=True)
+        return rows
+
+    def to_json(self, by: str = 'rule', sort: str = 'exclusive') -> dict:
+        return {'visited': self.visited,
+                'rows': [stats.to_json() for stats in self.rows(by, sort)]}
+
+    def table(self, by: str = 'rule', sort: str = 'exclusive',
+              limit: typing.Optional[int] = None) -> str:
+        """ The counters as a text table, times in milliseconds """
+        rows = self.rows(by, sort)[:limit]
+        name_width = max([len(by)] + [len(stats.label) for stats in rows])
+        lines = [f'{by:<{name_width}} {"calls":>8} {"nodes":>9}'
+                 f' {"incl ms":>10} {"excl ms":>10}  transformer']
+        for stats in rows:
+            lines.append(f'{stats.label:<{name_width}} {stats.calls:>8}'
+                         f' {stats.nodes:>9}'
+                         f' {stats.inclusive * 1000:>10.3f}'
+                         f' {stats.exclusive * 1000:>10.3f}'
+                         f'  {stats.transformer}')
+        lines.append(f'visited nodes: {self.visited}')
+        return '\n'.join(lines)
+
+
+class ProfiledTransformer(Transformer):
+    def __init__(self, transformer: Transformer,
+                 stats: tuple[RuleStats, ...], profiler: RuleProfiler):
+        self.transformer = transformer
+        self.stats = stats
+        self.profiler = profiler
+
+    def transform(self, rules: list['Rule'], node: TreeNode) -> NodeSet:
+        profiler = self.profiler
+        stack = profiler._stack
+        frame = [0.0]  # time spent in the nested rules
+        stack.append(frame)
+        for stats in self.stats:
+            stats.active += 1
+        visited = profiler.visited
+        start = profiler.clock()
+        try:
+            return self.transformer.transform(rules, node)
+        finally:
+            elapsed = profiler.clock() - start
+            stack.pop()
+            if stack:
+                stack[-1][0] += elapsed
+            # the matched node is counted before the transformation
+            nodes = profiler.visited - visited + 1
+            for stats in self.stats:
+                stats.active -= 1
+                stats.calls += 1
+                stats.exclusive += elapsed - frame[0]
+                if not stats.active:
+                    stats.nodes += nodes
+                    stats.inclusive += elapsed
@@ -0,0 +1,66 @@
+from __future__ import annotations
+import json
+import os
+import socket
+import struct
+import typing
+
+# The frames of the conversion server: a JSON document in UTF-8, after
+# its length in 4 bytes, big endian. Only the standard library is used
+# here, so that a client does not import the converter.
+HEADER = struct.Struct('>I')
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+# The requests the server answers, see `server.handle_request`
+CONVERSIONS = frozenset(('xbar', 'text', 'dot', 'xbar_dot'))
+QUERIES = frozenset(('health', 'stats'))
+
+
+def default_socket_path() -> str:
+    """ $LOJBAN_XBAR_SOCKET, or a per-user socket in the runtime dir """
+    path = os.environ.get('LOJBAN_XBAR_SOCKET')
+    if path:
+        return path
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, 'lojban-xbar.sock')
+    import tempfile  # slow to import, seldom needed
+    return os.path.join(tempfile.gettempdir(),
+                        f'lojban-xbar-{os.getuid()}.sock')
+
+
+def send_frame(sock: socket.socket, obj: object) -> None:
+    data = json.dumps(obj).encode('utf-8')
+    if len(data) > MAX_FRAME_SIZE:
+        raise ValueError(f'frame of {len(data)} bytes, the limit is'
+                         f' {MAX_FRAME_SIZE}')
+    sock.sendall(HEADER.pack(len(data)) + data)
+
+
+def recv_exactly(sock: socket.socket, size: int) -> bytes:
+    parts = []
+    while size:
+        part = sock.recv(min(size, 1 << 20))
+        if not part:
+            raise ConnectionError(f'connection closed, {size} bytes'
+                                  ' of the frame missing')
+        parts.append(part)
+        size -= len(part)
+    return b''.join(parts)
+
+
+def recv_frame(sock: socket.socket) -> typing.Optional[object]:
+    """ The next frame, decoded, or None if the peer has closed
+
+    Raises ValueError if the frame is too large or is not JSON.
+    """
+    header = sock.recv(HEADER.size)
+    if not header:
+        return None
+    if len(header) < HEADER.size:
+        header += recv_exactly(sock, HEADER.size - len(header))
+    size, = HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise ValueError(f'frame of {size} bytes, the limit is'
+                         f' {MAX_FRAME_SIZE}')
+    return json.loads(recv_exactly(sock, size).decode('utf-8'))
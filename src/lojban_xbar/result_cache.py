@@ -0,0 +1,200 @@
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import time
+import typing
+
+from .camxes_to_xbar import RULES_VERSION
+from .diagnostics import Diagnostic
+from .fingerprints import json_digest
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS results (
+    key BLOB PRIMARY KEY,
+    value TEXT NOT NULL,
+    diagnostics TEXT NOT NULL,
+    used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+CREATE TABLE IF NOT EXISTS results_count (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    n INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO results_count SELECT 0, (SELECT count(*) FROM results)
+    WHERE NOT EXISTS (SELECT 1 FROM results_count);
+CREATE TRIGGER IF NOT EXISTS results_insert AFTER INSERT ON results
+BEGIN
+    UPDATE results_count SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS results_delete AFTER DELETE ON results
+BEGIN
+    UPDATE results_count SET n = n - 1;
+END;
+'''
+
+
+class ResultCache:
+    """ Persistent cache of the conversions, in an SQLite file
+
+    The key is a digest of the camxes tree together with the rule-set
+    `version`, so a new version of the rules never gets the results of
+    an old one. The value is the X-bar l-expression with the formatted
+    diagnostics of the conversion.
+
+    The database is in the WAL mode: several processes can read it
+    while one of them writes. Each process opens its own connection,
+    a cache passed to a worker process reconnects there.
+
+    The new results and the time of use of the hits are kept in memory
+    and written in batches of `write_every`, see `flush`. At most
+    `max_entries` results are kept, the least recently used ones are
+    evicted. The number of the results is kept up to date by triggers,
+    so it is known without counting the rows.
+    """
+
+    def __init__(self, path: typing.Union[str, os.PathLike],
+                 max_entries: int = 1_000_000,
+                 version: str = RULES_VERSION,
+                 write_every: int = 256,
+                 timeout: float = 30.0):
+        if max_entries < 1:
+            raise ValueError('max_entries should be positive,'
+                             f' got: {max_entries}')
+        self.path = os.fspath(path)
+        self.max_entries = max_entries
+        self.version = version
+        self.write_every = write_every
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._prefix = version.encode('utf-8') + b'\0'
+        self._conn: typing.Optional[sqlite3.Connection] = None
+        self._pid: typing.Optional[int] = None
+        self._touched: dict[bytes, float] = {}
+        self._pending: dict[bytes, tuple[str, str]] = {}
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.update(_conn=None, _pid=None, _touched={}, _pending={},
+                     hits=0, misses=0)
+        return state
+
+    def __enter__(self) -> 'ResultCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """ The number of the results written, see `flush` """
+        return self._count(self.connection())
+
+    def connection(self) -> sqlite3.Connection:
+        """ The connection of this process, opened on the first use """
+        if self._conn is None or self._pid != os.getpid():
+            # a connection inherited through fork is not used
+            self._conn = sqlite3.connect(self.path, timeout=self.timeout,
+                                         isolation_level=None)
+            self._pid = os.getpid()
+            self._touched.clear()
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def key(self, tree) -> bytes:
+        """ The digest of the version and of the tree, see `json_digest`
+        """
+        return json_digest(tree, self._prefix)
+
+    def get(self, key: bytes
+            ) -> typing.Optional[tuple[list, tuple[Diagnostic, ...]]]:
+        """ The l-expression and the diagnostics, or None """
+        row = self._pending.get(key)
+        if row is None:
+            row = self.connection().execute(
+                'SELECT value, diagnostics FROM results WHERE key = ?',
+                (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= self.write_every:
+                self.flush()
+        self.hits += 1
+        value, diagnostics = row
+        return json.loads(value), tuple(
+            Diagnostic(code, location, (message,))
+            for code, location, message in json.loads(diagnostics))
+
+    def put(self, key: bytes, value: list,
+            diagnostics: typing.Iterable[Diagnostic] = ()) -> None:
+        diagnostics = [(diag.code, diag.location, diag.message)
+                       for diag in diagnostics]
+        self._pending[key] = (json.dumps(value), json.dumps(diagnostics))
+        if len(self._pending) >= self.write_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """ Write the new results and the time of use of the recent hits
+
+        The lock of the database is taken once per batch, not once per
+        result, and then the results above `max_entries` are evicted.
+        """
+        if not self._pending and not self._touched:
+            return
+        now = time.time()
+        conn = self.connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany('UPDATE results SET used = ? WHERE key = ?',
+                             [(used, key)
+                              for key, used in self._touched.items()])
+            # not INSERT OR REPLACE: a replacement does not fire the
+            # delete trigger, the count would grow
+            conn.executemany(
+                'INSERT INTO results VALUES (?, ?, ?, ?) ON CONFLICT (key)'
+                ' DO UPDATE SET value = excluded.value,'
+                ' diagnostics = excluded.diagnostics, used = excluded.used',
+                [(key, value, diagnostics, now)
+                 for key, (value, diagnostics) in self._pending.items()])
+            if self._pending:
+                self._evict(conn)
+        self._touched.clear()
+        self._pending.clear()
+
+    @staticmethod
+    def _count(conn: sqlite3.Connection) -> int:
+        return conn.execute('SELECT n FROM results_count').fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        excess = self._count(conn) - self.max_entries
+        if excess > 0:
+            conn.execute('DELETE FROM results WHERE key IN'
+                         ' (SELECT key FROM results ORDER BY used LIMIT ?)',
+                         (excess,))
+
+    def clear(self) -> None:
+        self._touched.clear()
+        self._pending.clear()
+        self.connection().execute('DELETE FROM results')
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        """ Flush the results, the connection is closed even if it fails
+        """
+        conn = self._conn if self._pid == os.getpid() else None
+        try:
+            if conn is not None:
+                self.flush()
+        finally:
+            self._conn = None
+            self._pid = None
+            if conn is not None:
+                conn.close()
+
+    def stats(self) -> dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self), 'max_entries': self.max_entries}
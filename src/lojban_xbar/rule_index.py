@@ -0,0 +1,121 @@
+from __future__ import annotations
+import collections
+import typing
+
+from lxslt import MatchName, MatchNameCondition, Rule, Transformer
+from lxslt import TreeNode, NodeSet
+
+# The resolutions remembered by a `RuleIndex`. The camxes grammar has a
+# few hundred node names, the names past the limit are looked up each
+# time, so arbitrary input does not grow a long-running process.
+MAX_RESOLVED_NAMES = 4096
+
+
+class IndexedRule(collections.namedtuple(
+        'IndexedRule', 'key is_prefix transformer')):
+    """ A rule that matches a node name exactly or by a prefix """
+
+    @property
+    def label(self) -> str:
+        return f'{self.key}*' if self.is_prefix else self.key
+
+    def to_rule(self) -> Rule:
+        if self.is_prefix:
+            prefix = self.key
+            matcher = MatchNameCondition(
+                lambda node_name: node_name.startswith(prefix))
+        else:
+            matcher = MatchName(self.key)
+        return Rule(matcher, self.transformer)
+
+
+def rule_name(name: str, transformer: Transformer) -> IndexedRule:
+    return IndexedRule(name, False, transformer)
+
+
+def rule_prefix(prefix: str, transformer: Transformer) -> IndexedRule:
+    return IndexedRule(prefix, True, transformer)
+
+
+class RuleIndex:
+    """ Ordered rules with a name lookup instead of a linear scan
+
+    Exact names are looked up in a dict, prefixes are found by walking
+    a trie over the node name. Among all the matching rules, the one
+    listed first wins, as in `lxslt.apply_templates`. The resolution
+    for a node name is remembered, up to `MAX_RESOLVED_NAMES` names, so
+    after warm-up a dispatch costs one dict lookup.
+    """
+
+    _leaf = '\0'  # trie key for "a prefix ends here"
+
+    def __init__(self, rules: typing.Iterable[IndexedRule]):
+        self.rules = tuple(rules)
+        self._exact = {}
+        self._trie = {}
+        self._resolved = {}
+        for pos, rule in enumerate(self.rules):
+            if rule.is_prefix:
+                node = self._trie
+                for ch in rule.key:
+                    node = node.setdefault(ch, {})
+                node.setdefault(RuleIndex._leaf, pos)
+            else:
+                self._exact.setdefault(rule.key, pos)
+        self._dispatch_rules = [
+            Rule(MatchNameCondition(self.matches), DispatchTransformer(self))
+        ]
+
+    def _lookup(self, name: str) -> typing.Optional[int]:
+        best = self._exact.get(name)
+        node = self._trie
+        leaf = RuleIndex._leaf
+        for ch in name:
+            pos = node.get(leaf)
+            if pos is not None and (best is None or pos < best):
+                best = pos
+            node = node.get(ch)
+            if node is None:
+                break
+        else:
+            pos = node.get(leaf)
+            if pos is not None and (best is None or pos < best):
+                best = pos
+        return best
+
+    def find(self, name: str) -> typing.Optional[IndexedRule]:
+        try:
+            return self._resolved[name]
+        except KeyError:
+            pass
+        pos = self._lookup(name)
+        rule = self.rules[pos] if pos is not None else None
+        if len(self._resolved) < MAX_RESOLVED_NAMES:
+            self._resolved[name] = rule
+        return rule
+
+    def matches(self, name: str) -> bool:
+        return self.find(name) is not None
+
+    def to_rules(self) -> list[Rule]:
+        """ The rule list for `lxslt.apply_templates`, indexed dispatch """
+        return self._dispatch_rules
+
+    def to_linear_rules(self) -> list[Rule]:
+        """ The same rules as plain `lxslt` rules, scanned in order """
+        return [rule.to_rule() for rule in self.rules]
+
+    def wrap(self, fn: typing.Callable[[IndexedRule], Transformer]
+             ) -> 'RuleIndex':
+        """ A new index with each transformer replaced by `fn(rule)` """
+        return RuleIndex(rule._replace(transformer=fn(rule))
+                         for rule in self.rules)
+
+
+class DispatchTransformer(Transformer):
+    def __init__(self, index: RuleIndex):
+        self.index = index
+
+    def transform(self, rules: list['Rule'], node: TreeNode) -> NodeSet:
+        rule = self.index.find(node[0])
+        return rule.transformer.transform(rules, node)
@@ -0,0 +1,233 @@
+from __future__ import annotations
+import collections
+import concurrent.futures
+import concurrent.futures.process
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+import typing
+
+from .camxes_to_xbar import camxes_to_xbar, camxes_to_tree, get_rule_index
+from .diagnostics import Diagnostics, collect_diagnostics, describe_error
+from .graphviz import graphviz_string
+from .lexp import lexp_to_tree
+from .memo import SubtreeMemo
+from .protocol import CONVERSIONS, QUERIES, recv_frame, send_frame
+from .text import camxes_text_to_xbar
+
+worker_memo: typing.Optional[SubtreeMemo] = None
+
+
+def shutdown_executor(pool: concurrent.futures.Executor,
+                      wait: bool = True) -> None:
+    """ Shut the pool down, the queued tasks are cancelled on Python 3.9+
+    """
+    if sys.version_info >= (3, 9):
+        pool.shutdown(wait=wait, cancel_futures=True)
+    else:
+        pool.shutdown(wait=wait)
+
+
+def init_worker(memo_size: typing.Optional[int] = None) -> None:
+    global worker_memo
+    get_rule_index()
+    worker_memo = SubtreeMemo(memo_size) if memo_size else None
+
+
+def convert(request: dict):
+    op = request['op']
+    if op == 'dot':
+        return graphviz_string(lexp_to_tree(request['xbar']))
+    options = {'collapse': bool(request.get('collapse')),
+               'memo': worker_memo}
+    if op == 'xbar':
+        return camxes_to_xbar(request['tree'], **options)
+    if op == 'text':
+        return camxes_text_to_xbar(request['tree'], **options)
+    return graphviz_string(camxes_to_tree(request['tree'], **options))
+
+
+def handle_request(request: dict) -> dict:
+    """ The response to a conversion request
+
+    The request is {"op": ..., "tree": camxes tree, "collapse": bool}
+    with the `op` "xbar", "text" or "xbar_dot", or {"op": "dot",
+    "xbar": l-expression}. The response is {"ok": true, "value": ...,
+    "diagnostics": [...]} or {"ok": false, "error": ...}.
+    """
+    diagnostics = Diagnostics()
+    try:
+        with collect_diagnostics(diagnostics):
+            value = convert(request)
+    except Exception as e:
+        return {'ok': False, 'error': describe_error(e)}
+    return {'ok': True, 'value': value,
+            'diagnostics': [str(diag) for diag in diagnostics.formatted()]}
+
+
+class ConversionHandler(socketserver.BaseRequestHandler):
+    """ Answer the requests of one connection until the client closes """
+
+    def handle(self) -> None:
+        while True:
+            try:
+                request = recv_frame(self.request)
+            except (ValueError, ConnectionError) as e:
+                self.server.count('bad_frame', error=True)
+                try:
+                    send_frame(self.request, {'ok': False,
+                                              'error': describe_error(e)})
+                except OSError:
+                    pass
+                return
+            if request is None:
+                return
+            try:
+                response = self.server.execute(request)
+            except Exception as e:
+                response = {'ok': False, 'error': describe_error(e)}
+            try:
+                self.send(response)
+            except OSError:
+                return  # the client is gone
+
+    def send(self, response: dict) -> None:
+        try:
+            send_frame(self.request, response)
+        except (ValueError, TypeError) as e:
+            # nothing is sent, the response is too large or not JSON
+            self.server.count('bad_response', error=True)
+            send_frame(self.request, {'ok': False,
+                                      'error': describe_error(e)})
+
+
+class ConversionServer(socketserver.ThreadingMixIn,
+                       socketserver.UnixStreamServer):
+    """ Keep the converter warm and serve it on a Unix socket
+
+    Each connection is served by a thread and can send any number of
+    requests, see `handle_request`. With `workers`, the conversions run
+    in a pool of that many processes, otherwise in the threads. A pool
+    with a dead process is replaced. With `memo_size`, each process
+    keeps a `SubtreeMemo` of that size.
+
+    The {"op": "health"} and {"op": "stats"} requests are answered by
+    the server itself.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: str, workers: int = 0,
+                 memo_size: typing.Optional[int] = None):
+        self.path = path
+        self.workers = workers
+        self.memo_size = memo_size
+        self.started = time.monotonic()
+        self.requests: collections.Counter = collections.Counter()
+        self.errors: collections.Counter = collections.Counter()
+        self.pool_restarts = 0
+        self._lock = threading.Lock()
+        self.pool: typing.Optional[concurrent.futures.Executor] = None
+        if workers > 0:
+            self.pool = self.start_pool()
+        else:
+            init_worker(memo_size)
+        remove_stale_socket(path)
+        try:
+            super().__init__(path, ConversionHandler)
+        except BaseException:
+            self.shutdown_pool()
+            raise
+
+    def start_pool(self) -> concurrent.futures.Executor:
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, initializer=init_worker,
+            initargs=(self.memo_size,))
+
+    def restart_pool(self, broken: concurrent.futures.Executor) -> None:
+        """ Replace the pool, unless another thread has done it """
+        with self._lock:
+            if self.pool is not broken:
+                return
+            self.pool = self.start_pool()
+            self.pool_restarts += 1
+        shutdown_executor(broken, wait=False)
+
+    def count(self, op: str, error: bool = False) -> None:
+        with self._lock:
+            self.requests[op] += 1
+            if error:
+                self.errors[op] += 1
+
+    def execute(self, request) -> dict:
+        op = request.get('op') if isinstance(request, dict) else None
+        if not isinstance(op, str):
+            op = None
+        if op in QUERIES:
+            self.count(op)
+            return {'ok': True, 'value': self.health() if op == 'health'
+                    else self.stats()}
+        if op not in CONVERSIONS:
+            self.count('unknown', error=True)
+            return {'ok': False, 'error': f'unknown request: {op!r}'}
+        pool = self.pool
+        if pool is None:
+            response = handle_request(request)
+        else:
+            try:
+                response = pool.submit(handle_request, request).result()
+            except concurrent.futures.process.BrokenProcessPool as e:
+                self.restart_pool(pool)
+                response = {'ok': False, 'error': describe_error(e)}
+            except Exception as e:
+                response = {'ok': False, 'error': describe_error(e)}
+        self.count(op, error=not response['ok'])
+        return response
+
+    def health(self) -> dict:
+        return {'status': 'ok', 'pid': os.getpid(),
+                'uptime': time.monotonic() - self.started}
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {'requests': dict(self.requests),
+                     'errors': dict(self.errors)}
+        stats.update(self.health(), workers=self.workers,
+                     pool_restarts=self.pool_restarts)
+        if self.pool is None and worker_memo is not None:
+            stats['memo'] = worker_memo.stats()
+        return stats
+
+    def shutdown_pool(self) -> None:
+        if self.pool is not None:
+            shutdown_executor(self.pool)
+            self.pool = None
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.shutdown_pool()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def remove_stale_socket(path: str) -> None:
+    """ Remove the socket file of a server which is gone
+
+    Raises OSError if a server answers on `path`.
+    """
+    if not os.path.exists(path):
+        return
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.unlink(path)
+        return
+    finally:
+        sock.close()
+    raise OSError(f'a server is already running on {path}')
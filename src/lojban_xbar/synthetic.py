@@ -0,0 +1,413 @@
+from __future__ import annotations
+import collections
+import random
+import typing
+
+from .lexp import copy_lexp
+
+#
+# Building blocks: camxes subtrees in the shape of the parser output
+#
+
+
+def word_clause(selmaho: str, word: str) -> list:
+    return [f'{selmaho}_clause', [[selmaho, word]]]
+
+
+def koha_sumti_6(word: str) -> list:
+    return ['sumti_6', word_clause('KOhA', word)]
+
+
+def la_sumti_6(name: str) -> list:
+    return ['sumti_6', word_clause('LA', 'la'),
+            [['CMEVLA_clause', [['CMEVLA', ['cmevla', name]]]]]]
+
+
+def le_sumti_6(le: str, selbri: list,
+               quantifier: typing.Optional[list] = None,
+               relative: typing.Optional[list] = None) -> list:
+    tail = ['sumti_tail_1']
+    if quantifier:
+        tail.append(quantifier)
+    tail.append(selbri)
+    if relative:
+        tail.append(relative)
+    return ['sumti_6', word_clause('LE', le), ['sumti_tail', tail], ['KU']]
+
+
+def quantifier(pa: str) -> list:
+    return ['quantifier', ['number', word_clause('PA', pa)], ['BOI']]
+
+
+def noi_relative(noi: str, subsentence: list) -> list:
+    return ['relative_clauses', ['relative_clause', [
+        'relative_clause_1', word_clause('NOI', noi),
+        ['subsentence', subsentence],
+        ['KUhO', word_clause('KUhO', "ku'o")]]]]
+
+
+def goi_relative(goi: str, sumti: list) -> list:
+    return ['relative_clauses', ['relative_clause', [
+        'relative_clause_1', word_clause('GOI', goi),
+        ['term', ['term_1', sumti]], ['GEhU']]]]
+
+
+def sumti_3(sumti_6: list, relative: typing.Optional[list] = None) -> list:
+    sumti_5 = ['sumti_5', sumti_6]
+    if relative:
+        sumti_5.append(relative)
+    return ['sumti_3', ['sumti_4', sumti_5]]
+
+
+def sumti(first: list, joined: typing.Sequence[tuple[str, list]] = ()
+          ) -> list:
+    """ The sumti from `sumti_3` nodes, `joined` are (JOI, sumti_3) """
+    sumti_2 = ['sumti_2', first]
+    if joined:
+        sumti_2.append([
+            [['joik_ek', ['joik_ek_1', ['joik', word_clause('JOI', joi)]]],
+             node] for joi, node in joined])
+    return ['sumti', ['sumti_1', sumti_2]]
+
+
+def term(sumti_: list, fa: typing.Optional[str] = None) -> list:
+    if fa is None:
+        return ['term', ['term_1', sumti_]]
+    return ['term', ['term_1', [word_clause('FA', fa)], sumti_]]
+
+
+def abs_term(sumti_: list, fa: typing.Optional[str] = None) -> list:
+    if fa is None:
+        return ['abs_term', ['abs_term_1', sumti_]]
+    return ['abs_term', ['abs_term_1', [
+        'abs_tag_term', [word_clause('FA', fa)], sumti_]]]
+
+
+def brivla_unit(word: str) -> list:
+    return ['tanru_unit_2',
+            ['BRIVLA_clause', [['BRIVLA', ['gismu', word]]]]]
+
+
+def se_unit(se: str, unit: list) -> list:
+    return ['tanru_unit_2', word_clause('SE', se), unit]
+
+
+def moi_unit(pa: str) -> list:
+    return ['tanru_unit_2', ['number', word_clause('PA', pa)],
+            word_clause('MOI', 'moi')]
+
+
+def nu_unit(subsentence: list) -> list:
+    return ['tanru_unit_2', word_clause('NU', 'nu'),
+            ['subsentence', subsentence],
+            ['KEI', word_clause('KEI', 'kei')]]
+
+
+def linkargs(first: list, more: typing.Sequence[list] = ()) -> list:
+    """ be `first` bei `more`... be'o, the arguments are terms """
+    node = ['linkargs_1', word_clause('BE', 'be'), first]
+    for term_ in more:
+        node.append(['links', ['links_1', word_clause('BEI', 'bei'),
+                               term_]])
+    node.append(['BEhO'])
+    return ['linkargs', node]
+
+
+def selbri_5(unit: list, links: typing.Optional[list] = None) -> list:
+    tanru_unit_1 = ['tanru_unit_1', unit]
+    if links:
+        tanru_unit_1.append(links)
+    return ['selbri_5', ['selbri_6', ['tanru_unit', tanru_unit_1]]]
+
+
+def selbri_4(first: list, joined: typing.Sequence[tuple[str, list]] = ()
+             ) -> list:
+    """ The tanru unit from `selbri_5`, `joined` are (JA, selbri_5) """
+    node = ['selbri_4', first]
+    if joined:
+        node.append([[['joik_jek', ['jek', word_clause('JA', ja)]], kid]
+                     for ja, kid in joined])
+    return node
+
+
+def pu_tag(pu: str) -> list:
+    return ['tag', ['tense_modal', ['simple_tense_modal', [
+        ['time', [['time_offset', word_clause('PU', pu)]]]]]]]
+
+
+def selbri(units: typing.Sequence[list], tag: typing.Optional[list] = None
+           ) -> list:
+    """ The selbri from the `selbri_4` nodes, a tanru if several """
+    selbri_1 = ['selbri_1', ['selbri_2', ['selbri_3', *units]]]
+    if tag:
+        return ['selbri', tag, selbri_1]
+    return ['selbri', selbri_1]
+
+
+def sentence(selbri_: list, head: typing.Sequence[list] = (),
+             tail: typing.Sequence[list] = ()) -> list:
+    """ [head... cu] selbri [tail...] vau, `head` are abs_term nodes """
+    tail_terms = ['tail_terms']
+    if tail:
+        tail_terms.append(['nonabs_terms', *(
+            ['nonabs_terms_1', ['nonabs_terms_2', term_]]
+            for term_ in tail)])
+    tail_terms.append(['VAU'])
+    bridi_tail = ['bridi_tail', ['bridi_tail_1', ['bridi_tail_2', [
+        'bridi_tail_3', selbri_, tail_terms]]]]
+    if not head:
+        return ['sentence', bridi_tail]
+    terms = ['terms', ['terms_1', ['terms_2', *head]]]
+    return ['sentence', [terms, ['CU']], bridi_tail]
+
+
+def statement(sentence_: list) -> list:
+    return ['statement', ['statement_1', ['statement_2', [
+        'statement_3', sentence_]]]]
+
+
+def text(sentence_: list, more: typing.Sequence[list] = ()) -> list:
+    """ The text of `sentence_`, and of `more` sentences after .i """
+    paragraph = ['paragraph', statement(sentence_)]
+    if more:
+        paragraph.append([[word_clause('I', 'i'), statement(sentence_)]
+                          for sentence_ in more])
+    return ['text', ['text_1', ['paragraphs', paragraph]]]
+
+
+#
+# Random sentences
+#
+
+GISMU = ('klama', 'prami', 'barda', 'cmalu', 'dunda', 'sutra', 'kumfa',
+         'prenu', 'melbi', 'nixli', 'ckule', 'darxi', 'dakfu', 'lidne',
+         'tcadu', 'kulnu', 'canja', 'jdini', 'midju', 'citka')
+KOhA = ('mi', 'do', 'ti', 'ta', "ko'a", "ko'e", "ma'a", "zo'e")
+CMEVLA = ('djan', 'alis', 'bob', 'meris')
+LE = ('le', 'lo')
+PA = ('pa', 're', 'ci', 'vo', 'mu')
+PU = ('pu', 'ca', 'ba')
+SE = ('se', 'te', 've', 'xe')
+NOI = ('poi', 'noi')
+JOI = ("ce'o", 'joi', 'ce')
+JA = ('je', 'ja')
+FA = ('fa', 'fe', 'fi', 'fo', 'fu')
+
+
+def has_node(tree: list, name: str) -> bool:
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node and isinstance(node[0], str):
+            if node[0] == name:
+                return True
+            stack.extend(kid for kid in node[1:] if isinstance(kid, list))
+        else:
+            stack.extend(kid for kid in node if isinstance(kid, list))
+    return False
+
+
+CONSTRUCTS = frozenset(('la', 'le', 'quantifier', 'fa', 'pu', 'se', 'be',
+                        'bei', 'noi', 'goi', 'joi', 'ja', 'nu', 'moi'))
+
+
+class CamxesGenerator:
+    """ Reproducible random camxes trees, to load and stress the converter
+
+    The `constructs` are combined at random with KOhA sumti and brivla,
+    by default all of `CONSTRUCTS`: LA and LE sumti with quantifiers,
+    FA, PU and SE tags, BE/BEI linkargs, NOI/GOI relative clauses,
+    JOI/JA conjunctions, nu abstractions and moi.
+
+    `max_sumti` and `max_tanru` bound the number of sumti of a sentence
+    and of the units of a tanru. `max_depth` bounds the nesting of the
+    sentences in nu, NOI and LE, and of the sumti in BE and GOI. Each
+    optional construct is used with the probability `rate`. The deeper
+    the nesting, the smaller the bounds and the rate of the nested
+    constructs, so the trees do not grow exponentially. With the
+    probability `repeat_rate`, a sumti repeats a sumti generated before,
+    and with `sentence_repeat_rate`, a whole sentence is repeated.
+    """
+
+    def __init__(self, seed: typing.Optional[int] = None,
+                 max_sumti: int = 4,
+                 max_tanru: int = 3,
+                 max_depth: int = 2,
+                 rate: float = 0.3,
+                 repeat_rate: float = 0.1,
+                 sentence_repeat_rate: float = 0.0,
+                 constructs: typing.Iterable[str] = CONSTRUCTS,
+                 pool_size: int = 256):
+        if max_sumti < 0 or max_tanru < 1 or max_depth < 0:
+            raise ValueError('expected max_sumti >= 0, max_tanru >= 1 and'
+                             f' max_depth >= 0, got: {max_sumti},'
+                             f' {max_tanru}, {max_depth}')
+        self.constructs = frozenset(constructs)
+        if not self.constructs <= CONSTRUCTS:
+            raise ValueError('unknown constructs:'
+                             f' {sorted(self.constructs - CONSTRUCTS)}')
+        self.random = random.Random(seed)
+        self.max_sumti = max_sumti
+        self.max_tanru = max_tanru
+        self.max_depth = max_depth
+        self.rate = rate
+        self.repeat_rate = repeat_rate
+        self.sentence_repeat_rate = sentence_repeat_rate
+        self._sumti_pool: collections.deque = collections.deque(
+            maxlen=pool_size)
+        self._text_pool: collections.deque = collections.deque(
+            maxlen=pool_size)
+
+    def __iter__(self) -> typing.Iterator[list]:
+        while True:
+            yield self.text()
+
+    def chance(self, rate: typing.Optional[float] = None) -> bool:
+        return self.random.random() < (self.rate if rate is None else rate)
+
+    def use(self, construct: str, depth: typing.Optional[int] = None
+            ) -> bool:
+        """ Tell if to use the construct, a nesting one if with `depth` """
+        if construct not in self.constructs:
+            return False
+        if depth is None:
+            return self.chance()
+        return depth < self.max_depth and self.chance(self.rate / (depth + 1))
+
+    @staticmethod
+    def bound(limit: int, depth: int) -> int:
+        return max(1, limit >> depth)
+
+    def choice(self, seq: typing.Sequence):
+        return self.random.choice(seq)
+
+    def repeated(self, pool: collections.deque, rate: float
+                 ) -> typing.Optional[list]:
+        if pool and rate and self.chance(rate):
+            return copy_lexp(self.choice(pool))
+        return None
+
+    def text(self) -> list:
+        tree = self.repeated(self._text_pool, self.sentence_repeat_rate)
+        if tree is None:
+            tree = text(self.sentence(0, with_sumti=True))
+            self._text_pool.append(tree)
+            tree = copy_lexp(tree)
+        return tree
+
+    def sentence(self, depth: int, with_sumti: bool = False) -> list:
+        n_sumti = self.random.randint(
+            1 if with_sumti else 0, self.bound(self.max_sumti, depth)) \
+            if self.max_sumti else 0
+        n_head = self.random.randint(0, min(1, n_sumti))
+        selbri_ = self.selbri(depth)
+        # the linkargs take the places before the tail sumti, and without
+        # a sumti before the selbri, the next place is x2
+        if has_node(selbri_, 'linkargs'):
+            places = [None] * n_sumti
+        else:
+            places = self.places(n_sumti, 0 if n_head else 1)
+        terms = [(self.sumti(depth), fa) for fa in places]
+        head = [abs_term(s, fa) for s, fa in terms[:n_head]]
+        tail = [term(s, fa) for s, fa in terms[n_head:]]
+        return sentence(selbri_, head, tail)
+
+    def places(self, n: int, pos: int = 0
+               ) -> list[typing.Optional[str]]:
+        """ FA tags for `n` sumti, such that no place is filled twice
+
+        The untagged sumti fill the places after the previous sumti,
+        skipping the filled ones, like in `SumtiAllocator`.
+        """
+        tags: list[typing.Optional[str]] = []
+        used = set()
+        for _ in range(n):
+            free = [p for p in range(len(FA)) if p not in used]
+            if free and self.use('fa'):
+                pos = self.choice(free)
+                tags.append(FA[pos])
+            else:
+                tags.append(None)
+            used.add(pos)
+            pos += 1
+            while pos in used:
+                pos += 1
+        return tags
+
+    def sumti(self, depth: int) -> list:
+        node = self.repeated(self._sumti_pool, self.repeat_rate)
+        if node is not None:
+            return node
+        first = self.sumti_3(depth)
+        joined = []
+        if self.use('joi'):
+            joined = [(self.choice(JOI), self.sumti_3(depth))
+                      for _ in range(self.random.randint(1, 2))]
+        node = sumti(first, joined)
+        self._sumti_pool.append(node)
+        return copy_lexp(node)
+
+    def sumti_3(self, depth: int) -> list:
+        if self.use('le', depth):
+            quantifier_ = quantifier(self.choice(PA)) \
+                if self.use('quantifier') else None
+            relative = noi_relative(self.choice(NOI),
+                                    self.sentence(depth + 1)) \
+                if self.use('noi', depth + 1) else None
+            return sumti_3(le_sumti_6(self.choice(LE),
+                                      self.selbri(depth + 1, plain=True),
+                                      quantifier_, relative))
+        if self.use('la'):
+            sumti_6 = la_sumti_6(self.choice(CMEVLA))
+        else:
+            sumti_6 = koha_sumti_6(self.choice(KOhA))
+        relative = goi_relative('goi', sumti(
+            sumti_3(koha_sumti_6(self.choice(KOhA))))) \
+            if self.use('goi', depth) else None
+        return sumti_3(sumti_6, relative)
+
+    def selbri(self, depth: int, plain: bool = False) -> list:
+        """ A selbri, one unit without PU, SE, BE and moi if `plain` """
+        n_units = 1 if plain else self.random.randint(
+            1, self.bound(self.max_tanru, depth))
+        units = [self.selbri_4(depth, plain) for _ in range(n_units)]
+        tag = pu_tag(self.choice(PU)) \
+            if not plain and self.use('pu') else None
+        return selbri(units, tag)
+
+    def selbri_4(self, depth: int, plain: bool = False) -> list:
+        # the converter joins only the brivla with JA
+        if self.use('ja'):
+            return selbri_4(
+                selbri_5(brivla_unit(self.choice(GISMU))),
+                [(self.choice(JA), selbri_5(brivla_unit(self.choice(GISMU))))
+                 for _ in range(self.random.randint(1, 2))])
+        return selbri_4(self.selbri_5(depth, plain))
+
+    def selbri_5(self, depth: int, plain: bool = False) -> list:
+        if self.use('nu', depth):
+            return selbri_5(nu_unit(self.sentence(depth + 1)))
+        if not plain and self.use('moi'):
+            return selbri_5(moi_unit(self.choice(PA)))
+        unit = brivla_unit(self.choice(GISMU))
+        if plain:
+            return selbri_5(unit)
+        if self.use('se'):
+            unit = se_unit(self.choice(SE), unit)
+        links = self.linkargs(depth) if self.use('be', depth) else None
+        return selbri_5(unit, links)
+
+    def linkargs(self, depth: int) -> list:
+        # the places of the linkargs are not tagged with FA
+        n_terms = self.random.randint(1, self.bound(3, depth)) \
+            if 'bei' in self.constructs else 1
+        terms = [term(self.sumti(depth + 1)) for _ in range(n_terms)]
+        return linkargs(terms[0], terms[1:])
+
+
+def generate(count: int, seed: typing.Optional[int] = None, **settings
+             ) -> typing.Iterator[list]:
+    """ `count` random camxes trees, see `CamxesGenerator` """
+    generator = CamxesGenerator(seed, **settings)
+    for _ in range(count):
+        yield generator.text()
@@ -0,0 +1,120 @@
+from __future__ import annotations
+import json
+import typing
+
+from lxslt import TreeNode
+
+from .batch import camxes_to_xbar_many
+from .camxes_to_xbar import camxes_to_xbar, camxes_to_tree, collapse_chains
+from .diagnostics import report
+from .memo import SubtreeMemo
+from .profiling import RuleProfiler
+
+# The camxes nodes between the text and its sentences. The other nodes
+# on the way, such as I_clause, NIhO_clause or the free modifiers, are
+# separators and are not converted.
+TEXT_NODES = frozenset((
+    'text', 'text_1', 'paragraphs', 'paragraph',
+    'statement', 'statement_1', 'statement_2', 'statement_3',
+))
+
+
+def iter_sentence_nodes(tree: TreeNode) -> typing.Iterator[TreeNode]:
+    """ The top-level `sentence` nodes of a camxes text, in text order
+
+    The sentences nested in abstractions and relative clauses are left
+    in place. The fragments, the statements without a selbri, are
+    reported and skipped.
+    """
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, list) or not node:
+            continue
+        name = node[0]
+        if not isinstance(name, str):
+            # a group of nodes
+            stack.extend(reversed(node))
+        elif name == 'sentence':
+            yield node
+        elif name in TEXT_NODES:
+            stack.extend(reversed(node[1:]))
+        elif name == 'fragment':
+            report('fragment', 'iter_sentence_nodes',
+                   'a fragment is not converted, got:', node)
+
+
+def camxes_text_to_xbar(tree: TreeNode,
+                        lazy: bool = False,
+                        workers: int = 0,
+                        chunksize: int = 4,
+                        collapse: bool = False,
+                        memo: typing.Optional[SubtreeMemo] = None,
+                        profiler: typing.Optional[RuleProfiler] = None
+                        ) -> typing.Union[list, typing.Iterator[list]]:
+    """ Convert a camxes text to the X-bar l-expressions of its sentences
+
+    Returns one I-MAX l-expression per sentence, see
+    `iter_sentence_nodes`, as a list, or as an iterator if `lazy` is
+    set. The options are as for `camxes_to_xbar`.
+
+    With `workers`, the sentences are converted in that many worker
+    processes, `chunksize` sentences per task, see
+    `camxes_to_xbar_many`. The diagnostics of the workers are reported
+    in the current process. A sentence which fails to convert raises
+    RuntimeError.
+    """
+    if workers and (memo is not None or profiler is not None):
+        raise ValueError('memo and profiler require the in-process'
+                         f' conversion, got workers: {workers}')
+    if workers:
+        sentences = iter_sentence_nodes(tree)
+        if collapse:
+            sentences = map(collapse_chains, sentences)
+        xbars = iter_converted(sentences, workers, chunksize)
+    else:
+        xbars = iter_camxes_to_xbar(tree, collapse=collapse, memo=memo,
+                                    profiler=profiler)
+    return xbars if lazy else list(xbars)
+
+
+def iter_camxes_to_xbar(tree_or_stream,
+                        typed: bool = False,
+                        collapse: bool = False,
+                        memo: typing.Optional[SubtreeMemo] = None,
+                        profiler: typing.Optional[RuleProfiler] = None
+                        ) -> typing.Iterator:
+    """ Yield the conversion of each sentence as soon as it is ready
+
+    The input is a camxes text, or an iterable of texts, such as a
+    generator or a file of JSON Lines, the string items are decoded as
+    JSON and the blank lines are skipped. The texts are read one at a
+    time and no result is kept, so the memory is bounded by the largest
+    text of the stream rather than by the whole stream.
+
+    Yields the X-bar l-expressions, or the `XMax` trees if `typed` is
+    set. The options are as for `camxes_to_xbar`.
+    """
+    convert = camxes_to_tree if typed else camxes_to_xbar
+    if isinstance(tree_or_stream, list) and tree_or_stream \
+            and isinstance(tree_or_stream[0], str):
+        tree_or_stream = (tree_or_stream,)
+    for tree in tree_or_stream:
+        if isinstance(tree, (str, bytes)):
+            if not tree.strip():
+                continue
+            tree = json.loads(tree)
+        for sentence in iter_sentence_nodes(tree):
+            yield convert(sentence, collapse=collapse, memo=memo,
+                          profiler=profiler)
+
+
+def iter_converted(sentences: typing.Iterable[TreeNode], workers: int,
+                   chunksize: int) -> typing.Iterator[list]:
+    for result in camxes_to_xbar_many(sentences, workers=workers,
+                                      chunksize=chunksize):
+        for diag in result.diagnostics:
+            report(diag.code, diag.location, *diag.args)
+        if result.error is not None:
+            raise RuntimeError(f'sentence {result.index}: {result.error}')
+        yield result.value
@@ -34,6 +34,8 @@ def tags_to_list(tags: typing.Optional[dict[str, str]]) -> list[list[str]]:
 
 
 class XHead:
+    __slots__ = ('type', 's', 'tags')
+
     def __init__(self,
                  type_: XType,
                  s: typing.Optional[str],
@@ -55,6 +57,8 @@ class XHead:
 
 
 class XBarBase:
+    __slots__ = ('type', 'head', 'compl')
+
     def __init__(self,
                  head: XHead,
                  compl: typing.Union['XMax', None] = None,
@@ -77,6 +81,8 @@ class XBarBase:
 
 
 class XBarFrame:
+    __slots__ = ('type', 'head', 'compl')
+
     def __init__(self,
                  head: XHead,
                  *compl: 'XMax'
@@ -98,6 +104,8 @@ class XBarFrame:
 
 
 class XBarRec:
+    __slots__ = ('bar', 'adj', 'type')
+
     def __init__(self, bar: 'XBar', adj: 'XMax'):
         self.bar = bar
         self.adj = adj
@@ -124,6 +132,8 @@ def isinstance_xbar(o: object) -> bool:
 
 
 class XSpecTag:
+    __slots__ = ('tags',)
+
     def __init__(self, tags: dict[str, str]):
         self.tags = tags
 
@@ -151,10 +161,29 @@ def isinstance_xspec(o: object) -> bool:
 
 
 class XMax:
+    """ A maximal projection: the specifier and the chain of bars
+
+    The accessors find the base bar and the adjuncts of the `XBarRec`
+    chain on the first use and cache them. Assigning `xbar` resets the
+    cache, if a bar of the chain is changed in place, call
+    `reset_cache`.
+    """
+    __slots__ = ('type', 'spec', '_xbar', '_bar', '_adj')
+
     def __init__(self, spec: typing.Union['XMax', XSpec, None], xbar: XBar):
+        self.type = xbar.type
         self.spec = spec
         self.xbar = xbar
-        self.type = xbar.type
+
+    @property
+    def xbar(self) -> XBar:
+        return self._xbar
+
+    @xbar.setter
+    def xbar(self, xbar: XBar) -> None:
+        # also for the frozen subclass, which forbids the assignment
+        object.__setattr__(self, '_xbar', xbar)
+        self.reset_cache()
 
     def __str__(self):
         head = self.to_head()
@@ -183,15 +212,31 @@ class XMax:
         return self.spec
 
     def to_bar(self) -> typing.Union[XBarBase, XBarFrame, None]:
-        bar = self.xbar
-        while isinstance(bar, XBarRec):
-            bar = bar.bar
-        return bar
+        if self._adj is None:
+            self._walk_bars()
+        return self._bar
 
     def to_adj(self) -> list['XMax']:
+        """ The adjuncts, the outermost first, in a new list """
+        return list(self.adjuncts)
+
+    @property
+    def adjuncts(self) -> tuple['XMax', ...]:
+        """ The adjuncts, the outermost first, the cached tuple """
+        if self._adj is None:
+            self._walk_bars()
+        return self._adj
+
+    def _walk_bars(self) -> None:
         adj = []
         bar = self.xbar
         while isinstance(bar, XBarRec):
             adj.append(bar.adj)
             bar = bar.bar
-        return adj
+        # also for the frozen subclass, which forbids the assignment
+        object.__setattr__(self, '_bar', bar)
+        object.__setattr__(self, '_adj', tuple(adj))
+
+    def reset_cache(self) -> None:
+        object.__setattr__(self, '_bar', None)
+        object.__setattr__(self, '_adj', None)
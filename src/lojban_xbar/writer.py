@@ -0,0 +1,137 @@
+from __future__ import annotations
+import io
+import json
+import typing
+from json.encoder import encode_basestring_ascii
+
+from .types import XType, XHead, XBarBase, XBarFrame, XBarRec, XSpecTag
+from .types import XMax
+
+# The opening of the list of each node kind: '["N-MAX", ' and so on
+MAX_OPEN = {type_: f'["{type_.name}-MAX", ' for type_ in XType}
+SPEC_OPEN = {type_: f'["{type_.name}-SPEC", ' for type_ in XType}
+BAR_OPEN = {type_: f'["{type_.name}-BAR", ' for type_ in XType}
+FRAME_OPEN = {type_: f'["{type_.name}-FRAME", ' for type_ in XType}
+HEAD_OPEN = {type_: f'["{type_.name}"' for type_ in XType}
+
+MAX_TAG_CACHE = 4096
+_tags_json: dict[tuple, str] = {}
+
+
+def encode_value(value: object) -> str:
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    return json.dumps(value)
+
+
+def tags_json(tags: typing.Optional[typing.Mapping[str, str]]) -> str:
+    """ The tags as in `tags_to_list`, encoded, each after ', '
+
+    The encoding is cached by the tags in their own order, so the tag
+    names are sorted once per distinct set of tags.
+    """
+    if not tags:
+        return ''
+    key = tuple(tags.items())
+    s = _tags_json.get(key)
+    if s is None:
+        parts = []
+        for name in sorted(tags):
+            value = tags[name]
+            parts.append(f', ["tag", {encode_value(name)}]' if name == value
+                         else f', ["tag", {encode_value(name)},'
+                              f' {encode_value(value)}]')
+        s = ''.join(parts)
+        if len(_tags_json) < MAX_TAG_CACHE:
+            _tags_json[key] = s
+    return s
+
+
+def head_json(head: XHead) -> str:
+    return f'{HEAD_OPEN[head.type]}{tags_json(head.tags)},' \
+           f' {encode_value(head.s)}]'
+
+
+def iter_lexp_json(node) -> typing.Iterator[str]:
+    """ The pieces of `json.dumps(node.to_lexp())`, in order
+
+    The tree is walked with an explicit stack, the intermediate
+    l-expression is not built.
+    """
+    stack = [node]
+    pop = stack.pop
+    push = stack.extend
+    while stack:
+        item = pop()
+        if isinstance(item, str):
+            yield item
+        elif isinstance(item, XHead):
+            yield head_json(item)
+        elif isinstance(item, XMax):
+            type_ = item.xbar.type
+            yield MAX_OPEN[type_]
+            push((']', item.xbar))
+            if item.spec:
+                push(('], ', item.spec, SPEC_OPEN[type_]))
+        elif isinstance(item, XBarRec):
+            yield BAR_OPEN[item.type]
+            push((']', item.adj, ', ', item.bar))
+        elif isinstance(item, XBarFrame):
+            yield FRAME_OPEN[item.type]
+            stack.append(']')
+            for kid in reversed(item.compl):
+                push((kid, ', '))
+            stack.append(item.head)
+        elif isinstance(item, XBarBase):
+            yield BAR_OPEN[item.type]
+            stack.append(']')
+            if item.compl:
+                push((item.compl, ', '))
+            stack.append(item.head)
+        elif isinstance(item, XSpecTag):
+            yield f'["X-SPEC"{tags_json(item.tags)}]'
+        else:
+            yield json.dumps(item.to_lexp() if hasattr(item, 'to_lexp')
+                             else item)
+
+
+def dumps_lexp(node) -> str:
+    """ Same as `json.dumps(node.to_lexp())` """
+    return ''.join(iter_lexp_json(node))
+
+
+def dump_lexp(node, stream: typing.Union[typing.TextIO, typing.BinaryIO],
+              buffer_size: int = 8192) -> None:
+    """ Write `json.dumps(node.to_lexp())` to a text or binary stream """
+    dump_lexp_lines((node,), stream, buffer_size, newline=False)
+
+
+def dump_lexp_lines(nodes: typing.Iterable,
+                    stream: typing.Union[typing.TextIO, typing.BinaryIO],
+                    buffer_size: int = 8192,
+                    newline: bool = True) -> None:
+    """ Write the nodes as JSON Lines, one l-expression per line
+
+    The output is written in pieces of about `buffer_size` characters,
+    so only a part of a large tree or of a batch is kept in memory.
+    The output is ASCII, as `json.dumps` writes it by default.
+    """
+    binary = isinstance(stream, (io.RawIOBase, io.BufferedIOBase))
+    write = stream.write
+    buffer: list[str] = []
+    size = 0
+    for node in nodes:
+        for piece in iter_lexp_json(node):
+            buffer.append(piece)
+            size += len(piece)
+            if size >= buffer_size:
+                s = ''.join(buffer)
+                write(s.encode('ascii') if binary else s)
+                buffer.clear()
+                size = 0
+        if newline:
+            buffer.append('\n')
+            size += 1
+    if buffer:
+        s = ''.join(buffer)
+        write(s.encode('ascii') if binary else s)
@@ -0,0 +1,48 @@
+import unittest
+from hamcrest import assert_that, equal_to, none, not_none, contains_string
+
+from util.fixture import load_camxes_parses
+
+from lojban_xbar import camxes_to_xbar, camxes_to_xbar_many
+
+
+class CamxesToXbarManyTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.trees = list(load_camxes_parses().values())
+        cls.expected = [camxes_to_xbar(tree) for tree in cls.trees]
+
+    def test_in_process(self):
+        results = list(camxes_to_xbar_many(self.trees, workers=0))
+
+        assert_that([r.index for r in results],
+                    equal_to(list(range(len(self.trees)))))
+        assert_that([r.value for r in results], equal_to(self.expected))
+
+    def test_pool_keeps_order(self):
+        results = list(camxes_to_xbar_many(
+            iter(self.trees), workers=2, chunksize=3))
+
+        assert_that([r.value for r in results], equal_to(self.expected))
+
+    def test_pool_unordered(self):
+        results = list(camxes_to_xbar_many(
+            self.trees, workers=2, chunksize=2, ordered=False))
+
+        results.sort(key=lambda r: r.index)
+        assert_that([r.value for r in results], equal_to(self.expected))
+
+    def test_failure_does_not_stop_batch(self):
+        trees = [self.trees[0], ['KU'], self.trees[1]]
+
+        results = list(camxes_to_xbar_many(trees, workers=2, chunksize=1))
+
+        assert_that(results[0].value, equal_to(self.expected[0]))
+        assert_that(results[1].value, none())
+        assert_that(results[1].error, not_none())
+        assert_that(results[1].error, contains_string('AssertionError'))
+        assert_that(results[2].value, equal_to(self.expected[1]))
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -4,6 +4,10 @@ from hamcrest import assert_that, equal_to
 from util.fixture import load_camxes_parses, load_lcs
 
 from lojban_xbar.camxes_to_xbar import camxes_to_xbar, SumtiAllocator
+from lojban_xbar.camxes_to_xbar import collapse_chains, camxes_to_tree
+from lojban_xbar.camxes_to_xbar import collect_sentence_anchors
+from lojban_xbar import lexp_to_tree
+from lojban_xbar import synthetic
 
 
 def wrap_i_max(v_max):
@@ -469,6 +473,89 @@ class CamxesToLcsExamplesTest(unittest.TestCase):
     def test_stab_dar(self):
         self.do_lcs_test('stab_dar')
 
+    def test_typed_tree(self):
+        tree = camxes_to_tree(self.trees['stab_dar'])
+
+        expected = lexp_to_tree(self.lcs['stab_dar'])
+        assert_that(tree.to_lexp(), equal_to(expected.to_lexp()))
+
+
+class CollapseChainsTest(unittest.TestCase):
+    @staticmethod
+    def test_fold_wrappers():
+        tree = ['sumti', ['sumti_1', ['sumti_2', ['sumti_3', ['sumti_4',
+                ['sumti_5', ['sumti_6', ['KOhA_clause', [['KOhA', 'mi']]]]]
+                ]]]]]
+
+        collapsed = collapse_chains(tree)
+
+        assert_that(collapsed, equal_to(
+            ['sumti', ['sumti_2', ['sumti_5', ['sumti_6',
+             ['KOhA_clause', [['KOhA', 'mi']]]]]]]))
+        assert_that(tree[1][0], equal_to('sumti_1'))
+
+    @staticmethod
+    def test_keep_wrapper_with_several_kids():
+        tree = ['tanru_unit', ['tanru_unit_2', ['x']], ['tanru_unit_2', ['y']]]
+
+        collapsed = collapse_chains(tree)
+
+        assert_that(collapsed, equal_to(tree))
+
+    @staticmethod
+    def test_in_place():
+        tree = ['text', ['text_1', ['paragraphs', ['fragment']]]]
+
+        collapsed = collapse_chains(tree, in_place=True)
+
+        assert_that(collapsed, equal_to(['text', ['fragment']]))
+        assert_that(tree, equal_to(['text', ['fragment']]))
+
+    def test_same_conversion(self):
+        for code_name, tree in load_camxes_parses().items():
+            with self.subTest(code_name):
+                expected = camxes_to_xbar(tree)
+
+                assert_that(camxes_to_xbar(tree, collapse=True),
+                            equal_to(expected))
+
+
+class SentenceAnchorsTest(unittest.TestCase):
+    @staticmethod
+    def sumti(word):
+        return synthetic.sumti(synthetic.sumti_3(
+            synthetic.koha_sumti_6(word)))
+
+    @staticmethod
+    def unit(node):
+        return synthetic.selbri_4(synthetic.selbri_5(node))
+
+    def test_nested_sentence_not_entered(self):
+        # mi pu nu do prami ko'a kei klama ti ta
+        nested = synthetic.sentence(
+            synthetic.selbri([self.unit(synthetic.brivla_unit('prami'))]),
+            [synthetic.abs_term(self.sumti('do'))],
+            [synthetic.term(self.sumti("ko'a"))])
+        sentence = synthetic.sentence(
+            synthetic.selbri([self.unit(synthetic.nu_unit(nested)),
+                              self.unit(synthetic.brivla_unit('klama'))],
+                             synthetic.pu_tag('pu')),
+            [synthetic.abs_term(self.sumti('mi'))],
+            [synthetic.term(self.sumti('ti')),
+             synthetic.term(self.sumti('ta'), 'fi')])
+
+        anchors = collect_sentence_anchors(sentence)
+
+        assert_that([node[0] for node in anchors.i_head],
+                    equal_to(['tag']))
+        assert_that([node[0] for node in anchors.selbri],
+                    equal_to(['selbri_1']))
+        assert_that(anchors.before_selbri, equal_to(
+            [synthetic.abs_term(self.sumti('mi'))]))
+        assert_that(anchors.after_selbri, equal_to(
+            [synthetic.term(self.sumti('ti'))[1],
+             synthetic.term(self.sumti('ta'), 'fi')[1]]))
+
 
 if '__main__' == __name__:
     unittest.main()
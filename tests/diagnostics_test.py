@@ -0,0 +1,93 @@
+import contextlib
+import io
+import unittest
+from hamcrest import assert_that, equal_to, contains_string
+
+from lojban_xbar import camxes_to_xbar, camxes_to_xbar_many, lexp_to_tree
+from lojban_xbar import Diagnostics, collect_diagnostics
+from lojban_xbar.diagnostics import Diagnostic, Lazy, report
+
+
+class DiagnosticsTest(unittest.TestCase):
+    # three sumti where at most two are expected
+    bad_sumti = ['text', ['sumti_6',
+                          ['KOhA_clause', [['KOhA', 'mi']]],
+                          ['KOhA_clause', [['KOhA', 'do']]],
+                          ['KOhA_clause', [['KOhA', 'ko']]]]]
+    bad_max = ['N-MAX', ['N', 'a'], ['N', 'b'], ['N', 'c']]
+
+    def test_collect_instead_of_print(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            with collect_diagnostics() as diagnostics:
+                lexp_to_tree(self.bad_max)
+
+        assert_that(stderr.getvalue(), equal_to(''))
+        assert_that(dict(diagnostics.counts), equal_to({'max-kids': 1}))
+        assert_that(str(diagnostics.events[0]), equal_to(
+            "load_max: expected one or two kids, got:"
+            " ['N-HEAD<a>', 'N-HEAD<b>', 'N-HEAD<c>']"))
+
+    def test_pass_to_conversion(self):
+        diagnostics = Diagnostics()
+
+        camxes_to_xbar(self.bad_sumti, diagnostics=diagnostics)
+
+        assert_that(diagnostics.counts['sumti-kids'], equal_to(1))
+        assert_that(diagnostics.events[0].location,
+                    equal_to('TransformSumti'))
+
+    def test_default_is_stderr(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            lexp_to_tree(self.bad_max)
+
+        assert_that(stderr.getvalue(),
+                    contains_string('load_max: expected one or two kids'))
+
+    def test_limits(self):
+        diagnostics = Diagnostics(max_events=3, max_per_code=2)
+        with collect_diagnostics(diagnostics):
+            for _ in range(3):
+                report('a', 'test')
+            report('b', 'test')
+            report('c', 'test')
+
+        assert_that([diag.code for diag in diagnostics],
+                    equal_to(['a', 'a', 'b']))
+        assert_that(dict(diagnostics.counts),
+                    equal_to({'a': 3, 'b': 1, 'c': 1}))
+        assert_that(diagnostics.dropped, equal_to(2))
+        assert_that(diagnostics.formatted()[-1].code, equal_to('dropped'))
+
+    def test_lazy_payload(self):
+        calls = []
+
+        def expensive():
+            calls.append(1)
+            return 'payload'
+
+        diagnostics = Diagnostics(max_per_code=1)
+        with collect_diagnostics(diagnostics):
+            report('a', 'test', 'got:', Lazy(expensive))
+            report('a', 'test', 'got:', Lazy(expensive))
+
+        assert_that(len(calls), equal_to(0))
+        assert_that(diagnostics.formatted(), equal_to((
+            Diagnostic('a', 'test', ('got: payload',)),
+            Diagnostic('dropped', 'Diagnostics',
+                       ('1 more diagnostics are not kept',)))))
+        assert_that(len(calls), equal_to(1))
+
+    def test_batch(self):
+        results = list(camxes_to_xbar_many(
+            [self.bad_sumti, ['sumti_6', ['KOhA_clause', [['KOhA', 'mi']]]]],
+            workers=0))
+
+        assert_that([diag.code for diag in results[0].diagnostics],
+                    equal_to(['sumti-kids', 'not-d-bar']))
+        assert_that(results[1].diagnostics, equal_to(()))
+
+
+if '__main__' == __name__:
+    unittest.main()
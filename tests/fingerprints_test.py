@@ -0,0 +1,64 @@
+import unittest
+from hamcrest import assert_that, equal_to, is_not
+
+from util.fixture import load_camxes_parses
+
+from lojban_xbar.fingerprints import fingerprint, Fingerprints, DIGEST_SIZE
+
+
+class FingerprintTest(unittest.TestCase):
+
+    @staticmethod
+    def test_stable_value():
+        fp = fingerprint(['N', ['tag', 'pron'], 'mi'])
+
+        assert_that(len(fp), equal_to(DIGEST_SIZE))
+        assert_that(fp.hex(), equal_to('f305b2d445acbe49595de6789c83a07c'))
+
+    @staticmethod
+    def test_equal_trees():
+        assert_that(fingerprint(['a', ['b', 'c']]),
+                    equal_to(fingerprint(['a', ['b', 'c']])))
+
+    @staticmethod
+    def test_structure_matters():
+        variants = [['ab'], ['a', 'b'], [['a'], 'b'], ['a', ['b']],
+                    [['a', 'b']], 'ab', ['a', 1], ['a', '1'], ['a', None]]
+
+        fps = set(map(fingerprint, variants))
+
+        assert_that(len(fps), equal_to(len(variants)))
+
+    @staticmethod
+    def test_deep_tree():
+        tree = ['leaf']
+        for _ in range(50000):
+            tree = ['node', tree]
+
+        assert_that(fingerprint(tree),
+                    is_not(equal_to(fingerprint(['node', tree]))))
+
+    @staticmethod
+    def test_memo_gives_same_fingerprints():
+        memo = Fingerprints()
+        for tree in load_camxes_parses().values():
+            expected = fingerprint(tree)
+
+            assert_that(fingerprint(tree, memo), equal_to(expected))
+            assert_that(fingerprint(tree, memo), equal_to(expected))
+
+    @staticmethod
+    def test_memo_reuse_subtrees():
+        memo = Fingerprints()
+        shared = ['sumti_6', ['KOhA_clause', [['KOhA', 'mi']]]]
+        fingerprint(['a', shared], memo)
+        seen = len(memo)
+
+        fp = fingerprint(['b', shared], memo)
+
+        assert_that(len(memo), equal_to(seen + 1))
+        assert_that(fp, equal_to(fingerprint(['b', shared])))
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,123 @@
+import copy
+import io
+import unittest
+from hamcrest import assert_that, equal_to, contains_string, starts_with
+
+from util.fixture import load_camxes_parses
+
+from lojban_xbar import camxes_to_xbar, lexp_to_tree
+from lojban_xbar.graphviz import to_graphviz, graphviz_string, render_many
+from lojban_xbar.graphviz import quote_id, render_lexp, RenderCache
+
+
+class RenderManyTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lexps = [camxes_to_xbar(tree)
+                     for tree in load_camxes_parses().values()]
+        cls.records = [(le, f'tree {i}') for i, le in enumerate(cls.lexps)]
+
+    def test_graph_name(self):
+        h = io.StringIO()
+        to_graphviz(h, lexp_to_tree(self.lexps[0]))
+
+        assert_that(h.getvalue().splitlines()[0], equal_to('digraph D {'))
+        assert_that(graphviz_string(lexp_to_tree(self.lexps[0]), 's 1')
+                    .splitlines()[0], equal_to('digraph "s 1" {'))
+
+    def test_quote_id(self):
+        assert_that(quote_id('D_1'), equal_to('D_1'))
+        assert_that(quote_id('1'), equal_to('"1"'))
+        assert_that(quote_id('a "b" \\'), equal_to('"a \\"b\\" \\\\"'))
+
+    def test_in_order(self):
+        for workers in (0, 2):
+            with self.subTest(workers=workers):
+                dots = [dot for dot, error in render_many(
+                    iter(self.records), workers=workers, chunksize=3)]
+
+                assert_that([dot.splitlines()[0] for dot in dots],
+                            equal_to([f'digraph "{name}" {{'
+                                      for _, name in self.records]))
+                assert_that([len(dot.splitlines()) for dot in dots],
+                            equal_to([len(graphviz_string(lexp_to_tree(le))
+                                          .splitlines())
+                                      for le in self.lexps]))
+
+    def test_bad_record_does_not_stop_batch(self):
+        records = [self.records[0], (['N-MAX'], 'bad'), self.records[1]]
+
+        results = list(render_many(records, workers=2, chunksize=1))
+
+        assert_that([error for _, error in results],
+                    equal_to([None, None, None]))
+        assert_that(results[1][0], contains_string('digraph bad {'))
+        assert_that(results[2][0].splitlines()[0],
+                    equal_to('digraph "tree 1" {'))
+
+
+class NodeIdTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lexps = [camxes_to_xbar(tree)
+                     for tree in load_camxes_parses().values()]
+
+    def test_path_ids(self):
+        dot = graphviz_string(lexp_to_tree(self.lexps[0]))
+
+        assert_that(dot.splitlines()[1], starts_with('n [label='))
+        assert_that(dot, contains_string('  n -> n_1\n'))
+
+    def test_same_in_each_run(self):
+        dots = [graphviz_string(lexp_to_tree(le)) for le in self.lexps]
+
+        assert_that([graphviz_string(lexp_to_tree(le)) for le in self.lexps],
+                    equal_to(dots))
+
+    def test_ids_are_unique(self):
+        for le in self.lexps:
+            lines = graphviz_string(lexp_to_tree(le)).splitlines()
+            ids = [line.split()[0] for line in lines if '[label=' in line]
+
+            assert_that(len(set(ids)), equal_to(len(ids)))
+
+
+class RenderCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lexps = [camxes_to_xbar(tree)
+                     for tree in load_camxes_parses().values()]
+        cls.dots = [graphviz_string(lexp_to_tree(le)) for le in cls.lexps]
+
+    def test_lexp_cache(self):
+        cache = RenderCache()
+        for lexps in (self.lexps, copy.deepcopy(self.lexps)):
+            dots = [render_lexp(le, 'D', cache)[0] for le in lexps]
+
+            assert_that(dots, equal_to(self.dots))
+        assert_that(cache.stats()['hits'], equal_to(len(self.lexps)))
+        assert_that(render_lexp(self.lexps[0], 'x 1', cache)[0],
+                    equal_to(graphviz_string(lexp_to_tree(self.lexps[0]),
+                                             'x 1')))
+
+    def test_lru(self):
+        cache = RenderCache(2)
+        for le in self.lexps[:3]:
+            render_lexp(le, 'D', cache)
+
+        assert_that(len(cache), equal_to(2))
+        render_lexp(self.lexps[0], 'D', cache)
+        assert_that(cache.hits, equal_to(0))
+
+    def test_render_many(self):
+        records = [(le, 'D') for le in self.lexps] * 2
+        for workers in (0, 2):
+            with self.subTest(workers=workers):
+                dots = [dot for dot, _ in render_many(
+                    records, workers=workers, chunksize=3, cache_size=16)]
+
+                assert_that(dots, equal_to(self.dots * 2))
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,85 @@
+import operator
+import pickle
+import typing
+import unittest
+from hamcrest import assert_that, equal_to, is_, is_not, calling, raises
+from hamcrest import instance_of
+
+from lojban_xbar import lexp_to_tree, XMax, XType
+from lojban_xbar.interning import NodeInterner, FrozenXHead, FrozenXMax
+
+
+def mi():
+    return ['N-MAX', ['N-BAR', ['N', ['tag', 'pron'], 'mi']]]
+
+
+def klama(*sumti):
+    return ['V-MAX', ['V-FRAME', ['V', 'klama'], *sumti]]
+
+
+class FrozenNodeTest(unittest.TestCase):
+
+    @staticmethod
+    def test_structural_equality():
+        a = FrozenXHead(XType.N, 'mi', {'pron': 'pron'})
+        b = FrozenXHead(XType.N, 'mi', {'pron': 'pron'})
+
+        assert_that(a, equal_to(b))
+        assert_that(hash(a), equal_to(hash(b)))
+        assert_that(a, is_not(equal_to(FrozenXHead(XType.N, 'do'))))
+
+    @staticmethod
+    def test_immutable():
+        head = FrozenXHead(XType.N, 'mi', {'pron': 'pron'})
+
+        assert_that(calling(setattr).with_args(head, 's', 'do'),
+                    raises(AttributeError))
+        assert_that(calling(operator.setitem).with_args(head.tags, 'a', 'b'),
+                    raises(TypeError))
+
+    @staticmethod
+    def test_pickle():
+        tree = NodeInterner().intern(lexp_to_tree(klama(mi(), mi())))
+
+        back = pickle.loads(pickle.dumps(tree))
+
+        assert_that(back, equal_to(tree))
+        assert_that(back.to_lexp(), equal_to(tree.to_lexp()))
+
+
+class NodeInternerTest(unittest.TestCase):
+
+    @staticmethod
+    def test_same_lexp():
+        le = klama(mi(), ['N-MAX', ['N-BAR', ['N', 'do']]])
+
+        tree = NodeInterner().intern(lexp_to_tree(le))
+
+        assert_that(typing.cast(object, tree), instance_of(FrozenXMax))
+        assert_that(typing.cast(object, tree), instance_of(XMax))
+        assert_that(tree.to_lexp(), equal_to(le))
+
+    @staticmethod
+    def test_store_identical_subtrees_once():
+        interner = NodeInterner()
+
+        tree1 = interner.intern(lexp_to_tree(klama(mi())))
+        tree2 = interner.intern(lexp_to_tree(klama(mi(), mi())))
+
+        mi1 = tree1.to_bar().compl[0]
+        assert_that(mi1, is_(tree2.to_bar().compl[0]))
+        assert_that(mi1, is_(tree2.to_bar().compl[1]))
+        assert_that(tree1.to_head(), is_(tree2.to_head()))
+        assert_that(interner.intern(lexp_to_tree(klama(mi()))), is_(tree1))
+
+    @staticmethod
+    def test_set_of_subtrees():
+        interner = NodeInterner()
+        trees = [lexp_to_tree(klama(mi())) for _ in range(3)]
+
+        assert_that(len({interner.intern(tree) for tree in trees}),
+                    equal_to(1))
+
+
+if '__main__' == __name__:
+    unittest.main()
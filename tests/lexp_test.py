@@ -1,9 +1,16 @@
+import sys
 import typing
 import unittest
 from hamcrest import assert_that, equal_to, instance_of, none, not_none
+from hamcrest import same_instance
 
 from lojban_xbar import lexp_to_tree, XHead, XType, XMax, XBarBase, XSpecTag
-from lojban_xbar import XBarFrame
+from lojban_xbar import XBarFrame, XBarRec
+from lojban_xbar import is_max_node, is_bar_node, is_spec_node, is_head_node
+from lojban_xbar.lexp import lexp_to_tree_recursive, name_kind, NodeKind
+from lojban_xbar.lexp import max_node_name, bar_node_name, copy_lexp
+
+from util.fixture import load_lcs
 
 
 class LoadLexpTest(unittest.TestCase):
@@ -90,6 +97,14 @@ class LoadLexpTest(unittest.TestCase):
 
 class ToLexpTest(unittest.TestCase):
 
+    def test_type_is_assignable(self):
+        for node in (lexp_to_tree(self.n_max),
+                     lexp_to_tree(['N-BAR', ['N', 'n']]),
+                     lexp_to_tree(['V-FRAME', self.v_head, self.n_max])):
+            node.type = XType.A
+
+            assert_that(node.to_lexp()[0][:2], equal_to('A-'))
+
     @staticmethod
     def test_head():
         lexp = ['N', ['tag', 'a-tag'], ['tag', 'b-tag', 'val'], 'n']
@@ -152,5 +167,118 @@ class ToLexpTest(unittest.TestCase):
         assert_that(back, equal_to(lexp))
 
 
+class DeepLexpTest(unittest.TestCase):
+
+    @staticmethod
+    def test_deeper_than_recursion_limit():
+        depth = 5000
+        bar = ['N-BAR', ['N', 'n0']]
+        for i in range(depth):
+            bar = ['N-BAR', bar, ['N-MAX', ['N-BAR', ['N', f'n{i + 1}']]]]
+
+        tree: XMax = lexp_to_tree(['N-MAX', bar])
+
+        assert_that(tree.to_head().s, equal_to('n0'))
+        xbar = tree.xbar
+        assert_that(typing.cast(object, xbar), instance_of(XBarRec))
+        assert_that(xbar.adj.to_head().s, equal_to(f'n{depth}'))
+
+    @staticmethod
+    def test_same_as_recursive():
+        for le in load_lcs().values():
+            tree = lexp_to_tree(le)
+            tree_rec = lexp_to_tree_recursive(le)
+
+            assert_that(tree.to_lexp(), equal_to(tree_rec.to_lexp()))
+
+    def test_copy_deeper_than_recursion_limit(self):
+        le = ['N', 'n']
+        for i in range(sys.getrecursionlimit() * 2):
+            le = ['N-BAR', le, 'x']
+
+        copy = copy_lexp(le)
+
+        node, node_copy = le, copy
+        while node[0] == 'N-BAR':
+            assert_that(node_copy is not node and node_copy[0] == 'N-BAR'
+                        and node_copy[2] == 'x', equal_to(True))
+            node, node_copy = node[1], node_copy[1]
+        assert_that(node_copy, equal_to(['N', 'n']))
+        copy[1][1][2] = 'y'
+        assert_that(le[1][1][2], equal_to('x'))
+
+
+class XMaxAccessorsTest(unittest.TestCase):
+    @staticmethod
+    def adjunct(name):
+        return ['N-MAX', ['N-BAR', ['N', name]]]
+
+    def test_adjunct_chain(self):
+        tree: XMax = lexp_to_tree(
+            ['N-MAX', ['N-BAR', ['N-BAR', ['N-BAR', ['N', 'base']],
+                                 self.adjunct('inner')],
+                       self.adjunct('outer')]])
+
+        assert_that([adj.to_head().s for adj in tree.to_adj()],
+                    equal_to(['outer', 'inner']))
+        assert_that(tree.to_bar(), same_instance(tree.xbar.bar.bar))
+        assert_that(tree.to_head().s, equal_to('base'))
+        assert_that(tree.to_adj(), instance_of(list))
+        tree.to_adj().clear()
+        assert_that(len(tree.to_adj()), equal_to(2))
+        assert_that(tree.adjuncts, equal_to(tuple(tree.to_adj())))
+        assert_that(tree.adjuncts, same_instance(tree.adjuncts))
+
+    def test_assign_xbar(self):
+        tree: XMax = lexp_to_tree(['N-MAX', ['N-BAR', ['N', 'old']]])
+        assert_that(tree.to_head().s, equal_to('old'))
+
+        tree.xbar = XBarRec(XBarBase(XHead(XType.N, 'new')),
+                            lexp_to_tree(self.adjunct('adj')))
+
+        assert_that(tree.to_head().s, equal_to('new'))
+        assert_that(len(tree.to_adj()), equal_to(1))
+        assert_that(len(tree.adjuncts), equal_to(1))
+
+    def test_reset_cache(self):
+        tree: XMax = lexp_to_tree(
+            ['N-MAX', ['N-BAR', ['N-BAR', ['N', 'old']],
+                       self.adjunct('adj')]])
+        assert_that(tree.to_head().s, equal_to('old'))
+
+        tree.xbar.bar = XBarBase(XHead(XType.N, 'new'))
+        tree.reset_cache()
+
+        assert_that(tree.to_head().s, equal_to('new'))
+
+
+class NodeKindTest(unittest.TestCase):
+    @staticmethod
+    def test_predicates():
+        assert_that([is_max_node([name]) for name in
+                     ('N-MAX', 'Q-MAX', 'N-BAR', 'N', 'tag', '')],
+                    equal_to([True, True, False, False, False, False]))
+        assert_that([is_bar_node([name]) for name in
+                     ('I-BAR', 'V-FRAME', 'N-BAR-REC', 'N-MAX')],
+                    equal_to([True, True, True, False]))
+        assert_that([is_spec_node([name]) for name in ('X-SPEC', 'N')],
+                    equal_to([True, False]))
+        assert_that([is_head_node(node) for node in
+                     (['N', 'mi'], ['Q'], ['NN'], 'N', [])],
+                    equal_to([True, True, False, False, False]))
+
+    @staticmethod
+    def test_name_kind():
+        assert_that(name_kind('V-FRAME'),
+                    equal_to((NodeKind.FRAME, XType.V)))
+        assert_that(name_kind('Q'), equal_to((NodeKind.HEAD, None)))
+        assert_that(name_kind('sumti'), equal_to((None, None)))
+
+    @staticmethod
+    def test_interned_names():
+        assert_that(max_node_name('N'), same_instance(sys.intern('N-MAX')))
+        assert_that(bar_node_name('Q'), equal_to('Q-BAR'))
+
+
 if '__main__' == __name__:
     unittest.main()
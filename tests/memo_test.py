@@ -0,0 +1,89 @@
+import unittest
+from hamcrest import assert_that, equal_to
+
+from util.fixture import load_camxes_parses
+
+from lojban_xbar import camxes_to_xbar, collect_diagnostics
+from lojban_xbar.lexp import copy_lexp
+from lojban_xbar.memo import SubtreeMemo
+
+
+def replace_first(tree: list, name: str, *kids) -> None:
+    """ Replace the kids of the first node named `name` """
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node and node[0] == name:
+            node[1:] = kids
+            return
+        stack.extend(reversed([kid for kid in node
+                               if isinstance(kid, list)]))
+
+
+class SubtreeMemoTest(unittest.TestCase):
+    mi = ['sumti_6', ['KOhA_clause', [['KOhA', 'mi']]]]
+    do = ['sumti_6', ['KOhA_clause', [['KOhA', 'do']]]]
+
+    def test_hit_and_miss(self):
+        memo = SubtreeMemo()
+
+        first = camxes_to_xbar(self.mi, memo=memo)
+        second = camxes_to_xbar(self.mi, memo=memo)
+
+        assert_that(second, equal_to(first))
+        assert_that(memo.stats(), equal_to(
+            {'hits': 1, 'misses': 1, 'size': 1, 'maxsize': 4096}))
+
+    def test_defensive_copy(self):
+        memo = SubtreeMemo()
+        first = camxes_to_xbar(self.mi, memo=memo)
+
+        first[1][1].append('corrupted')
+        second = camxes_to_xbar(self.mi, memo=memo)
+        second[1].append('corrupted')
+
+        assert_that(camxes_to_xbar(self.mi, memo=memo),
+                    equal_to(camxes_to_xbar(self.mi)))
+
+    def test_lru_eviction(self):
+        memo = SubtreeMemo(maxsize=1)
+
+        camxes_to_xbar(self.mi, memo=memo)
+        camxes_to_xbar(self.do, memo=memo)
+        camxes_to_xbar(self.mi, memo=memo)
+
+        assert_that((memo.hits, memo.misses, len(memo)), equal_to((0, 3, 1)))
+
+    def test_same_conversion(self):
+        memo = SubtreeMemo(maxsize=16)
+        trees = load_camxes_parses()
+        for _ in range(2):
+            for code_name, tree in trees.items():
+                with self.subTest(code_name):
+                    expected = camxes_to_xbar(tree)
+
+                    assert_that(camxes_to_xbar(tree, memo=memo),
+                                equal_to(expected))
+        assert_that(memo.hits > 0, equal_to(True))
+
+    def test_diagnostics_on_hit(self):
+        tree = copy_lexp(next(iter(load_camxes_parses().values())))
+        replace_first(tree, 'sumti_6', ['relative_clause', ['x']])
+        with collect_diagnostics() as expected:
+            camxes_to_xbar(tree)
+        memo = SubtreeMemo()
+
+        runs = []
+        for _ in range(2):
+            with collect_diagnostics() as diagnostics:
+                camxes_to_xbar(tree, memo=memo)
+            runs.append([str(diag) for diag in diagnostics])
+
+        assert_that(memo.hits > 0, equal_to(True))
+        assert_that(runs, equal_to([[str(diag) for diag in expected]] * 2))
+        assert_that([diag.code for diag in expected],
+                    equal_to(['relative-kids', 'not-max-or-bar']))
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+import types
+import unittest
+from hamcrest import assert_that, equal_to, instance_of
+
+import lojban_xbar
+
+
+def run_python(code: str) -> str:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    return subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+class LazyImportTest(unittest.TestCase):
+    def test_all_names(self):
+        for name in lojban_xbar.__all__:
+            with self.subTest(name):
+                value = getattr(lojban_xbar, name)
+
+                assert_that(isinstance(value, types.ModuleType),
+                            equal_to(False))
+        assert_that(set(dir(lojban_xbar)) >= set(lojban_xbar.__all__),
+                    equal_to(True))
+
+    def test_rendering_does_not_import_lxslt(self):
+        out = run_python(
+            'import sys\n'
+            'from lojban_xbar import lexp_to_tree\n'
+            'from lojban_xbar.graphviz import to_graphviz\n'
+            'from lojban_xbar.client import ConversionClient\n'
+            'import lojban_xbar.synthetic\n'
+            'print("lxslt" in sys.modules)\n')
+
+        assert_that(out, equal_to('False'))
+
+    def test_submodule_is_module(self):
+        out = run_python(
+            'import lojban_xbar.fingerprints as fp\n'
+            'import lojban_xbar\n'
+            'print(fp.__name__, lojban_xbar.fingerprint.__module__)\n')
+
+        assert_that(out, equal_to('lojban_xbar.fingerprints'
+                                  ' lojban_xbar.fingerprints'))
+
+    def test_function_not_hidden_by_module(self):
+        for imports in ('from lojban_xbar import camxes_to_xbar_many',
+                        'import lojban_xbar.batch',
+                        'from lojban_xbar.camxes_to_xbar import'
+                        ' collapse_chains'):
+            with self.subTest(imports):
+                out = run_python(
+                    f'{imports}\n'
+                    'import lojban_xbar\n'
+                    'from lojban_xbar import camxes_to_xbar\n'
+                    'print(camxes_to_xbar is lojban_xbar.camxes_to_xbar,'
+                    ' callable(camxes_to_xbar))\n')
+
+                assert_that(out, equal_to('True True'))
+
+    def test_all_lists_exports(self):
+        assert_that(sorted(lojban_xbar.__all__),
+                    equal_to(sorted(lojban_xbar._EXPORTS)))
+
+    def test_unknown_name(self):
+        with self.assertRaises(AttributeError):
+            getattr(lojban_xbar, 'no_such_name')
+        assert_that(lojban_xbar.lexp_to_tree,
+                    instance_of(types.FunctionType))
+
+
+if '__main__' == __name__:
+    unittest.main()
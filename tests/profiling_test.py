@@ -0,0 +1,89 @@
+import itertools
+import json
+import unittest
+from hamcrest import assert_that, equal_to, contains_string, has_item
+
+from lxslt import TransformChildren, Replace, apply_templates
+
+from util.fixture import load_camxes_parses
+
+from lojban_xbar import camxes_to_xbar
+from lojban_xbar.memo import SubtreeMemo
+from lojban_xbar.profiling import RuleProfiler
+from lojban_xbar.rule_index import RuleIndex, rule_name, rule_prefix
+
+
+class RuleProfilerTest(unittest.TestCase):
+    index = RuleIndex([rule_prefix('a', TransformChildren()),
+                       rule_name('b', Replace(['x']))])
+
+    def profile(self, tree) -> RuleProfiler:
+        # every clock reading advances the time by one second
+        profiler = RuleProfiler(clock=itertools.count().__next__)
+        apply_templates(profiler.rules_for(self.index), tree)
+        return profiler
+
+    def test_counters(self):
+        profiler = self.profile(['a1', ['b'], ['b'], ['c']])
+
+        rows = {row.label: row for row in profiler.rows()}
+        assert_that(rows['a*'].calls, equal_to(1))
+        assert_that(rows['a*'].nodes, equal_to(4))
+        assert_that(rows['b'].calls, equal_to(2))
+        assert_that(rows['b'].nodes, equal_to(2))
+        assert_that(profiler.visited, equal_to(4))
+
+    def test_exclusive_time(self):
+        profiler = self.profile(['a1', ['b']])
+
+        rows = {row.label: row for row in profiler.rows()}
+        # clock: a1 starts 0, b starts 1, b ends 2, a1 ends 3
+        assert_that(rows['b'].inclusive, equal_to(1))
+        assert_that(rows['a*'].inclusive, equal_to(3))
+        assert_that(rows['a*'].exclusive, equal_to(2))
+
+    def test_recursion_counted_once(self):
+        profiler = self.profile(['a1', ['a2', ['a3']]])
+
+        row, = profiler.rows()
+        assert_that(row.calls, equal_to(3))
+        assert_that(row.nodes, equal_to(3))
+        assert_that(row.inclusive, equal_to(5))
+        assert_that(row.exclusive, equal_to(5))
+
+    def test_by_transformer_and_dump(self):
+        profiler = self.profile(['a1', ['b'], ['a2']])
+
+        rows = [row.label for row in profiler.rows(by='transformer',
+                                                   sort='calls')]
+        assert_that(rows, equal_to(['TransformChildren', 'Replace']))
+        assert_that(profiler.table(), contains_string('TransformChildren'))
+        assert_that(json.loads(json.dumps(profiler.to_json()))['visited'],
+                    equal_to(3))
+
+    def test_clear(self):
+        profiler = self.profile(['a1'])
+
+        profiler.clear()
+
+        assert_that(profiler.rows(), equal_to([]))
+        assert_that(profiler.visited, equal_to(0))
+
+
+class ProfiledConversionTest(unittest.TestCase):
+    def test_same_result(self):
+        profiler = RuleProfiler()
+        memo = SubtreeMemo()
+        for name, tree in load_camxes_parses().items():
+            with self.subTest(name=name):
+                assert_that(camxes_to_xbar(tree, profiler=profiler),
+                            equal_to(camxes_to_xbar(tree)))
+                assert_that(
+                    camxes_to_xbar(tree, profiler=profiler, memo=memo),
+                    equal_to(camxes_to_xbar(tree)))
+        labels = [row.label for row in profiler.rows(by='transformer')]
+        assert_that(labels, has_item('TransformSentence'))
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,203 @@
+import multiprocessing
+import os
+import pickle
+import sqlite3
+import tempfile
+import unittest
+from hamcrest import assert_that, equal_to, none, is_not
+
+from util.fixture import load_camxes_parses
+
+from lojban_xbar import camxes_to_xbar, camxes_to_xbar_many, ResultCache
+from lojban_xbar.diagnostics import Diagnostic
+
+
+def write_concurrently(path: str, barrier, worker: int) -> None:
+    """ Write shared and own results, as fast as possible """
+    barrier.wait()
+    with ResultCache(path, max_entries=120, write_every=10) as cache:
+        for i in range(100):
+            tree = ['KOhA', str(i)] if i % 2 else ['KOhA', str(i), worker]
+            cache.put(cache.key(tree), tree)
+            cache.get(cache.key(['KOhA', '1']))
+
+
+class ResultCacheTest(unittest.TestCase):
+    mi = ['sumti_6', ['KOhA_clause', [['KOhA', 'mi']]]]
+    do = ['sumti_6', ['KOhA_clause', [['KOhA', 'do']]]]
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'cache.sqlite')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_persistent(self):
+        diagnostics = (Diagnostic('code', 'here', ('a message',)),)
+        with ResultCache(self.path) as cache:
+            key = cache.key(self.mi)
+            assert_that(cache.get(key), none())
+            cache.put(key, ['N-MAX'], diagnostics)
+
+        with ResultCache(self.path) as cache:
+            assert_that(cache.get(cache.key(self.mi)),
+                        equal_to((['N-MAX'], diagnostics)))
+            assert_that(cache.get(cache.key(self.do)), none())
+            assert_that(cache.stats(), equal_to(
+                {'hits': 1, 'misses': 1, 'size': 1,
+                 'max_entries': 1_000_000}))
+
+    def test_version_in_key(self):
+        with ResultCache(self.path) as cache:
+            cache.put(cache.key(self.mi), ['N-MAX'])
+
+        with ResultCache(self.path, version='next') as cache:
+            assert_that(cache.key(self.mi),
+                        is_not(equal_to(ResultCache(self.path)
+                                        .key(self.mi))))
+            assert_that(cache.get(cache.key(self.mi)), none())
+
+    def test_lru_eviction(self):
+        trees = [['KOhA', str(i)] for i in range(5)]
+        with ResultCache(self.path, max_entries=3,
+                         write_every=1) as cache:
+            for tree in trees[:3]:
+                cache.put(cache.key(tree), tree)
+            cache.get(cache.key(trees[0]))
+            for tree in trees[3:]:
+                cache.put(cache.key(tree), tree)
+
+            assert_that(len(cache), equal_to(3))
+            kept = [tree for tree in trees
+                    if cache.get(cache.key(tree)) is not None]
+            assert_that(kept, equal_to([trees[0], trees[3], trees[4]]))
+
+    def test_count(self):
+        with ResultCache(self.path, write_every=1) as cache:
+            for tree in (self.mi, self.do, self.mi):
+                cache.put(cache.key(tree), tree)
+
+            assert_that(len(cache), equal_to(2))
+            cache.clear()
+            assert_that(len(cache), equal_to(0))
+
+    def test_concurrent_writers(self):
+        barrier = multiprocessing.Barrier(2)
+        procs = [multiprocessing.Process(target=write_concurrently,
+                                         args=(self.path, barrier, worker))
+                 for worker in range(2)]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join(60)
+
+        assert_that([proc.exitcode for proc in procs], equal_to([0, 0]))
+        with ResultCache(self.path) as cache:
+            rows = cache.connection().execute(
+                'SELECT count(*) FROM results').fetchone()[0]
+
+            assert_that(len(cache), equal_to(rows))
+            assert_that(rows, equal_to(120))
+            assert_that(cache.get(cache.key(['KOhA', '1'])),
+                        equal_to((['KOhA', '1'], ())))
+
+    def test_count_of_old_file(self):
+        with ResultCache(self.path, write_every=1) as cache:
+            cache.put(cache.key(self.mi), self.mi)
+        conn = sqlite3.connect(self.path)
+        conn.executescript('DROP TABLE results_count;'
+                           ' DROP TRIGGER results_insert;'
+                           ' DROP TRIGGER results_delete;')
+        conn.close()
+
+        with ResultCache(self.path) as cache:
+            assert_that(len(cache), equal_to(1))
+
+    def test_pickled_reconnects(self):
+        with ResultCache(self.path) as cache:
+            cache.put(cache.key(self.mi), ['N-MAX'])
+            cache.flush()
+            copy = pickle.loads(pickle.dumps(cache))
+
+        assert_that(copy.get(copy.key(self.mi)), equal_to((['N-MAX'], ())))
+        copy.close()
+
+
+class BatchCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.trees = list(load_camxes_parses().values())
+        cls.expected = [camxes_to_xbar(tree) for tree in cls.trees]
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'cache.sqlite')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_second_run_from_cache(self):
+        for workers in (0, 2):
+            with self.subTest(workers=workers), \
+                    ResultCache(self.path) as cache:
+                cache.clear()
+                first = list(camxes_to_xbar_many(self.trees, workers=workers,
+                                                 cache=cache))
+                second = list(camxes_to_xbar_many(self.trees, workers=0,
+                                                  cache=cache))
+
+                assert_that([r.value for r in first],
+                            equal_to(self.expected))
+                assert_that(second, equal_to(first))
+                assert_that(cache.hits, equal_to(len(self.trees)))
+
+    def test_failure_not_cached(self):
+        with ResultCache(self.path) as cache:
+            results = list(camxes_to_xbar_many([['KU']], workers=0,
+                                               cache=cache))
+
+            assert_that(results[0].error, is_not(none()))
+            assert_that(len(cache), equal_to(0))
+
+    def test_key_error_is_per_tree(self):
+        with ResultCache(self.path) as cache:
+            results = list(camxes_to_xbar_many(
+                [self.trees[0], {'not', 'json'}, self.trees[1]], workers=0,
+                cache=cache))
+
+            assert_that([r.error is None for r in results],
+                        equal_to([True, False, True]))
+            assert_that(results[2].value, equal_to(self.expected[1]))
+
+    def test_locked_cache_does_not_stop_batch(self):
+        ResultCache(self.path).close()
+        lock = sqlite3.connect(self.path, isolation_level=None)
+        lock.execute('BEGIN IMMEDIATE')
+        try:
+            for workers in (0, 2):
+                with self.subTest(workers=workers):
+                    cache = ResultCache(self.path, write_every=1,
+                                        timeout=0.01)
+                    results = list(camxes_to_xbar_many(
+                        self.trees[:4], workers=workers, chunksize=2,
+                        cache=cache))
+
+                    assert_that([r.value for r in results],
+                                equal_to(self.expected[:4]))
+                    assert_that([r.diagnostics[-1].code
+                                 for r in results],
+                                equal_to(['cache-error'] * 4))
+                    if workers:
+                        cache.close()
+                        continue
+                    # the results are still pending, not lost
+                    with self.assertRaises(sqlite3.OperationalError):
+                        cache.close()
+        finally:
+            lock.rollback()
+            lock.close()
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from hamcrest import assert_that, equal_to, none
+
+from lxslt import apply_templates, Drop, Replace
+
+from util.fixture import load_camxes_parses
+
+from lojban_xbar.camxes_to_xbar import camxes_to_xbar, get_rule_index
+from lojban_xbar.rule_index import RuleIndex, rule_name, rule_prefix
+from lojban_xbar.rule_index import MAX_RESOLVED_NAMES
+
+
+class RuleIndexTest(unittest.TestCase):
+    rule_sumti_tail = rule_name('sumti_tail', Drop())
+    skip_sumti = rule_prefix('sumti_', Drop())
+    skip_sum = rule_prefix('sum', Drop())
+    rule_sumti6 = rule_name('sumti_6', Drop())
+
+    def test_exact_name(self):
+        index = RuleIndex([self.rule_sumti6])
+
+        assert_that(index.find('sumti_6'), equal_to(self.rule_sumti6))
+        assert_that(index.find('sumti_60'), none())
+
+    def test_first_match_wins(self):
+        index = RuleIndex([self.rule_sumti_tail, self.skip_sumti,
+                           self.skip_sum, self.rule_sumti6])
+
+        assert_that(index.find('sumti_tail'),
+                    equal_to(self.rule_sumti_tail))
+        assert_that(index.find('sumti_6'), equal_to(self.skip_sumti))
+        assert_that(index.find('sumti'), equal_to(self.skip_sum))
+        assert_that(index.find('su'), none())
+
+    def test_prefix_after_longer_prefix(self):
+        index = RuleIndex([self.skip_sum, self.skip_sumti])
+
+        assert_that(index.find('sumti_tail'), equal_to(self.skip_sum))
+
+    def test_resolved_names_are_bounded(self):
+        index = RuleIndex([self.rule_sumti6, self.skip_sumti])
+        for i in range(MAX_RESOLVED_NAMES + 10):
+            index.find(f'sumti_x{i}')
+
+        assert_that(len(index._resolved), equal_to(MAX_RESOLVED_NAMES))
+        assert_that(index.find('sumti_6'), equal_to(self.rule_sumti6))
+        assert_that(index.find('sumti_y'), equal_to(self.skip_sumti))
+
+    @staticmethod
+    def test_dispatch():
+        index = RuleIndex([rule_name('a', Replace(['x'])),
+                           rule_prefix('b', Drop())])
+
+        got = apply_templates(index.to_rules(), [['a'], ['bb'], ['c', ['b']]])
+
+        assert_that(got, equal_to(['x', ['c']]))
+
+
+class IndexedRulesExamplesTest(unittest.TestCase):
+    def test_same_as_linear_scan(self):
+        linear_rules = get_rule_index().to_linear_rules()
+        for code_name, tree in load_camxes_parses().items():
+            with self.subTest(code_name):
+                expected = apply_templates(linear_rules, tree)[0]
+
+                assert_that(camxes_to_xbar(tree), equal_to(expected))
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,98 @@
+import json
+import os
+import subprocess
+import tempfile
+import unittest
+from hamcrest import assert_that, equal_to, contains_string
+
+from util.fixture import load_camxes_parses
+from util.scripts import run_script, script_command, script_env
+
+from lojban_xbar import camxes_to_xbar, ResultCache
+
+
+class CamxesToXbarJsonlTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.trees = list(load_camxes_parses().values())
+        cls.xbars = [camxes_to_xbar(tree) for tree in cls.trees]
+
+    def test_malformed_line(self):
+        data = '\n'.join([json.dumps(self.trees[0]), '[1, 2',
+                          json.dumps(self.trees[1])]) + '\n'
+
+        proc = run_script('camxes_to_xbar.py', ['--jsonl'], data)
+
+        assert_that([json.loads(line) for line in proc.stdout.splitlines()],
+                    equal_to([self.xbars[0], None, self.xbars[1]]))
+        assert_that(proc.stderr, contains_string(': line 2: can not load'))
+
+    def test_id_field(self):
+        data = ''.join(json.dumps({'id': f'sentence {i}', 'tree': tree})
+                       + '\n' for i, tree in enumerate(self.trees[:3]))
+
+        proc = run_script('camxes_to_xbar.py', ['--jsonl', '--id-field',
+                                                'id'], data)
+
+        assert_that([json.loads(line) for line in proc.stdout.splitlines()],
+                    equal_to([{'id': f'sentence {i}', 'xbar': xbar}
+                              for i, xbar in enumerate(self.xbars[:3])]))
+
+    def test_workers_keep_order(self):
+        data = ''.join(json.dumps(tree) + '\n' for tree in self.trees)
+
+        proc = run_script('camxes_to_xbar.py', ['--jsonl', '--workers', '2',
+                                                '--flush-every', '5'], data)
+
+        assert_that([json.loads(line) for line in proc.stdout.splitlines()],
+                    equal_to(self.xbars))
+
+    def test_cache_written_on_broken_pipe(self):
+        data = ''.join(json.dumps(tree) + '\n' for tree in self.trees) * 50
+        with tempfile.TemporaryDirectory() as tmp, \
+                tempfile.TemporaryFile('w+') as h_in:
+            h_in.write(data)
+            h_in.seek(0)
+            path = os.path.join(tmp, 'cache.sqlite')
+            proc = subprocess.Popen(
+                script_command('camxes_to_xbar.py',
+                               ['--jsonl', '--cache', path]),
+                env=script_env(), text=True, stdin=h_in,
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            proc.stdout.readline()
+            proc.stdout.close()
+            proc.wait(60)
+
+            with ResultCache(path) as cache:
+                assert_that(len(cache) > 0, equal_to(True))
+
+    def test_jsonl_options_need_jsonl(self):
+        for args in (['--id-field', 'id'], ['--flush-every', '2'],
+                     ['--memo-size', '10'], ['--cache', 'x.sqlite'],
+                     ['--workers', '2']):
+            with self.subTest(args=args):
+                proc = run_script('camxes_to_xbar.py', args,
+                                  json.dumps(self.trees[0]), check=False)
+
+                assert_that(proc.returncode, equal_to(2))
+                assert_that(proc.stderr, contains_string('work'))
+
+
+class XbarToDotJsonlTest(unittest.TestCase):
+    def test_same_file_names(self):
+        lexp = camxes_to_xbar(load_camxes_parses()['prami'])
+        data = ''.join(json.dumps({'id': id_, 'xbar': lexp}) + '\n'
+                       for id_ in ('a/b', 'a_b', 'a/b', 'c'))
+        with tempfile.TemporaryDirectory() as tmp:
+            proc = run_script('xbar_to_dot.py', ['--jsonl', '--id-field',
+                                                 'id', '--out-dir', tmp],
+                              data)
+
+            assert_that(sorted(os.listdir(tmp)),
+                        equal_to(['a_b.dot', 'a_b~2.dot', 'a_b~3.dot',
+                                  'c.dot']))
+            assert_that(proc.stderr.count('already used'), equal_to(2))
+
+
+if '__main__' == __name__:
+    unittest.main()
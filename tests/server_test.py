@@ -0,0 +1,180 @@
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+import unittest.mock
+from hamcrest import assert_that, equal_to, contains_string, has_length
+
+from util.fixture import load_camxes_parses
+from util.scripts import run_script
+
+from lojban_xbar import camxes_to_xbar, lexp_to_tree, protocol
+from lojban_xbar.client import ConversionClient
+from lojban_xbar.graphviz import to_graphviz
+from lojban_xbar.protocol import HEADER, recv_frame, send_frame
+from lojban_xbar.server import ConversionServer, remove_stale_socket
+
+
+class ServerTestCase(unittest.TestCase):
+    workers = 0
+
+    @classmethod
+    def setUpClass(cls):
+        cls.trees = list(load_camxes_parses().values())[:4]
+        cls.expected = [camxes_to_xbar(tree) for tree in cls.trees]
+        cls.dir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.dir.name, 'xbar.sock')
+        cls.server = ConversionServer(cls.path, workers=cls.workers)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.thread.join()
+        cls.server.server_close()
+        cls.dir.cleanup()
+
+
+class ConversionServerTest(ServerTestCase):
+    def test_connection_reused(self):
+        with ConversionClient(self.path) as client:
+            xbars = [client.xbar(tree) for tree in self.trees]
+            sock = client.connect()
+            client.health()
+
+            assert_that(client.connect(), equal_to(sock))
+        assert_that(xbars, equal_to(self.expected))
+
+    def test_dot(self):
+        h = io.StringIO()
+        xmax = lexp_to_tree(self.expected[0])
+        to_graphviz(h, xmax)
+
+        with ConversionClient(self.path) as client:
+            dot = client.dot(self.expected[0])
+
+        assert_that(dot.splitlines(), has_length(len(h.getvalue()
+                                                      .splitlines())))
+
+    def test_error(self):
+        with ConversionClient(self.path) as client:
+            with self.assertRaises(RuntimeError) as raised:
+                client.xbar(['KU'])
+            with self.assertRaises(RuntimeError):
+                client.request('nope')
+
+            assert_that(str(raised.exception),
+                        contains_string('AssertionError'))
+            # the connection is still usable
+            assert_that(client.xbar(self.trees[0]),
+                        equal_to(self.expected[0]))
+
+    def test_stats(self):
+        with ConversionClient(self.path) as client:
+            before = client.stats()
+            client.xbar(self.trees[0])
+            after = client.stats()
+
+        assert_that(after['requests']['xbar'],
+                    equal_to(before['requests'].get('xbar', 0) + 1))
+        assert_that(after['status'], equal_to('ok'))
+
+    def test_bad_frame(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        with sock:
+            sock.sendall(HEADER.pack(3) + b'{{{')
+            response = recv_frame(sock)
+
+        assert_that(response['ok'], equal_to(False))
+
+    def test_raw_frames(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        with sock:
+            send_frame(sock, {'op': 'xbar', 'tree': self.trees[1]})
+            response = recv_frame(sock)
+
+        assert_that(response['value'], equal_to(self.expected[1]))
+        assert_that(response['diagnostics'], equal_to([]))
+
+    def test_malformed_op(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        with sock:
+            for request in ({'op': ['x']}, {'op': {'a': 1}}, ['op']):
+                send_frame(sock, request)
+                response = recv_frame(sock)
+
+                assert_that(response['ok'], equal_to(False))
+            send_frame(sock, {'op': 'health'})
+            assert_that(recv_frame(sock)['ok'], equal_to(True))
+
+    def test_response_too_large(self):
+        xbar = ['N-MAX', ['N-BAR', ['N', 'mi']]]
+        with ConversionClient(self.path) as client, \
+                unittest.mock.patch.object(protocol, 'MAX_FRAME_SIZE', 100):
+            with self.assertRaises(RuntimeError) as raised:
+                client.dot(xbar)
+
+            assert_that(str(raised.exception), contains_string('limit'))
+        with ConversionClient(self.path) as client:
+            assert_that(client.dot(xbar), contains_string('digraph'))
+
+    def test_client_script_jsonl(self):
+        data = '\n'.join([json.dumps(self.trees[0]), '{bad',
+                          json.dumps(self.trees[1])]) + '\n'
+
+        proc = run_script('xbar_client.py', ['--socket', self.path,
+                                             '--jsonl'], data, check=False)
+
+        assert_that(proc.returncode, equal_to(1))
+        assert_that([json.loads(line) for line in proc.stdout.splitlines()],
+                    equal_to([self.expected[0], None, self.expected[1]]))
+        assert_that(proc.stderr, contains_string(': line 2: can not load'))
+
+    def test_client_script_without_server(self):
+        proc = run_script('xbar_client.py',
+                          ['--socket', self.path + '.none', '--health'], '',
+                          check=False)
+
+        assert_that(proc.returncode, equal_to(1))
+        assert_that(proc.stderr.strip().splitlines(), has_length(1))
+
+    def test_already_running(self):
+        with self.assertRaises(OSError):
+            remove_stale_socket(self.path)
+
+
+class WorkersServerTest(ServerTestCase):
+    workers = 2
+
+    def test_workers(self):
+        with ConversionClient(self.path) as client:
+            assert_that([client.xbar(tree) for tree in self.trees],
+                        equal_to(self.expected))
+            assert_that(client.stats()['workers'], equal_to(2))
+
+    def test_dead_worker(self):
+        with ConversionClient(self.path) as client:
+            client.xbar(self.trees[0])
+            processes = list(self.server.pool._processes.values())
+            for process in processes:
+                process.kill()
+                process.join()
+
+            # the pool is broken, the request in it fails
+            with self.assertRaises(RuntimeError):
+                client.xbar(self.trees[0])
+
+            assert_that(client.xbar(self.trees[0]),
+                        equal_to(self.expected[0]))
+            assert_that(client.stats()['pool_restarts'], equal_to(1))
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import unittest
+from hamcrest import assert_that, equal_to, has_item, instance_of, is_not
+from hamcrest import less_than, same_instance
+
+from lojban_xbar import camxes_to_xbar, lexp_to_tree, XMax
+from lojban_xbar import collect_diagnostics
+from lojban_xbar.synthetic import CamxesGenerator, CONSTRUCTS, generate
+
+
+def node_names(tree, names: set) -> set:
+    if isinstance(tree, list):
+        if tree and isinstance(tree[0], str):
+            names.add(tree[0])
+        for kid in tree:
+            node_names(kid, names)
+    return names
+
+
+class CamxesGeneratorTest(unittest.TestCase):
+    def test_same_seed_same_trees(self):
+        first = json.dumps(list(generate(20, seed=1)))
+
+        assert_that(json.dumps(list(generate(20, seed=1))), equal_to(first))
+        assert_that(json.dumps(list(generate(20, seed=2))),
+                    is_not(equal_to(first)))
+
+    def test_converted_without_diagnostics(self):
+        for settings in ({}, {'rate': 0.8, 'max_depth': 3},
+                         {'max_sumti': 6, 'max_tanru': 5}):
+            for tree in generate(100, seed=3, **settings):
+                with collect_diagnostics() as diagnostics:
+                    xmax = lexp_to_tree(camxes_to_xbar(tree))
+                assert_that(list(diagnostics), equal_to([]))
+                assert_that(xmax, instance_of(XMax))
+
+    def test_constructs(self):
+        names = node_names(list(generate(100, seed=4)), set())
+        for name in ('LA_clause', 'LE_clause', 'FA_clause', 'SE_clause',
+                     'linkargs', 'links', 'NOI_clause', 'GOI_clause',
+                     'JOI_clause', 'JA_clause', 'NU_clause', 'MOI_clause',
+                     'PU_clause', 'quantifier'):
+            assert_that(names, has_item(name))
+
+        names = node_names(list(generate(100, seed=4,
+                                         constructs={'la'})), set())
+        assert_that(names, has_item('LA_clause'))
+        assert_that(names, is_not(has_item('LE_clause')))
+
+    def test_repetition(self):
+        trees = [json.dumps(tree) for tree in generate(
+            50, seed=5, sentence_repeat_rate=0.5)]
+
+        assert_that(len(set(trees)), less_than(len(trees)))
+
+    def test_repeated_trees_are_copies(self):
+        generator = CamxesGenerator(6, sentence_repeat_rate=1.0)
+        first = generator.text()
+        second = generator.text()
+
+        assert_that(second, equal_to(first))
+        assert_that(second, is_not(same_instance(first)))
+
+    def test_bad_settings(self):
+        with self.assertRaises(ValueError):
+            CamxesGenerator(max_tanru=0)
+        with self.assertRaises(ValueError):
+            CamxesGenerator(constructs=CONSTRUCTS | {'xu'})
+
+
+if '__main__' == __name__:
+    unittest.main()
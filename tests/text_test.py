@@ -0,0 +1,85 @@
+import io
+import itertools
+import json
+import types
+import unittest
+from hamcrest import assert_that, equal_to, instance_of
+
+from util.fixture import load_camxes_parses
+
+from lojban_xbar import camxes_to_xbar, camxes_text_to_xbar, XMax
+from lojban_xbar import collect_diagnostics, iter_sentence_nodes
+from lojban_xbar import iter_camxes_to_xbar
+from lojban_xbar.synthetic import CamxesGenerator, text
+
+
+class TextTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # the fixture texts of one sentence
+        cls.trees = [tree for tree in load_camxes_parses().values()
+                     if tree[0] == 'text'
+                     and len(list(iter_sentence_nodes(tree))) == 1]
+        cls.expected = [camxes_to_xbar(tree) for tree in cls.trees]
+        sentences = [next(iter_sentence_nodes(tree)) for tree in cls.trees]
+        cls.document = text(sentences[0], sentences[1:])
+
+
+class CamxesTextToXbarTest(TextTestCase):
+    def test_one_sentence(self):
+        for tree, expected in zip(self.trees, self.expected):
+            assert_that(camxes_text_to_xbar(tree), equal_to([expected]))
+
+    def test_several_sentences(self):
+        assert_that(camxes_text_to_xbar(self.document),
+                    equal_to(self.expected))
+
+    def test_lazy(self):
+        xbars = camxes_text_to_xbar(self.document, lazy=True)
+
+        assert_that(xbars, instance_of(types.GeneratorType))
+        assert_that(list(xbars), equal_to(self.expected))
+
+    def test_workers(self):
+        assert_that(camxes_text_to_xbar(self.document, workers=2,
+                                        chunksize=2),
+                    equal_to(self.expected))
+        assert_that(camxes_text_to_xbar(self.document, collapse=True,
+                                        workers=2),
+                    equal_to(self.expected))
+
+    def test_fragment_skipped(self):
+        tree = ['text', ['text_1', ['paragraphs', ['paragraph', [
+            'fragment', ['ek', ['A_clause', [['A', 'a']]]]]]]]]
+
+        with collect_diagnostics() as diagnostics:
+            xbars = camxes_text_to_xbar(tree)
+
+        assert_that(xbars, equal_to([]))
+        assert_that(dict(diagnostics.counts), equal_to({'fragment': 1}))
+
+
+class IterCamxesToXbarTest(TextTestCase):
+    def test_one_text(self):
+        assert_that(list(iter_camxes_to_xbar(self.document)),
+                    equal_to(self.expected))
+
+    def test_stream_of_texts(self):
+        stream = io.StringIO(''.join(f'{json.dumps(tree)}\n\n'
+                                     for tree in self.trees))
+
+        assert_that(list(iter_camxes_to_xbar(stream)),
+                    equal_to(self.expected))
+
+    def test_unbounded_stream(self):
+        xbars = iter_camxes_to_xbar(CamxesGenerator(seed=1))
+
+        assert_that(len(list(itertools.islice(xbars, 10))), equal_to(10))
+
+    def test_typed(self):
+        for xmax in iter_camxes_to_xbar(self.document, typed=True):
+            assert_that(xmax, instance_of(XMax))
+
+
+if '__main__' == __name__:
+    unittest.main()
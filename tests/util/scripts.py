@@ -0,0 +1,21 @@
+import os
+import subprocess
+import sys
+
+SCRIPTS = os.path.join(os.path.dirname(__file__), '..', '..', 'scripts')
+
+
+def script_command(name: str, args: list) -> list:
+    return [sys.executable, os.path.join(SCRIPTS, name), *args]
+
+
+def script_env() -> dict:
+    """ The environment of the scripts, with the path of the tests """
+    return dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+
+
+def run_script(name: str, args: list, data: str,
+               check: bool = True) -> subprocess.CompletedProcess:
+    return subprocess.run(script_command(name, args), input=data,
+                          env=script_env(), check=check,
+                          capture_output=True, text=True)
@@ -0,0 +1,45 @@
+import io
+import json
+import unittest
+from hamcrest import assert_that, equal_to
+
+from util.fixture import load_lcs
+
+from lojban_xbar import lexp_to_tree, NodeInterner
+from lojban_xbar.writer import dumps_lexp, dump_lexp, dump_lexp_lines
+
+
+class LexpWriterTest(unittest.TestCase):
+    trees = [lexp_to_tree(le) for le in load_lcs().values()]
+
+    def test_same_as_json_dumps(self):
+        interner = NodeInterner()
+        for tree in self.trees:
+            expected = json.dumps(tree.to_lexp())
+            assert_that(dumps_lexp(tree), equal_to(expected))
+            assert_that(dumps_lexp(interner.intern(tree)),
+                        equal_to(expected))
+
+    def test_tags_and_escapes(self):
+        tree = lexp_to_tree(
+            ['N-MAX', ['X-SPEC', ['tag', 'z'], ['tag', 'a', 'b"c']],
+             ['N-BAR', ['N', ['tag', 'pron'], ['tag', 'id', "ko'a"],
+                        'mí']]])
+
+        assert_that(dumps_lexp(tree), equal_to(json.dumps(tree.to_lexp())))
+
+    def test_text_and_binary_streams(self):
+        text = io.StringIO()
+        binary = io.BytesIO()
+
+        dump_lexp(self.trees[0], text)
+        dump_lexp_lines(self.trees, binary, buffer_size=16)
+
+        assert_that(text.getvalue(),
+                    equal_to(json.dumps(self.trees[0].to_lexp())))
+        assert_that(binary.getvalue().decode('ascii'), equal_to(''.join(
+            json.dumps(tree.to_lexp()) + '\n' for tree in self.trees)))
+
+
+if '__main__' == __name__:
+    unittest.main()